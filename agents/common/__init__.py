@@ -0,0 +1,21 @@
+"""
+common – infrastructure shared by the traffic, energy and events orchestrators.
+
+Every orchestrator imports these modules as `common.<module>`, so the
+multi-domain host loads each of them once and all domains share one governor,
+state store, breaker registry, logging pipeline, … The `agents/` directory
+must be on the import path: the Docker images copy `common/` next to the
+orchestrator code, and local runs use `PYTHONPATH=..` from an orchestrator
+directory.
+
+    governor, cassette         rate-limited / recorded Gemini calls
+    source_agent, compaction   sub-agent wrapper and its output compaction
+    breaker, deadline          per-source circuit breakers, request time budget
+    state_store, digest_cache  persisted sub-agent outputs, cached digests
+    freshness, coalescer       adaptive cache TTLs, request coalescing
+    admission, idempotency     load shedding, exactly-once runs per message
+    sharding, aliases          per-locality shards, canonical locality names
+    payload_codec              wire format of published digests
+    profiling, progress        on-demand profiles, streamed partial results
+    structured_logging         queued JSON logging
+"""
@@ -0,0 +1,97 @@
+"""
+admission.py – admission control for trigger messages.
+
+When Pub/Sub backs up, a minutes-old location ping still costs a full LLM run
+whose result is obsolete on arrival. Every entry point therefore asks its
+domain's `Admission` before running the pipeline:
+
+    ADMIT       fresh message and a free in-flight slot – run it, then release()
+    STALE       older than the domain's staleness budget (publish time → now)
+    OVERLOADED  MAX_IN_FLIGHT runs are already in progress on this instance
+
+Rejected requests are answered from the last cached digest when there is one.
+Otherwise a stale request is dropped and an overloaded one raises `Overloaded`
+so Pub/Sub redelivers it later (where it may in turn age out).
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# ── config ---------------------------------------------------------------------
+STALENESS_BUDGET_SEC = {
+    "traffic": 5 * 60,
+    "energy": 30 * 60,
+    "events": 6 * 60 * 60,
+}
+MAX_IN_FLIGHT = int(os.environ.get("ADMISSION_MAX_IN_FLIGHT", "4"))
+
+ADMIT, STALE, OVERLOADED = "admit", "stale", "overloaded"
+
+
+class Overloaded(RuntimeError):
+    """No capacity and nothing cached – let Pub/Sub redeliver the message."""
+
+
+def publish_timestamp(value: Any) -> Optional[float]:
+    """Epoch seconds of a Pub/Sub publish time (RFC 3339 string or datetime)."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        # RFC 3339 allows 9 fractional digits, fromisoformat (<3.11) only 6
+        head, _, frac = str(value).rstrip("Z").partition(".")
+        try:
+            return datetime.fromisoformat(f"{head}.{frac[:6] or 0}+00:00").timestamp()
+        except ValueError:
+            logger.warning("Unparseable publish time %r – admitting", value)
+            return None
+
+
+class Admission:
+    """Staleness budget and in-flight cap for one domain (thread-safe)."""
+
+    def __init__(
+        self, domain: str, max_age: Optional[float] = None, max_in_flight: int = MAX_IN_FLIGHT
+    ) -> None:
+        env = os.environ.get(f"ADMISSION_{domain.upper()}_MAX_AGE_SEC")
+        self.domain = domain
+        self.max_age = float(env) if env else max_age or STALENESS_BUDGET_SEC[domain]
+        self.max_in_flight = max_in_flight
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def admit(self, publish_time: Any = None) -> str:
+        """ADMIT (a slot is now held – call release()), STALE or OVERLOADED."""
+        published = publish_timestamp(publish_time)
+        if published is not None:
+            age = time.time() - published
+            if age > self.max_age:
+                logger.warning(
+                    "%s request is %.0fs old (budget %.0fs) – not running it", self.domain, age, self.max_age
+                )
+                return STALE
+        with self._lock:
+            if self._in_flight >= self.max_in_flight:
+                logger.warning("%s: %d runs in flight – shedding request", self.domain, self._in_flight)
+                return OVERLOADED
+            self._in_flight += 1
+        return ADMIT
+
+    def release(self) -> None:
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
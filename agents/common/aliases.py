@@ -0,0 +1,203 @@
+"""
+aliases.py – resolve free-text location mentions to canonical localities.
+
+The same place reaches us as "Silk Board", "Silk Board Junction", "Central
+Silk Board" or "HSR-Silk Board flyover" depending on the source, and every
+spelling used to become its own dedupe / cache / routing key. `resolve()`
+maps a mention to the canonical name of the prebuilt alias table:
+
+    1. normalise   lowercase, punctuation ("-", "–", ":", "/", …) → spaces
+    2. trie        longest alias found at any token position
+                   ("hsr silk board flyover" → "silk board" beats "hsr");
+                   on a tie a locality beats a corridor road, then the later
+                   match wins ("hosur road near silk board" → Silk Board)
+    3. fuzzy       otherwise, token n-grams against aliases of at least
+                   MIN_FUZZY_CHARS with the same first letter and token count,
+                   within MAX_EDITS Levenshtein edits ("koramangla" →
+                   Koramangala); short tokens and numbered tokens must match
+                   exactly, so "HBR Layout" stays apart from HSR Layout and
+                   "JC Nagar" from JP Nagar
+
+Aliases that are also part of other places' names ("airport", "hal", …) only
+match a whole mention, never inside a longer one. Results are memoised, so
+repeated mentions cost a dict lookup. Unknown mentions resolve to None and
+callers keep their own normalised text.
+"""
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+# canonical name → aliases (the canonical name itself is always an alias)
+ALIASES: Dict[str, Tuple[str, ...]] = {
+    "Koramangala": ("kormangala", "koramangala block", "sony world signal", "forum mall"),
+    "HSR Layout": ("hsr", "hosur sarjapur road layout", "agara"),
+    "Silk Board": ("central silk board", "silk board junction", "silkboard", "csb"),
+    "BTM Layout": ("btm", "btm 2nd stage", "udupi garden"),
+    "Bommanahalli": ("bommanhalli",),
+    "Electronic City": ("e city", "ecity", "electronics city", "electronic city flyover", "elevated expressway"),
+    "Bellandur": ("bellandur lake", "ecospace", "rmz ecospace"),
+    "Sarjapur Road": ("sarjapura road", "sarjapur", "wipro junction"),
+    "Marathahalli": ("marathalli", "marathahalli bridge", "kalamandir"),
+    "Whitefield": ("itpl", "itpb", "international tech park", "hope farm", "whitefield main road"),
+    "Brookefield": ("brookfield", "kundalahalli", "kundalahalli gate"),
+    "Hoodi": ("hoodi circle",),
+    "Kadugodi": ("kadugodi tree park",),
+    "Varthur": ("varthur kodi",),
+    "KR Puram": ("k r puram", "krishnarajapuram", "tin factory", "kr puram bridge"),
+    "Mahadevapura": ("mahadevpura", "phoenix marketcity"),
+    "Indiranagar": ("indira nagar", "cmh road", "hal 2nd stage", "hal ii stage"),
+    "Domlur": ("domlur flyover",),
+    "Ejipura": ("ejipura flyover", "sony signal"),
+    "Ulsoor": ("halasuru", "ulsoor lake"),
+    "MG Road": ("m g road", "mahatma gandhi road", "trinity circle", "anil kumble circle"),
+    "Brigade Road": ("brigade rd",),
+    "Richmond Town": ("richmond road", "richmond circle"),
+    "Shivajinagar": ("shivaji nagar", "shivajinagar bus stand"),
+    "Cubbon Park": ("cubbon road", "vidhana soudha", "kr circle"),
+    "Cunningham Road": ("cunningham",),
+    "Frazer Town": ("fraser town", "pulikeshi nagar"),
+    "Banaswadi": ("banaswadi ring road",),
+    "Hennur": ("hennur road", "hennur cross"),
+    "Nagawara": ("nagavara", "nagawara junction"),
+    "Manyata Tech Park": ("manyata", "manyata embassy business park"),
+    "Hebbal": ("hebbal flyover", "hebbal junction", "esteem mall"),
+    "RT Nagar": ("r t nagar", "rajiv gandhi nagar"),
+    "Yelahanka": ("yelahanka new town",),
+    "Kempegowda International Airport": ("kia", "airport", "bial", "blr airport", "devanahalli"),
+    "Sadashivanagar": ("sadashiva nagar", "mekhri circle"),
+    "Malleshwaram": ("malleswaram", "malleshwaram 18th cross"),
+    "Yeshwanthpur": ("yeshwantpur", "yesvantpur", "goraguntepalya"),
+    "Peenya": ("peenya industrial area", "jalahalli cross"),
+    "Rajajinagar": ("rajaji nagar", "navrang"),
+    "Vijayanagar": ("vijaynagar", "hosahalli"),
+    "Majestic": ("kempegowda bus station", "ksr railway station", "city railway station", "gandhinagar"),
+    "Lalbagh": ("lal bagh", "lalbagh west gate"),
+    "Basavanagudi": ("basavangudi", "gandhi bazaar"),
+    "Jayanagar": ("jaya nagar", "jayanagar 4th block", "south end circle"),
+    "JP Nagar": ("j p nagar", "jayaprakash nagar"),
+    "Banashankari": ("bsk", "banashankari temple"),
+    "Bannerghatta Road": ("bannerghatta", "bg road", "meenakshi mall"),
+    "Kanakapura Road": ("kanakpura road",),
+    "Rajarajeshwari Nagar": ("rr nagar", "r r nagar"),
+    "Kengeri": ("kengeri satellite town",),
+    "Outer Ring Road": ("orr", "outer ring rd"),
+    "Hosur Road": ("hosur main road",),
+    "Old Airport Road": ("hal airport road", "hal"),
+    "Tumkur Road": ("nh 48", "tumakuru road"),
+    "Mysore Road": ("mysuru road", "nayandahalli"),
+    "Bellary Road": ("ballari road",),
+}
+
+# aliases that are also words of other places' names ("Airport Road", "HAL 2nd
+# Stage"): they only resolve when they are the whole mention
+WHOLE_MENTION_ONLY = frozenset({"airport", "kia", "hal"})
+
+# long roads: a mention naming a spot on one ("hosur road near silk board")
+# is filed under the spot
+CORRIDORS = frozenset({
+    "Outer Ring Road", "Hosur Road", "Old Airport Road", "Tumkur Road", "Mysore Road", "Bellary Road",
+    "Sarjapur Road", "Bannerghatta Road", "Kanakapura Road",
+})
+
+MAX_EDITS = 2            # fuzzy bound for aliases over 10 characters, 1 below
+MIN_FUZZY_CHARS = 7      # shorter aliases only match exactly
+EXACT_TOKEN_CHARS = 3    # initialisms ("hsr", "jp", "rt") never tolerate a typo
+MAX_NGRAM = 4
+
+_PUNCT = re.compile(r"[^\w\s]+|_")
+
+
+def normalise(text: str) -> str:
+    return " ".join(_PUNCT.sub(" ", str(text or "")).lower().split())
+
+
+# ── index -------------------------------------------------------------------
+_END = ""                 # trie key marking the end of an alias
+_trie: Dict[str, dict] = {}
+_by_alias: Dict[str, str] = {}
+_by_length: Dict[int, List[Tuple[str, str]]] = {}   # fuzzy candidates per alias length
+for _name, _aliases in ALIASES.items():
+    for _alias in (_name, *_aliases):
+        _alias = normalise(_alias)
+        _by_alias[_alias] = _name
+        if _alias in WHOLE_MENTION_ONLY:
+            continue
+        if len(_alias) >= MIN_FUZZY_CHARS:
+            _by_length.setdefault(len(_alias), []).append((_alias, _name))
+        node = _trie
+        for token in _alias.split():
+            node = node.setdefault(token, {})
+        node[_END] = _name
+
+
+def _longest_match(tokens: List[str]) -> Optional[str]:
+    """Longest alias; ties go to a non-corridor, then to the later match."""
+    best, best_rank = None, (0, False, -1)
+    for start in range(len(tokens)):
+        node = _trie
+        for i in range(start, len(tokens)):
+            node = node.get(tokens[i])
+            if node is None:
+                break
+            if _END in node:
+                rank = (i - start + 1, node[_END] not in CORRIDORS, start)
+                if rank > best_rank:
+                    best, best_rank = node[_END], rank
+    return best
+
+
+def _within(a: str, b: str, bound: int) -> bool:
+    """Levenshtein(a, b) <= bound, banded with early exit."""
+    if abs(len(a) - len(b)) > bound:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [bound + 1] * len(b)
+        for j in range(max(1, i - bound), min(len(b), i + bound) + 1):
+            current[j] = min(
+                previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != b[j - 1])
+            )
+        if min(current) > bound:
+            return False
+        previous = current
+    return previous[-1] <= bound
+
+
+def _same_shape(gram: str, alias: str) -> bool:
+    """Same first letter and token count; short or numbered tokens identical."""
+    a, b = gram.split(), alias.split()
+    if gram[0] != alias[0] or len(a) != len(b):
+        return False
+    return all(
+        x == y for x, y in zip(a, b)
+        if len(x) <= EXACT_TOKEN_CHARS or len(y) <= EXACT_TOKEN_CHARS or not (x + y).isalpha()
+    )
+
+
+def _fuzzy(tokens: List[str]) -> Optional[str]:
+    grams = {
+        " ".join(tokens[i:i + n])
+        for n in range(min(MAX_NGRAM, len(tokens)), 0, -1)
+        for i in range(len(tokens) - n + 1)
+    }
+    for gram in sorted(grams, key=lambda g: (-len(g), g)):
+        for length in range(len(gram) - MAX_EDITS, len(gram) + MAX_EDITS + 1):
+            for alias, name in _by_length.get(length, ()):
+                if _same_shape(gram, alias) and _within(gram, alias, MAX_EDITS if length > 10 else 1):
+                    return name
+    return None
+
+
+@lru_cache(maxsize=4096)
+def resolve(text: str) -> Optional[str]:
+    """Canonical locality name for a mention, or None if nothing matches."""
+    key = normalise(text)
+    if not key:
+        return None
+    if key in _by_alias:
+        return _by_alias[key]
+    tokens = key.split()
+    return _longest_match(tokens) or _fuzzy(tokens)
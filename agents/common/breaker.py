@@ -0,0 +1,175 @@
+"""
+breaker.py – per-source circuit breakers and the "missing sources" of a digest.
+
+Each source (sub-agent or grounded tool call) gets a `CircuitBreaker` that
+watches its last BREAKER_WINDOW calls:
+
+    closed     calls go through; once BREAKER_MIN_CALLS are recorded and the
+               share of failures or of calls slower than BREAKER_SLOW_SEC
+               reaches BREAKER_FAILURE_RATE, the breaker opens
+    open       calls are refused immediately for BREAKER_OPEN_SEC
+    half-open  after that, one probe call is let through: success closes the
+               breaker (history cleared), failure re-opens it. A probe that
+               never reports back is given up after another BREAKER_OPEN_SEC
+
+With CIRCUIT_BREAKERS=1, `SourceAgent` skips a source whose breaker is open
+and also degrades a source that raises: it answers with a short
+"unavailable" record instead of failing the whole coordinator run.
+Skipped sources are reported with `mark_missing(name)` to every
+`collect_missing()` block that is active in the context, and the
+coordinators copy them into the digest's `missing_sources`.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# ── config ---------------------------------------------------------------------
+CIRCUIT_BREAKERS = os.environ.get("CIRCUIT_BREAKERS", "0") == "1"
+BREAKER_WINDOW = int(os.environ.get("BREAKER_WINDOW", "20"))
+BREAKER_MIN_CALLS = int(os.environ.get("BREAKER_MIN_CALLS", "4"))
+BREAKER_FAILURE_RATE = float(os.environ.get("BREAKER_FAILURE_RATE", "0.5"))
+BREAKER_SLOW_SEC = float(os.environ.get("BREAKER_SLOW_SEC", "90"))
+BREAKER_OPEN_SEC = float(os.environ.get("BREAKER_OPEN_SEC", "120"))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class BreakerOpen(RuntimeError):
+    """The source's breaker is open – the call was not attempted."""
+
+
+class CircuitBreaker:
+    """Rolling error-rate / latency breaker for one source (thread-safe)."""
+
+    def __init__(
+        self,
+        name: str,
+        window: int = BREAKER_WINDOW,
+        min_calls: int = BREAKER_MIN_CALLS,
+        failure_rate: float = BREAKER_FAILURE_RATE,
+        slow_sec: float = BREAKER_SLOW_SEC,
+        open_sec: float = BREAKER_OPEN_SEC,
+    ) -> None:
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_sec = slow_sec
+        self.open_sec = open_sec
+        self._lock = threading.Lock()
+        self._calls: Deque[bool] = deque(maxlen=window)   # True = failed or slow
+        self._opened_at: Optional[float] = None
+        self._probe_started: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return CLOSED
+            return HALF_OPEN if time.monotonic() - self._opened_at >= self.open_sec else OPEN
+
+    def allow(self) -> bool:
+        """True if a call may go ahead (in half-open state: the single probe)."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at < self.open_sec:
+                return False
+            if self._probe_started is not None and now - self._probe_started < self.open_sec:
+                return False
+            self._probe_started = now
+            return True
+
+    def record(self, ok: bool, elapsed: float) -> None:
+        bad = not ok or elapsed > self.slow_sec
+        with self._lock:
+            if self._opened_at is not None:
+                self._probe_started = None
+                if bad:
+                    self._opened_at = time.monotonic()
+                    logger.warning("Breaker %s: probe failed – open again", self.name)
+                else:
+                    self._opened_at = None
+                    self._calls.clear()
+                    logger.info("Breaker %s: probe succeeded – closed", self.name)
+                return
+            self._calls.append(bad)
+            failures = sum(self._calls)
+            if len(self._calls) >= self.min_calls and failures / len(self._calls) >= self.failure_rate:
+                self._opened_at = time.monotonic()
+                logger.warning(
+                    "Breaker %s: %d of the last %d calls failed or were slow – open for %.0fs",
+                    self.name, failures, len(self._calls), self.open_sec,
+                )
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    with _registry_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def guarded(name: str) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Run a blocking call under the *name* breaker; raises BreakerOpen when open."""
+
+    def decorator(fn: Callable[..., T]) -> Callable[..., T]:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            if not CIRCUIT_BREAKERS:
+                return fn(*args, **kwargs)
+            breaker = get_breaker(name)
+            if not breaker.allow():
+                mark_missing(name)
+                raise BreakerOpen(f"{name}: circuit open")
+            started, ok = time.monotonic(), False
+            try:
+                result = fn(*args, **kwargs)
+                ok = True
+            finally:
+                breaker.record(ok, time.monotonic() - started)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+# ── missing sources --------------------------------------------------------------
+_collectors: contextvars.ContextVar[Tuple[List[str], ...]] = contextvars.ContextVar(
+    "missing_sources", default=()
+)
+
+
+@contextmanager
+def collect_missing() -> Iterator[List[str]]:
+    """Collect the sources skipped inside this block (nested blocks see them too)."""
+    missing: List[str] = []
+    token = _collectors.set(_collectors.get() + (missing,))
+    try:
+        yield missing
+    finally:
+        _collectors.reset(token)
+
+
+def mark_missing(source: str) -> None:
+    for missing in _collectors.get():
+        if source not in missing:
+            missing.append(source)
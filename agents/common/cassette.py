@@ -0,0 +1,185 @@
+"""
+cassette.py – record / replay of Gemini interactions for offline runs.
+
+    CASSETTE_MODE=record   every model call (ADK `GovernedGemini` and
+                           `GroundedGemini.ask_json`) is passed through and its
+                           streamed responses – grounding metadata included –
+                           are appended, with their timing, to a gzip JSONL
+                           cassette in CASSETTE_DIR
+    CASSETTE_MODE=replay   the same calls are answered from the cassettes in
+                           CASSETTE_DIR without touching the network; responses
+                           are spaced as recorded, divided by CASSETTE_SPEED
+                           (0 = no delay)
+
+Interactions are keyed by a hash of the model id and the request's JSON form.
+Volatile fields (ADK function-call ids, context-cache state) are dropped
+before hashing so a replayed multi-turn agent run finds its recording.
+Identical requests recorded several times are replayed in recorded order; a
+request that was never recorded raises `CassetteMiss`, so a replay is
+deterministic or it fails loudly.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ── config ---------------------------------------------------------------------
+OFF, RECORD, REPLAY = "off", "record", "replay"
+CASSETTE_MODE = os.environ.get("CASSETTE_MODE", OFF).lower()
+CASSETTE_DIR = Path(os.environ.get("CASSETTE_DIR", "/tmp/omni_cassettes"))
+CASSETTE_SPEED = float(os.environ.get("CASSETTE_SPEED", "1"))
+
+_VOLATILE_KEYS = {"id"}                       # ADK function-call ids, at any depth
+_VOLATILE_FIELDS = frozenset({                # per-run request state, not request content
+    "cache_metadata", "cacheable_contents_token_count", "previous_interaction_id", "live_connect_config",
+})
+
+Frame = Tuple[float, Dict[str, Any]]          # (seconds since request, response)
+
+
+class CassetteMiss(KeyError):
+    """Replay mode met a request that is not on any cassette."""
+
+
+def _dump(obj: Any, exclude: frozenset = frozenset()) -> Any:
+    """JSON form of a model, also inside dicts and lists (never its repr); *exclude* drops model fields."""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json", exclude_none=True, exclude=exclude & set(type(obj).model_fields))
+    if isinstance(obj, dict):
+        return {str(k): _dump(v, exclude) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_dump(v, exclude) for v in obj]
+    return obj
+
+
+def _scrub(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _scrub(v) for k, v in value.items() if k not in _VOLATILE_KEYS}
+    if isinstance(value, list):
+        return [_scrub(v) for v in value]
+    return value
+
+
+def request_key(kind: str, model: str, request: Any) -> str:
+    """Stable hash of one model request."""
+    body = json.dumps(
+        [kind, model, _scrub(_dump(request, _VOLATILE_FIELDS))],
+        sort_keys=True, default=str, separators=(",", ":"),
+    )
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()[:32]
+
+
+class Take:
+    """Frames of one interaction while it is being recorded."""
+
+    def __init__(self, cassette: "Cassette", kind: str, model: str, key: str) -> None:
+        self._cassette = cassette
+        self._entry = {"key": key, "kind": kind, "model": model, "frames": []}
+        self._started = time.monotonic()
+
+    def add(self, response: Any) -> None:
+        self._entry["frames"].append((round(time.monotonic() - self._started, 3), _dump(response)))
+
+    def save(self) -> None:
+        self._cassette.write(self._entry)
+
+
+class Cassette:
+    def __init__(
+        self, mode: str = CASSETTE_MODE, directory: Path = CASSETTE_DIR, speed: float = CASSETTE_SPEED
+    ) -> None:
+        if mode not in (OFF, RECORD, REPLAY):
+            raise ValueError(f"CASSETTE_MODE must be off, record or replay, not {mode!r}")
+        self.mode = mode
+        self.directory = directory
+        self.speed = speed
+        self._lock = threading.Lock()
+        self._tapes: Dict[str, Deque[List[Frame]]] = defaultdict(deque)
+        self._path = directory / f"cassette-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.jsonl.gz"
+        if mode == RECORD:
+            directory.mkdir(parents=True, exist_ok=True)
+            logger.info("Recording Gemini interactions to %s", self._path)
+        elif mode == REPLAY:
+            self._load()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == RECORD
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == REPLAY
+
+    # -- record ------------------------------------------------------------------
+    def take(self, kind: str, model: str, key: str) -> Take:
+        return Take(self, kind, model, key)
+
+    def write(self, entry: Dict[str, Any]) -> None:
+        line = json.dumps(entry, separators=(",", ":"), ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            # one gzip member per interaction: a crash never corrupts earlier ones
+            with gzip.open(self._path, "at", encoding="utf-8") as f:
+                f.write(line)
+
+    # -- replay ------------------------------------------------------------------
+    def _load(self) -> None:
+        count = 0
+        for path in sorted(self.directory.glob("*.jsonl.gz")):
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    entry = json.loads(line)
+                    self._tapes[entry["key"]].append([tuple(fr) for fr in entry["frames"]])
+                    count += 1
+        logger.info("Loaded %d recorded interactions from %s", count, self.directory)
+
+    def _frames(self, key: str) -> List[Frame]:
+        with self._lock:
+            tape = self._tapes.get(key)
+            if not tape:
+                raise CassetteMiss(key)
+            # keep the last recording so repeated requests keep being served
+            return tape.popleft() if len(tape) > 1 else tape[0]
+
+    def _delays(self, frames: List[Frame]) -> Iterator[Tuple[float, Dict[str, Any]]]:
+        previous = 0.0
+        for offset, response in frames:
+            yield ((offset - previous) / self.speed if self.speed > 0 else 0.0), response
+            previous = offset
+
+    def play(self, key: str) -> List[Dict[str, Any]]:
+        """Blocking replay: sleeps out the recorded timing, returns all responses."""
+        responses = []
+        for delay, response in self._delays(self._frames(key)):
+            time.sleep(delay)
+            responses.append(response)
+        return responses
+
+    async def play_async(self, key: str) -> AsyncIterator[Dict[str, Any]]:
+        for delay, response in self._delays(self._frames(key)):
+            await asyncio.sleep(delay)
+            yield response
+
+
+_cassette: Optional[Cassette] = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette() -> Cassette:
+    """Process-wide cassette configured from the environment."""
+    global _cassette
+    with _cassette_lock:
+        if _cassette is None:
+            _cassette = Cassette()
+        return _cassette
@@ -0,0 +1,99 @@
+"""
+coalescer.py – collapse superseded requests for the same areas.
+
+When one app sends repeated location pings, the subscription fills with
+messages for the same `areas`, and each used to become a full pipeline run.
+With COALESCE_REQUESTS=1 the handler submits every request under its
+canonical area key:
+
+    first request for a key     opens a batch and waits COALESCE_WINDOW_SEC
+    more requests in the window join the batch; the newest one (by publish
+                                time, else arrival) replaces the pending args
+    window closed               the batch runs once with the newest args and
+                                every member gets the same result (or error)
+
+The superseded messages are acked as soon as the shared result is in, so a
+backlog costs O(distinct areas) runs instead of O(messages). Requests that
+arrive while a batch is already running open the next batch.
+
+Batches hand results over through `concurrent.futures.Future`, so members may
+await from different event loops (Cloud Function invocations each run their
+own `asyncio.run`).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+COALESCE_REQUESTS = os.environ.get("COALESCE_REQUESTS", "0") == "1"
+COALESCE_WINDOW_SEC = float(os.environ.get("COALESCE_WINDOW_SEC", "2"))
+
+
+@dataclass
+class _Batch:
+    args: Tuple[Any, ...]
+    order: float
+    members: int = 1
+    future: Future = field(default_factory=Future)
+
+
+class Coalescer:
+    def __init__(self, window: float = COALESCE_WINDOW_SEC, enabled: bool = COALESCE_REQUESTS) -> None:
+        self.window = window
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._pending: Dict[str, _Batch] = {}
+
+    async def submit(
+        self,
+        key: str,
+        fn: Callable[..., Awaitable[T]],
+        *args: Any,
+        order: Optional[float] = None,
+    ) -> T:
+        """Run `fn(*args)` for *key*, shared with other requests in the same window."""
+        if not self.enabled:
+            return await fn(*args)
+
+        order = time.time() if order is None else order
+        with self._lock:
+            batch = self._pending.get(key)
+            if batch is not None:
+                batch.members += 1
+                if order >= batch.order:
+                    batch.args, batch.order = args, order
+                leader = False
+            else:
+                batch = self._pending[key] = _Batch(args=args, order=order)
+                leader = True
+
+        if not leader:
+            return await asyncio.wrap_future(batch.future)
+
+        try:
+            await asyncio.sleep(self.window)
+            with self._lock:
+                del self._pending[key]
+            if batch.members > 1:
+                logger.info("Coalesced %d requests for %s into one run", batch.members, key)
+            result = await fn(*batch.args)
+        except BaseException as exc:
+            with self._lock:
+                if self._pending.get(key) is batch:
+                    del self._pending[key]
+            if not batch.future.done():
+                batch.future.set_exception(exc)
+            raise
+        batch.future.set_result(result)
+        return result
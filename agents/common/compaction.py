@@ -0,0 +1,199 @@
+"""
+compaction.py – compact sub-agent output before it reaches a coordinator.
+
+The source prompts answer in verbose Markdown (tables plus a "Search Strategy
+Log") or pretty-printed JSON, and all of it used to land in the coordinator's
+context through AgentTool. `compact()` turns that into minimal JSON:
+
+    Markdown tables   → {"<section heading>": [{"location": …, "type": …}, …]}
+                        ("#" column, placeholder rows and log sections dropped)
+    JSON              → same structure, empty fields dropped
+    anything else     → the text with log sections removed
+
+Records whose `location` is an alias ("Silk Board Junction") get the canonical
+name as `locality` ("Silk Board"), so the coordinator merges the same place
+reported by different sources.
+
+Long field values are clipped to MAX_FIELD_CHARS and the result is held to a
+per-source token budget (SOURCE_TOKEN_BUDGET, ~4 characters per token) by
+dropping the oldest trailing records; their number is reported as
+"truncated_records" (a bare record list becomes {"records": […],
+"truncated_records": n}). An object that is still too large once it has no
+records left loses its largest top-level fields, listed in
+"truncated_fields". `SourceAgent` applies it to the accepted tier output
+when COMPACT_SOURCES=1 (off by default).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+from common.aliases import resolve
+
+COMPACT_SOURCES = os.environ.get("COMPACT_SOURCES", "0") == "1"
+TOKEN_BUDGET = int(os.environ.get("SOURCE_TOKEN_BUDGET", "1200"))
+MAX_FIELD_CHARS = 240
+CHARS_PER_TOKEN = 4
+
+_HEADING = re.compile(r"^#{1,6}\s*(.+?)\s*$")
+_SEPARATOR = re.compile(r"^:?-{2,}:?$")
+_LOG_SECTION = re.compile(r"search (strategy )?log|queries used|sources consulted", re.I)
+_PLACEHOLDERS = {"", "…", "...", "-", "—", "n/a"}
+
+
+def parse_json(text: str) -> Optional[Any]:
+    """Best-effort JSON decode of an LLM answer (fences stripped)."""
+    m = re.search(r"```(?:json)?\s*([\s\S]+?)\s*```", text)
+    try:
+        return json.loads(m.group(1) if m else text)
+    except (json.JSONDecodeError, TypeError):
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _clip(value: str) -> str:
+    return value if len(value) <= MAX_FIELD_CHARS else value[: MAX_FIELD_CHARS - 1] + "…"
+
+
+def _column(header: str) -> str:
+    """"Location / Junction" → "location", "Time Reported" → "time_reported", "#" → ""."""
+    name = re.split(r"[/(]", header)[0].strip().lower()
+    return re.sub(r"\W+", "_", name).strip("_")
+
+
+def parse_tables(text: str) -> Dict[str, List[Dict[str, str]]]:
+    """Rows of every Markdown table, grouped by the heading above it."""
+    sections: Dict[str, List[Dict[str, str]]] = {}
+    heading, header = "records", None
+    for line in text.splitlines():
+        line = line.strip()
+        m = _HEADING.match(line)
+        if m:
+            heading, header = m.group(1), None
+            continue
+        if not line.startswith("|"):
+            header = None
+            continue
+        cells = [c.strip() for c in line.strip("|").split("|")]
+        if header is None:
+            header = [_column(c) for c in cells]
+            continue
+        if _LOG_SECTION.search(heading) or all(_SEPARATOR.match(c) for c in cells if c):
+            continue
+        row = {
+            col: _clip(cell)
+            for col, cell in zip(header, cells)
+            if col and cell.lower() not in _PLACEHOLDERS
+        }
+        if row:
+            sections.setdefault(heading, []).append(row)
+    return sections
+
+
+def strip_logs(text: str) -> str:
+    """Remove log sections (heading up to the next heading)."""
+    kept, skipping = [], False
+    for line in text.splitlines():
+        m = _HEADING.match(line.strip())
+        if m:
+            skipping = bool(_LOG_SECTION.search(m.group(1)))
+        if not skipping:
+            kept.append(line)
+    return "\n".join(kept).strip()
+
+
+def _prune(value: Any) -> Any:
+    if isinstance(value, dict):
+        pruned = {k: _prune(v) for k, v in value.items()}
+        return {k: v for k, v in pruned.items() if v not in (None, "", [], {})}
+    if isinstance(value, list):
+        return [_prune(v) for v in value]
+    if isinstance(value, str):
+        return _clip(value.strip())
+    return value
+
+
+def _tag_localities(data: Any) -> Any:
+    rows = data if isinstance(data, list) else [
+        row for value in data.values() if isinstance(value, list) for row in value
+    ]
+    for row in rows:
+        location = row.get("location") if isinstance(row, dict) else None
+        if isinstance(location, str):
+            name = resolve(location)
+            if name and name != location:
+                row["locality"] = name
+    return data
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _flagged(data: Any, dropped: int, fields: List[str]) -> Any:
+    if not (dropped or fields):
+        return data
+    flagged = {"records": data} if isinstance(data, list) else dict(data)
+    if dropped:
+        flagged["truncated_records"] = dropped
+    if fields:
+        flagged["truncated_fields"] = fields
+    return flagged
+
+
+def _fit(data: Any, budget: Optional[int]) -> str:
+    """
+    Serialise *data* within *budget*: drop trailing records of the longest list,
+    then (no records left) the largest top-level fields; both are reported.
+    """
+    text = _dumps(data)
+    if budget is None:
+        return text
+    dropped, fields = 0, []
+    while estimate_tokens(text) > budget:
+        lists = [data] if isinstance(data, list) else [v for v in data.values() if isinstance(v, list)]
+        longest = max(lists, key=len, default=None)
+        if longest:
+            longest.pop()
+            dropped += 1
+        elif isinstance(data, dict) and data:
+            field = max(data, key=lambda k: len(_dumps(data[k])))
+            del data[field]
+            fields.append(field)
+        else:
+            break
+        text = _dumps(_flagged(data, dropped, fields))
+    return text
+
+
+def compact(text: str, budget: Optional[int] = TOKEN_BUDGET) -> str:
+    """Compact form of one source answer (see module docstring)."""
+    data = parse_json(text)
+    if isinstance(data, (dict, list)):
+        return _fit(_tag_localities(_prune(data)), budget)
+    tables = parse_tables(text)
+    if tables:
+        return _fit(_tag_localities(tables), budget)
+    stripped = strip_logs(text)
+    if budget is not None and estimate_tokens(stripped) > budget:
+        stripped = stripped[: budget * CHARS_PER_TOKEN] + "…"
+    return stripped
+
+
+def source_records(answer: Any) -> List[Dict[str, Any]]:
+    """Flat list of the records in one source answer (JSON, Markdown tables or parsed)."""
+    data = parse_json(answer) if isinstance(answer, str) else answer
+    if data is None and isinstance(answer, str):
+        data = parse_tables(answer)
+    if isinstance(data, dict):
+        if "unavailable" in data:       # skipped source (see `breaker`)
+            return []
+        lists = [v for v in data.values() if isinstance(v, list)]
+        data = [row for rows in lists for row in rows] if lists else [data] if data else []
+    return [row for row in data or [] if isinstance(row, dict)]
@@ -0,0 +1,132 @@
+"""
+deadline.py – time budget of one request, from receipt to publish.
+
+A Cloud Function invocation is killed at its timeout and a push delivery is
+retried once its ack deadline passes; a coordinator run that overshoots either
+loses all of its work. The entry points open a budget when the message is
+received:
+
+    with budget():                     # REQUEST_DEADLINE_SEC from now
+        await handle_traffic_request(payload)
+
+The deadline lives in a contextvar, so it reaches the runner, every sub-agent
+and the publisher of that request (also through `asyncio.to_thread`):
+
+    coordinator  the ADK run is cancelled DEADLINE_PUBLISH_RESERVE_SEC before
+                 the deadline, pending sub-agents with it, and a partial digest
+                 is built from the tool results that already arrived
+    SourceAgent  a source with less than DEADLINE_MIN_SOURCE_SEC left is not
+                 started (reported missing) and does not escalate tiers
+    publisher    waits for the publish futures only until the deadline
+
+REQUEST_DEADLINE_SEC defaults to the smaller of FUNCTION_TIMEOUT_SEC and
+ACK_DEADLINE_SEC. The platform sets neither, so the Dockerfiles do, matching
+the deployed timeout; without any of them a warning is logged and 540 s (the
+Cloud Functions maximum for event triggers) is assumed. 0 disables it.
+
+Only a run cut off by the deadline raises `DeadlineExceeded`; a TimeoutError
+raised by the awaited code itself (a tool's own timeout) propagates unchanged.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Dict, Iterator, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def _configured_budget() -> float:
+    explicit = os.environ.get("REQUEST_DEADLINE_SEC")
+    if explicit:
+        return float(explicit)
+    limits = [float(os.environ[k]) for k in ("FUNCTION_TIMEOUT_SEC", "ACK_DEADLINE_SEC") if os.environ.get(k)]
+    if not limits:
+        logger.warning(
+            "None of REQUEST_DEADLINE_SEC, FUNCTION_TIMEOUT_SEC, ACK_DEADLINE_SEC is set – assuming %.0fs",
+            DEFAULT_DEADLINE_SEC,
+        )
+    return min(limits, default=DEFAULT_DEADLINE_SEC)
+
+
+# ── config ---------------------------------------------------------------------
+DEFAULT_DEADLINE_SEC = 540.0
+REQUEST_DEADLINE_SEC = _configured_budget()
+DEADLINE_PUBLISH_RESERVE_SEC = float(os.environ.get("DEADLINE_PUBLISH_RESERVE_SEC", "20"))
+DEADLINE_MIN_SOURCE_SEC = float(os.environ.get("DEADLINE_MIN_SOURCE_SEC", "30"))
+MIN_WAIT_SEC = 1.0
+
+
+class DeadlineExceeded(Exception):
+    """The request deadline (less the reserve) was reached before the run finished."""
+
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("deadline", default=None)
+
+
+@contextmanager
+def budget(seconds: Optional[float] = REQUEST_DEADLINE_SEC) -> Iterator[None]:
+    """Deadline *seconds* from now for this block; an earlier outer deadline wins."""
+    if not seconds or seconds <= 0:
+        yield
+        return
+    at = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(at if outer is None else min(outer, at))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining(reserve: float = 0.0) -> Optional[float]:
+    """Seconds left before the deadline less *reserve* (may be negative), None without one."""
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic() - reserve
+
+
+def wait_timeout() -> Optional[float]:
+    """Timeout for a blocking wait (publish futures): the time left, at least MIN_WAIT_SEC."""
+    left = remaining()
+    return None if left is None else max(left, MIN_WAIT_SEC)
+
+
+async def run_within(aw: Awaitable[T], reserve: float = DEADLINE_PUBLISH_RESERVE_SEC) -> T:
+    """Await *aw*; cancel it and raise DeadlineExceeded *reserve* seconds before the deadline."""
+    try:
+        return await asyncio.wait_for(aw, remaining(reserve))
+    except asyncio.TimeoutError:
+        left = remaining(reserve)
+        if left is None or left > 0:
+            raise     # the awaited code's own timeout, not ours
+        raise DeadlineExceeded(f"request deadline reached ({-left:.1f}s past the reserve)") from None
+
+
+class Arrivals:
+    """Tool calls and tool results seen in a coordinator's event stream."""
+
+    def __init__(self) -> None:
+        self.calls: Dict[str, int] = {}
+        self.results: Dict[str, List[Any]] = {}
+
+    def observe(self, event: Any) -> None:
+        for call in event.get_function_calls():
+            self.calls[call.name] = self.calls.get(call.name, 0) + 1
+        for response in event.get_function_responses():
+            result = response.response
+            # AgentTool and plain functions returning a non-dict answer {"result": …}
+            if isinstance(result, dict) and set(result) == {"result"}:
+                result = result["result"]
+            self.results.setdefault(response.name, []).append(result)
+
+    @property
+    def pending(self) -> List[str]:
+        """Tools called without a result yet."""
+        return [name for name, n in self.calls.items() if n > len(self.results.get(name, ()))]
@@ -0,0 +1,72 @@
+"""
+digest_cache.py – last digest produced per set of areas.
+
+Filled after every successful run and read by admission control: a request
+that is stale or arrives while the instance is saturated is answered with the
+cached digest for the same areas instead of a new LLM run, and by the
+per-area TTL of `freshness`. Entries older than DIGEST_CACHE_MAX_AGE_SEC are
+not served.
+
+An HTTP client asking for `refresh=1` wants a new run, not a cached answer:
+the host runs that request under `bypassing()`, and the handlers skip this
+cache, the freshness TTL and their other answer caches while `bypassed()`.
+Admission still falls back to the cached digest when the run is shed.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Generic, Iterator, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+DIGEST_CACHE_MAX_AGE_SEC = float(os.environ.get("DIGEST_CACHE_MAX_AGE_SEC", 30 * 60))
+DIGEST_CACHE_SIZE = int(os.environ.get("DIGEST_CACHE_SIZE", "256"))
+
+_bypass: contextvars.ContextVar[bool] = contextvars.ContextVar("digest_cache_bypass", default=False)
+
+
+@contextmanager
+def bypassing(flag: bool = True) -> Iterator[None]:
+    """Ask the handlers run in this context for a new digest (a no-op if not *flag*)."""
+    token = _bypass.set(flag)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def bypassed() -> bool:
+    return _bypass.get()
+
+
+class DigestCache(Generic[T]):
+    """LRU of area key → (digest, produced_at)."""
+
+    def __init__(self, max_age: float = DIGEST_CACHE_MAX_AGE_SEC, size: int = DIGEST_CACHE_SIZE) -> None:
+        self.max_age = max_age
+        self._size = size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[T, float]]" = OrderedDict()
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[T]:
+        """Cached digest for *key* unless older than *max_age* (default: the cache's)."""
+        limit = self.max_age if max_age is None else min(max_age, self.max_age)
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is None or time.time() - hit[1] > limit:
+                return None
+            self._entries.move_to_end(key)
+            return hit[0]
+
+    def put(self, key: str, digest: T) -> None:
+        with self._lock:
+            self._entries[key] = (digest, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._size:
+                self._entries.popitem(last=False)
@@ -0,0 +1,135 @@
+"""
+freshness.py – per-area cache TTL derived from how often the area changes.
+
+Silk Board or ORR change minute to minute, a residential layout barely in an
+hour, yet every area used to be re-crawled on every request. `Freshness`
+watches the per-locality shards of each published digest and keeps, per
+canonical locality, an exponentially decayed count of observed changes and of
+observed time (FRESHNESS_HALF_LIFE_SEC). Its change rate gives the TTL under
+which a cached digest is still expected to be current:
+
+    ttl = ln 2 / rate        (even odds that the area changed since)
+
+clamped to the domain's [min, max] bounds. A request for several areas uses
+the most volatile one. Areas never observed get the minimum TTL.
+
+A change is a different fingerprint: severity plus the short scalar fields of
+the area's records (location, delay, start/end time, …). Long free text
+(summaries, advice) is left out because it is re-worded on every LLM run.
+
+The handlers serve a cached digest younger than the TTL without a run when
+ADAPTIVE_FRESHNESS=1.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+from common.sharding import canonical_locality
+
+logger = logging.getLogger(__name__)
+
+# ── config ---------------------------------------------------------------------
+ADAPTIVE_FRESHNESS = os.environ.get("ADAPTIVE_FRESHNESS", "0") == "1"
+FRESHNESS_HALF_LIFE_SEC = float(os.environ.get("FRESHNESS_HALF_LIFE_SEC", 6 * 60 * 60))
+TTL_BOUNDS_SEC = {
+    "traffic": (60, 30 * 60),
+    "energy": (5 * 60, 2 * 60 * 60),
+}
+MAX_FINGERPRINT_FIELD_CHARS = 40
+_VOLATILE_KEYS = {"timestamp", "time_reported", "updated_at", "reported_at"}
+
+
+def fingerprint(severity: str, payload: Any) -> str:
+    """Stable digest of the parts of a shard that mean a real change."""
+    fields = set()
+
+    def walk(value: Any, key: str = "") -> None:
+        if isinstance(value, dict):
+            for k, v in value.items():
+                if k not in _VOLATILE_KEYS:
+                    walk(v, k)
+        elif isinstance(value, list):
+            for v in value:
+                walk(v, key)
+        elif value is not None:
+            text = " ".join(str(value).split()).lower()
+            if text and len(text) <= MAX_FINGERPRINT_FIELD_CHARS:
+                fields.add(f"{key}={text}")
+
+    walk(payload)
+    blob = json.dumps([severity, sorted(fields)], ensure_ascii=False)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _AreaStats:
+    fingerprint: str
+    seen_at: float
+    changes: float = 0.0      # decayed count of observed changes
+    exposure: float = 0.0     # decayed seconds observed
+
+
+class Freshness:
+    """Change-rate model and TTL per canonical locality for one domain (thread-safe)."""
+
+    def __init__(
+        self,
+        domain: str,
+        bounds: Optional[Tuple[float, float]] = None,
+        half_life: float = FRESHNESS_HALF_LIFE_SEC,
+    ) -> None:
+        low, high = bounds or TTL_BOUNDS_SEC[domain]
+        self.domain = domain
+        self.min_ttl = float(os.environ.get(f"FRESHNESS_{domain.upper()}_MIN_TTL_SEC", low))
+        self.max_ttl = float(os.environ.get(f"FRESHNESS_{domain.upper()}_MAX_TTL_SEC", high))
+        self.half_life = half_life
+        self._lock = threading.Lock()
+        self._areas: Dict[str, _AreaStats] = {}
+
+    def observe(self, areas: Iterable[str], shards: Iterable[Any], now: Optional[float] = None) -> None:
+        """
+        Record one published digest. Requested *areas* without a shard count as
+        "nothing reported", so an incident clearing is a change too.
+        """
+        now = time.time() if now is None else now
+        prints = {canonical_locality(a): fingerprint("low", None) for a in areas}
+        for shard in shards:
+            prints[canonical_locality(shard.area)] = fingerprint(shard.severity, shard.payload)
+        with self._lock:
+            for area, fp in prints.items():
+                stats = self._areas.get(area)
+                if stats is None:
+                    self._areas[area] = _AreaStats(fingerprint=fp, seen_at=now)
+                    continue
+                elapsed = max(now - stats.seen_at, 0.0)
+                decay = 0.5 ** (elapsed / self.half_life)
+                stats.changes = stats.changes * decay + (fp != stats.fingerprint)
+                stats.exposure = stats.exposure * decay + elapsed
+                stats.fingerprint, stats.seen_at = fp, now
+
+    def rate(self, area: str) -> Optional[float]:
+        """Estimated changes per second, None if the area was seen at most once."""
+        with self._lock:
+            stats = self._areas.get(canonical_locality(area))
+            if stats is None or stats.exposure <= 0:
+                return None
+            # one pseudo-change per max TTL keeps a never-changing area finite
+            return (stats.changes + 1) / (stats.exposure + self.max_ttl)
+
+    def ttl(self, areas: Sequence[str]) -> float:
+        """Seconds a cached digest for *areas* stays current (most volatile area wins)."""
+        ttls = []
+        for area in areas or ():
+            rate = self.rate(area)
+            ttls.append(self.min_ttl if rate is None else math.log(2) / rate)
+        ttl = min(ttls, default=self.min_ttl)
+        return min(max(ttl, self.min_ttl), self.max_ttl)
@@ -0,0 +1,239 @@
+"""
+governor.py – process-wide Gemini concurrency governor.
+
+Every coordinator, sub-agent and grounded helper in this process draws from the
+same per-model lane before it talks to Gemini:
+
+    • a token bucket caps the request *rate* (requests / second, with burst)
+    • an AIMD window caps *concurrency* – it grows by ~1 slot per window of
+      healthy calls and halves on a 429 or when latency exceeds the target
+    • throttled calls are retried individually with full-jitter backoff, so a
+      single 429 never discards the whole digest
+
+ADK agents use it through `governed(model_id)`, which returns a `Gemini` model
+whose `generate_content_async` is wrapped by the governor. A slot is held only
+while the model response is received, not while the agent flow handles it (and
+runs nested sub-agents on the same lane), so a coordinator never waits on its
+own slot. Synchronous callers (e.g. `GroundedGemini.ask_json`) use
+`governor.call(model_id, fn)`. Both share one google-genai client, and with it
+one HTTP connection pool, per process.
+
+Both paths also pass through the `cassette` record / replay layer
+(CASSETTE_MODE); in replay mode no request reaches the governor or Gemini.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import AsyncGenerator, Callable, Dict, List, Optional, TypeVar
+
+from google.genai import Client
+from google.adk.models import Gemini
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+
+from common.cassette import get_cassette, request_key
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# ── config ------------------------------------------------------------------
+RATE_PER_SEC = float(os.environ.get("GEMINI_RATE_PER_SEC", "2"))
+BURST = int(os.environ.get("GEMINI_BURST", "4"))
+MIN_CONCURRENCY = 1
+MAX_CONCURRENCY = int(os.environ.get("GEMINI_MAX_CONCURRENCY", "8"))
+INITIAL_CONCURRENCY = int(os.environ.get("GEMINI_INITIAL_CONCURRENCY", "4"))
+LATENCY_TARGET_SEC = float(os.environ.get("GEMINI_LATENCY_TARGET_SEC", "60"))
+MAX_RETRIES = int(os.environ.get("GEMINI_MAX_RETRIES", "5"))
+BACKOFF_BASE_SEC = 1.0
+BACKOFF_CAP_SEC = 30.0
+
+_RETRYABLE_CODES = {429, 503}
+_RETRYABLE_MARKERS = ("RESOURCE_EXHAUSTED", "UNAVAILABLE")
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """True for quota / overload errors that are worth retrying."""
+    if getattr(exc, "code", None) in _RETRYABLE_CODES:
+        return True
+    return any(marker in str(exc) for marker in _RETRYABLE_MARKERS)
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for the given 1-based attempt."""
+    return random.uniform(0, min(BACKOFF_CAP_SEC, BACKOFF_BASE_SEC * 2 ** attempt))
+
+
+# ── per-model lane ----------------------------------------------------------
+@dataclass
+class _Lane:
+    tokens: float = float(BURST)
+    refilled_at: float = field(default_factory=time.monotonic)
+    limit: float = float(INITIAL_CONCURRENCY)
+    in_flight: int = 0
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(BURST, self.tokens + (now - self.refilled_at) * RATE_PER_SEC)
+        self.refilled_at = now
+
+
+class GeminiGovernor:
+    """Token bucket + AIMD concurrency window per model id (thread-safe)."""
+
+    def __init__(self) -> None:
+        self._lanes: Dict[str, _Lane] = {}
+        self._cond = threading.Condition()
+
+    def _lane(self, model: str) -> _Lane:
+        lane = self._lanes.get(model)
+        if lane is None:
+            lane = self._lanes[model] = _Lane()
+        return lane
+
+    # ----------------------------------------------------------------------
+    def _try_acquire(self, model: str) -> float:
+        """Take a slot if possible; otherwise return seconds to wait."""
+        now = time.monotonic()
+        lane = self._lane(model)
+        lane.refill(now)
+        if lane.in_flight >= int(lane.limit):
+            return 0.05
+        if lane.tokens < 1:
+            return (1 - lane.tokens) / RATE_PER_SEC
+        lane.tokens -= 1
+        lane.in_flight += 1
+        return 0.0
+
+    def acquire(self, model: str) -> None:
+        with self._cond:
+            while (wait := self._try_acquire(model)) > 0:
+                self._cond.wait(wait)
+
+    async def acquire_async(self, model: str) -> None:
+        while True:
+            with self._cond:
+                wait = self._try_acquire(model)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def release(self, model: str, latency: float, throttled: bool) -> None:
+        """Return the slot and adapt the window (AIMD)."""
+        with self._cond:
+            lane = self._lane(model)
+            lane.in_flight = max(0, lane.in_flight - 1)
+            if throttled or latency > LATENCY_TARGET_SEC:
+                lane.limit = max(MIN_CONCURRENCY, lane.limit / 2)
+                logger.warning(
+                    "Gemini governor: %s window cut to %.1f (throttled=%s, %.1fs)",
+                    model, lane.limit, throttled, latency,
+                )
+            else:
+                lane.limit = min(MAX_CONCURRENCY, lane.limit + 1 / lane.limit)
+            self._cond.notify_all()
+
+    # ----------------------------------------------------------------------
+    def call(self, model: str, fn: Callable[[], T]) -> T:
+        """Run a blocking Gemini call under the governor, retrying 429s."""
+        attempt = 0
+        while True:
+            self.acquire(model)
+            started, throttled = time.monotonic(), False
+            try:
+                return fn()
+            except Exception as exc:
+                throttled = is_retryable(exc)
+                if not throttled or attempt >= MAX_RETRIES:
+                    raise
+            finally:
+                self.release(model, time.monotonic() - started, throttled)
+            attempt += 1
+            time.sleep(backoff_delay(attempt))
+
+
+# singleton
+governor = GeminiGovernor()
+
+
+_client: Optional[Client] = None
+_client_lock = threading.Lock()
+
+
+def shared_client() -> Client:
+    """Process-wide google-genai client (lazy)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = Client()
+        return _client
+
+
+# ── ADK model ----------------------------------------------------------------
+class GovernedGemini(Gemini):
+    """`Gemini` model whose every request goes through the shared governor."""
+
+    @cached_property
+    def api_client(self) -> Client:
+        return shared_client()
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        tape = get_cassette()
+        if not (tape.recording or tape.replaying):
+            async for response in self._generate(llm_request, stream):
+                yield response
+            return
+
+        key = request_key("llm", self.model, {"request": llm_request, "stream": stream})
+        if tape.replaying:
+            async for data in tape.play_async(key):
+                yield LlmResponse.model_validate(data)
+            return
+        take = tape.take("llm", self.model, key)
+        async for response in self._generate(llm_request, stream):
+            take.add(response)
+            yield response
+        take.save()
+
+    async def _generate(
+        self, llm_request: LlmRequest, stream: bool
+    ) -> AsyncGenerator[LlmResponse, None]:
+        attempt = 0
+        while True:
+            await governor.acquire_async(self.model)
+            started, throttled = time.monotonic(), False
+            responses: List[LlmResponse] = []
+            try:
+                # Receive the whole response before yielding any of it: the ADK flow
+                # runs AgentTool / FunctionTool sub-agents while this generator is
+                # paused at `yield`, and they must neither wait for the slot held
+                # here nor count towards its latency.
+                async for response in super().generate_content_async(llm_request, stream):
+                    responses.append(response)
+                break
+            except Exception as exc:
+                throttled = is_retryable(exc)
+                if not throttled or attempt >= MAX_RETRIES:
+                    raise
+            finally:
+                governor.release(self.model, time.monotonic() - started, throttled)
+            attempt += 1
+            delay = backoff_delay(attempt)
+            logger.info("Retrying %s in %.1fs (attempt %d)", self.model, delay, attempt)
+            await asyncio.sleep(delay)
+        for response in responses:
+            yield response
+
+
+def governed(model_id: str) -> GovernedGemini:
+    """Model object for `LlmAgent(model=...)` that honours the governor."""
+    return GovernedGemini(model=model_id)
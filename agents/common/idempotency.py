@@ -0,0 +1,214 @@
+"""
+idempotency.py – at-most-once processing of redelivered trigger messages.
+
+Pub/Sub delivers at least once and Cloud Functions retry, so the same trigger
+can reach a handler several times. `run_once` keys every delivery by Pub/Sub
+message ID + a hash of the payload and records the outcome:
+
+    first delivery       claim the key, produce the digest, publish it and
+                         store the digest with whether the publish succeeded
+    duplicate, done      return the stored digest; republish it only if the
+                         earlier publish failed
+    duplicate, running   another worker holds the claim – raise `InProgress`,
+                         so the delivery is nacked (Cloud Function: retried)
+                         and comes back once that run has finished or died
+    earlier run failed   the claim was released – run again
+
+Records expire after IDEMPOTENCY_TTL_SEC; a claim whose run never finished
+(crash, timeout) can be taken over after IDEMPOTENCY_CLAIM_TTL_SEC, by
+default a minute past the request `deadline`, when the run has been cut off.
+Calls without a message ID (local runs, tests) are not deduplicated.
+
+    IDEMPOTENCY_BACKEND=sqlite   (default) survives restarts of a warm instance
+    IDEMPOTENCY_BACKEND=memory   per-process dict
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Type, TypeVar
+
+from pydantic import BaseModel
+
+from common.deadline import REQUEST_DEADLINE_SEC
+
+logger = logging.getLogger(__name__)
+
+# ── config ---------------------------------------------------------------------
+IDEMPOTENCY_BACKEND = os.environ.get("IDEMPOTENCY_BACKEND", "sqlite")
+IDEMPOTENCY_PATH = os.environ.get("IDEMPOTENCY_PATH", "/tmp/omni_idempotency.sqlite3")
+IDEMPOTENCY_TTL_SEC = float(os.environ.get("IDEMPOTENCY_TTL_SEC", 24 * 60 * 60))
+IDEMPOTENCY_CLAIM_TTL_SEC = float(
+    os.environ.get("IDEMPOTENCY_CLAIM_TTL_SEC", REQUEST_DEADLINE_SEC + 60 if REQUEST_DEADLINE_SEC > 0 else 15 * 60)
+)
+
+RUNNING, DONE = "running", "done"
+
+D = TypeVar("D", bound=BaseModel)
+
+
+class InProgress(RuntimeError):
+    """Another worker holds the claim – let Pub/Sub redeliver the message."""
+
+
+class Record(NamedTuple):
+    state: str
+    result: Optional[str]      # digest JSON once DONE
+    published: bool
+    updated_at: float
+
+
+def delivery_key(message_id: str, payload: Any) -> str:
+    body = json.dumps(payload, sort_keys=True, default=str, separators=(",", ":"))
+    return f"{message_id}:{hashlib.sha256(body.encode('utf-8')).hexdigest()[:16]}"
+
+
+def _live(record: Optional[Record], now: float) -> Optional[Record]:
+    """Drop expired records and abandoned claims."""
+    if record is None:
+        return None
+    ttl = IDEMPOTENCY_CLAIM_TTL_SEC if record.state == RUNNING else IDEMPOTENCY_TTL_SEC
+    return record if now - record.updated_at <= ttl else None
+
+
+class MemoryIdempotencyStore:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._records: Dict[str, Record] = {}
+
+    def claim(self, key: str) -> Optional[Record]:
+        """Existing live record, or None after atomically claiming *key*."""
+        now = time.time()
+        with self._lock:
+            existing = _live(self._records.get(key), now)
+            if existing is not None:
+                return existing
+            self._records[key] = Record(RUNNING, None, False, now)
+            if len(self._records) > 10_000:
+                self._records = {k: r for k, r in self._records.items() if _live(r, now)}
+        return None
+
+    def complete(self, key: str, result: str, published: bool) -> None:
+        with self._lock:
+            self._records[key] = Record(DONE, result, published, time.time())
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            self._records.pop(key, None)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS deliveries (
+    key        TEXT PRIMARY KEY,
+    state      TEXT NOT NULL,
+    result     TEXT,
+    published  INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+class SqliteIdempotencyStore:
+    def __init__(self, path: str = IDEMPOTENCY_PATH) -> None:
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def claim(self, key: str) -> Optional[Record]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state, result, published, updated_at FROM deliveries WHERE key = ?", (key,)
+            ).fetchone()
+            existing = _live(Record(row[0], row[1], bool(row[2]), row[3]) if row else None, now)
+            if existing is not None:
+                return existing
+            self._conn.execute(
+                "INSERT OR REPLACE INTO deliveries VALUES (?, ?, NULL, 0, ?)", (key, RUNNING, now)
+            )
+            self._conn.execute(
+                "DELETE FROM deliveries WHERE updated_at < ?", (now - IDEMPOTENCY_TTL_SEC,)
+            )
+            self._conn.commit()
+        return None
+
+    def complete(self, key: str, result: str, published: bool) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO deliveries VALUES (?, ?, ?, ?, ?)",
+                (key, DONE, result, int(published), time.time()),
+            )
+            self._conn.commit()
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM deliveries WHERE key = ?", (key,))
+            self._conn.commit()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_idempotency_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = (
+                MemoryIdempotencyStore() if IDEMPOTENCY_BACKEND == "memory" else SqliteIdempotencyStore()
+            )
+        return _store
+
+
+async def run_once(
+    message_id: Optional[str],
+    payload: Any,
+    produce: Callable[[], Awaitable[Optional[D]]],
+    publish: Callable[[D], Awaitable[bool]],
+    model: Type[D],
+) -> Optional[D]:
+    """Produce and publish a digest once per delivery (see module docstring)."""
+    if not message_id:
+        digest = await produce()
+        if digest is not None:
+            await publish(digest)
+        return digest
+
+    store = get_idempotency_store()
+    key = delivery_key(message_id, payload)
+    record = store.claim(key)
+    if record is not None:
+        if record.state == RUNNING:
+            raise InProgress(f"message {message_id} is already being processed")
+        digest = model.model_validate_json(record.result)
+        if record.published:
+            logger.info("Message %s already processed – returning recorded digest", message_id)
+        else:
+            logger.info("Message %s processed but not published – republishing", message_id)
+            store.complete(key, record.result, await publish(digest))
+        return digest
+
+    try:
+        digest = await produce()
+    except BaseException:
+        store.release(key)   # let the redelivery run again
+        raise
+    if digest is None:
+        store.release(key)
+        return None
+    result = digest.model_dump_json()
+    try:
+        published = await publish(digest)
+    except BaseException:
+        store.complete(key, result, False)   # the redelivery only republishes
+        raise
+    store.complete(key, result, published)
+    return digest
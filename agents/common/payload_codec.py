@@ -0,0 +1,86 @@
+"""
+payload_codec.py – wire format of the digests published to Pub/Sub.
+
+Digests used to be published as `json.dumps(..., indent=2)` text and then
+JSON-encoded a second time as a string. `encode()` writes them once, with
+compact separators, and compresses payloads of PAYLOAD_COMPRESS_MIN_BYTES or
+more when PAYLOAD_COMPRESSION is set:
+
+    none   (default)  compact JSON only
+    gzip              gzip, attribute content-encoding=gzip
+    zstd              zstandard (needs the `zstandard` package, falls back to
+                      gzip without it), attribute content-encoding=zstd
+
+The compressed form is only used when it is actually smaller. Consumers call
+`decode(data, attributes)`, which also accepts the old double-encoded
+messages. The Go backend router understands gzip; use zstd only for
+consumers that decode it.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:   # optional dependency
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+PAYLOAD_COMPRESSION = os.environ.get("PAYLOAD_COMPRESSION", "none").lower()
+PAYLOAD_COMPRESS_MIN_BYTES = int(os.environ.get("PAYLOAD_COMPRESS_MIN_BYTES", "4096"))
+ENCODING_ATTRIBUTE = "content-encoding"
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 10
+
+
+def dumps(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def encode(
+    value: Any,
+    compression: str = PAYLOAD_COMPRESSION,
+    threshold: int = PAYLOAD_COMPRESS_MIN_BYTES,
+) -> Tuple[bytes, Dict[str, str]]:
+    """(message data, attributes) for a JSON-serialisable value."""
+    data = dumps(value)
+    if compression in ("", "none") or len(data) < threshold:
+        return data, {}
+    if compression == "zstd" and zstandard is None:
+        logger.warning("zstandard is not installed – compressing with gzip")
+        compression = "gzip"
+    if compression == "zstd":
+        packed = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    elif compression == "gzip":
+        packed = gzip.compress(data, compresslevel=GZIP_LEVEL)
+    else:
+        raise ValueError(f"Unknown PAYLOAD_COMPRESSION {compression!r}")
+    if len(packed) >= len(data):
+        return data, {}
+    return packed, {ENCODING_ATTRIBUTE: compression}
+
+
+def decode(data: bytes, attributes: Optional[Mapping[str, str]] = None) -> Any:
+    """Inverse of `encode`; also unwraps legacy JSON-in-a-JSON-string messages."""
+    encoding = (attributes or {}).get(ENCODING_ATTRIBUTE, "identity")
+    if encoding == "gzip":
+        data = gzip.decompress(data)
+    elif encoding == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd-encoded message but zstandard is not installed")
+        data = zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    elif encoding != "identity":
+        raise ValueError(f"Unknown {ENCODING_ATTRIBUTE} {encoding!r}")
+    value = json.loads(data.decode("utf-8"))
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            return value
+    return value
@@ -0,0 +1,123 @@
+"""
+profiling.py – on-demand cProfile + tracemalloc capture per invocation.
+
+Profiling is off by default and switched on either for every invocation
+(PROFILE_INVOCATIONS=1) or for one message, by publishing it with the Pub/Sub
+attribute `profile=1`. The entry points mark such a request with
+`requested(attributes)`; the coordinators' `_run_and_clean` is decorated with
+`profile_invocation(name)`, which then writes
+
+    <PROFILE_DIR>/<timestamp>-<name>.prof         cProfile stats (pstats / snakeviz)
+    <PROFILE_DIR>/<timestamp>-<name>.tracemalloc  tracemalloc snapshot
+    <PROFILE_DIR>/<timestamp>-<name>.txt          top functions and allocation sites
+
+The oldest files are deleted once the directory exceeds PROFILE_DIR_MAX_MB.
+cProfile and tracemalloc observe the whole process, so other requests running
+concurrently on the same loop show up too; only one capture runs at a time.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import cProfile
+import functools
+import io
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Iterator, Mapping, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+PROFILE_ALL = os.environ.get("PROFILE_INVOCATIONS", "0") == "1"
+PROFILE_DIR = Path(os.environ.get("PROFILE_DIR", "/tmp/omni_profiles"))
+PROFILE_DIR_MAX_BYTES = int(float(os.environ.get("PROFILE_DIR_MAX_MB", "200")) * 1024 * 1024)
+PROFILE_ATTRIBUTE = "profile"
+TRACEMALLOC_FRAMES = 25
+
+_requested: contextvars.ContextVar[bool] = contextvars.ContextVar("profile_requested", default=False)
+_capture = threading.Lock()
+
+
+@contextmanager
+def requested(attributes: Optional[Mapping[str, Any]]) -> Iterator[None]:
+    """Mark the current context for profiling if the message asks for it."""
+    wanted = str((attributes or {}).get(PROFILE_ATTRIBUTE, "")).lower() in ("1", "true", "yes")
+    token = _requested.set(wanted or _requested.get())
+    try:
+        yield
+    finally:
+        _requested.reset(token)
+
+
+def _enforce_retention(directory: Path = PROFILE_DIR, max_bytes: int = PROFILE_DIR_MAX_BYTES) -> None:
+    files = sorted((p for p in directory.iterdir() if p.is_file()), key=lambda p: p.stat().st_mtime)
+    total = sum(p.stat().st_size for p in files)
+    for path in files:
+        if total <= max_bytes:
+            break
+        total -= path.stat().st_size
+        path.unlink(missing_ok=True)
+
+
+def _write(name: str, profile: cProfile.Profile, snapshot: tracemalloc.Snapshot, elapsed: float) -> Path:
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    base = PROFILE_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{name}"
+    profile.dump_stats(f"{base}.prof")
+    snapshot.dump(f"{base}.tracemalloc")
+
+    summary = io.StringIO()
+    summary.write(f"{name}: {elapsed:.2f}s wall\n\n")
+    pstats.Stats(profile, stream=summary).sort_stats("cumulative").print_stats(30)
+    summary.write("\nTop allocation sites\n")
+    for stat in snapshot.statistics("lineno")[:20]:
+        summary.write(f"{stat}\n")
+    Path(f"{base}.txt").write_text(summary.getvalue(), encoding="utf-8")
+
+    _enforce_retention()
+    return base
+
+
+def profile_invocation(name: str) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """Decorate an async function so requested invocations are profiled."""
+
+    def decorator(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            if not (PROFILE_ALL or _requested.get()):
+                return await fn(*args, **kwargs)
+            if not _capture.acquire(blocking=False):
+                logger.info("Profiler busy – running %s unprofiled", name)
+                return await fn(*args, **kwargs)
+
+            own_tracing = not tracemalloc.is_tracing()
+            if own_tracing:
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+            profile = cProfile.Profile()
+            started = time.perf_counter()
+            profile.enable()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                profile.disable()
+                elapsed = time.perf_counter() - started
+                snapshot = tracemalloc.take_snapshot()
+                if own_tracing:
+                    tracemalloc.stop()
+                try:
+                    logger.info("Profile of %s written to %s.*", name, _write(name, profile, snapshot, elapsed))
+                except OSError as e:
+                    logger.error("Could not write profile of %s: %s", name, e)
+                finally:
+                    _capture.release()
+
+        return wrapper
+
+    return decorator
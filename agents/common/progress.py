@@ -0,0 +1,48 @@
+"""
+progress.py – partial results of a running pipeline, for streaming clients.
+
+The HTTP host streams digests as server-sent events. While a request runs,
+every accepted sub-agent output is handed to the sink installed for that
+request with `streaming(sink)`:
+
+    with streaming(lambda source, text: ...):
+        digest = await handle_traffic_request(payload)
+
+`SourceAgent` calls `emit(source_name, text)`; without a sink (Pub/Sub
+invocations) that is a no-op. The sink is kept in a contextvar, so concurrent
+requests on one loop only see their own sub-agents. Sinks are called on the
+pipeline's thread and must not block.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import logging
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+Sink = Callable[[str, str], None]
+
+_sink: contextvars.ContextVar[Optional[Sink]] = contextvars.ContextVar("progress_sink", default=None)
+
+
+@contextmanager
+def streaming(sink: Optional[Sink]) -> Iterator[None]:
+    """Send partial results of the pipeline run in this context to *sink*."""
+    token = _sink.set(sink)
+    try:
+        yield
+    finally:
+        _sink.reset(token)
+
+
+def emit(source: str, text: str) -> None:
+    sink = _sink.get()
+    if sink is None:
+        return
+    try:
+        sink(source, text)
+    except Exception as e:   # a gone client must not fail the pipeline
+        logger.warning("Progress sink for %s failed: %s", source, e)
@@ -0,0 +1,90 @@
+"""
+sharding.py – split a digest into one Pub/Sub message per locality.
+
+In sharded publish mode (SHARDED_PUBLISH=1) each orchestrator emits one
+message per canonical locality instead of one monolithic digest. Every message
+carries `area`, `severity` and `domain` attributes so subscriptions can use
+server-side filters, and the area doubles as the ordering key.
+"""
+
+from __future__ import annotations
+
+import ast
+import json
+import os
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List
+
+from common.aliases import resolve
+
+SHARDED_PUBLISH = os.environ.get("SHARDED_PUBLISH", "0") == "1"
+
+SEVERITIES = ("low", "medium", "high")
+_SEVERITY_WORDS = {
+    "minor": "low", "low": "low",
+    "moderate": "medium", "medium": "medium",
+    "severe": "high", "high": "high",
+}
+CITY_WIDE = "bengaluru"
+
+
+@dataclass
+class Shard:
+    area: str
+    severity: str
+    payload: Dict[str, Any]
+
+
+def canonical_locality(name: Any) -> str:
+    """
+    Stable key for a locality mention: the alias table's canonical name
+    ("Central Silk Board", "HSR-Silk Board flyover" → "silk board"), else the
+    normalised text ("  Foo Nagar " → "foo nagar").
+    """
+    text = re.sub(r"\s+", " ", str(name or "")).strip().lower()
+    if not text:
+        return CITY_WIDE
+    canonical = resolve(text)
+    return canonical.lower() if canonical else text
+
+
+def severity_of(text: Any) -> str:
+    """Map free-text severity ("Severe; police-confirmed", "High") to low/medium/high."""
+    found = [v for w, v in _SEVERITY_WORDS.items() if re.search(rf"\b{w}\b", str(text or ""), re.I)]
+    return max(found, key=SEVERITIES.index) if found else "low"
+
+
+def max_severity(values: Iterable[str]) -> str:
+    return max(values, key=SEVERITIES.index, default="low")
+
+
+def records(value: Any) -> List[Dict[str, Any]]:
+    """
+    Normalise a digest field to a list of dicts. The output models coerce lists
+    to strings, so JSON text and Python-repr text are both accepted.
+    """
+    if isinstance(value, str):
+        for parse in (json.loads, ast.literal_eval):
+            try:
+                value = parse(value)
+                break
+            except (ValueError, SyntaxError):
+                continue
+        else:
+            return []
+    if isinstance(value, dict):
+        value = [value]
+    if not isinstance(value, list):
+        return []
+    return [r for r in value if isinstance(r, dict)]
+
+
+def locations(record: Dict[str, Any]) -> List[str]:
+    """Locality names of a record: its "locations" or "location", one name or a list."""
+    value = record.get("locations") or record.get("location")
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list):
+        return []
+    return [str(v) for v in value if v]
@@ -0,0 +1,261 @@
+"""
+source_agent.py – wrapper that runs one data source (bbmp, btp, weather, …).
+
+`SourceAgent` runs the same instruction through a ladder of model tiers, the
+fast model first. When a non-final tier finishes, cheap output checks are
+applied (parseable structure, non-empty rows, search grounding present) and
+the next, stronger tier is only invoked when one of them fails:
+
+    bbmp_agent
+      ├─ bbmp_agent_tier0   gemini-2.0-flash   → checks pass → done
+      └─ bbmp_agent_tier1   gemini-2.5-pro     ← escalation only
+
+Tiering is switched on with TIERED_EXECUTION=1. The model ladder of a single
+agent can be overridden with `<AGENT_NAME>_MODELS`, e.g.
+BTP_AGENT_MODELS="gemini-2.0-flash,gemini-2.5-pro".
+
+Sources built with a `freshness` budget (seconds) persist their output per
+area in `state_store` and answer from it while it is still fresh (unless the
+request asked for a refresh, see `digest_cache.bypassing`).
+
+With COMPACT_SOURCES=1 the accepted output is replaced by its `compaction`
+form (structured records, no search logs, capped at `token_budget`) before it
+reaches the coordinator. The accepted output is also passed to `progress.emit`
+for clients streaming the run.
+
+With CIRCUIT_BREAKERS=1 every source runs under its `breaker`: an open breaker
+or a failing run yields an {"unavailable": <source>} record instead of raising,
+and the source is reported as missing from the digest.
+
+Under a request `deadline`, a source with less than DEADLINE_MIN_SOURCE_SEC
+left (after the publish reserve) is not started, and a failed check no longer
+escalates to a stronger tier: the weaker output is accepted instead.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import time
+from typing import AsyncGenerator, Callable, List, Optional, Sequence
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from common.breaker import CIRCUIT_BREAKERS, get_breaker, mark_missing
+from common.compaction import COMPACT_SOURCES, TOKEN_BUDGET, compact, estimate_tokens, parse_json
+from common.deadline import DEADLINE_MIN_SOURCE_SEC, DEADLINE_PUBLISH_RESERVE_SEC, remaining
+from common.digest_cache import bypassed
+from common.progress import emit
+from common.state_store import AREAS_STATE_KEY, REUSE_OUTPUTS, SCOPE_STATE_KEY, area_key, get_store
+
+logger = logging.getLogger(__name__)
+
+TIERED_EXECUTION = os.environ.get("TIERED_EXECUTION", "0") == "1"
+
+Check = Callable[[str], bool]
+
+
+def tier_models(agent_name: str, fast_model: str, pro_model: str) -> List[str]:
+    """Model ladder for *agent_name*, cheapest first."""
+    override = os.environ.get(f"{agent_name.upper()}_MODELS")
+    if override:
+        return [m.strip() for m in override.split(",") if m.strip()]
+    if TIERED_EXECUTION and fast_model != pro_model:
+        return [fast_model, pro_model]
+    return [pro_model]
+
+
+# ── output checks ------------------------------------------------------------
+_TABLE_ROW = re.compile(r"^\|\s*\d+\s*\|", re.MULTILINE)
+
+
+def non_empty(text: str) -> bool:
+    return bool(text.strip())
+
+
+def has_table_rows(text: str) -> bool:
+    """At least one numbered row in a Markdown table (`| 1 | …`)."""
+    return bool(_TABLE_ROW.search(text))
+
+
+def has_json_records(key: Optional[str] = None) -> Check:
+    """Check for a non-empty JSON array, optionally nested under *key*."""
+
+    def check(text: str) -> bool:
+        data = parse_json(text)
+        if key and isinstance(data, dict):
+            data = data.get(key)
+        return isinstance(data, list) and len(data) > 0
+
+    check.__name__ = f"has_json_records({key or ''})"
+    return check
+
+
+def _is_grounded(events: Sequence[Event]) -> bool:
+    for event in events:
+        gm = getattr(event, "grounding_metadata", None)
+        if gm and (gm.web_search_queries or gm.grounding_chunks):
+            return True
+    return False
+
+
+def final_text(events: Sequence[Event], author: Optional[str] = None) -> str:
+    """Text of the last complete response authored by *author* (any agent if None)."""
+    for event in reversed(events):
+        if author not in (None, event.author):
+            continue
+        if not event.partial and event.content and event.content.parts:
+            return "".join(p.text or "" for p in event.content.parts)
+    return ""
+
+
+# ── agent -------------------------------------------------------------------
+class SourceAgent(BaseAgent):
+    """Runs a source through its model tiers, escalating on failed checks."""
+
+    tiers: List[BaseAgent]
+    output_key: str
+    checks: List[Check] = []
+    require_grounding: bool = True
+    freshness: Optional[float] = None
+    token_budget: Optional[int] = TOKEN_BUDGET
+
+    @classmethod
+    def tiered(
+        cls,
+        *,
+        name: str,
+        build: Callable[[str, str], BaseAgent],
+        models: Sequence[str],
+        output_key: str,
+        checks: Sequence[Check] = (),
+        require_grounding: bool = True,
+        freshness: Optional[float] = None,
+        token_budget: Optional[int] = TOKEN_BUDGET,
+        description: str = "",
+    ) -> "SourceAgent":
+        """Build one tier per model via `build(model, tier_name)`."""
+        tiers = [build(model, f"{name}_tier{i}") for i, model in enumerate(models)]
+        return cls(
+            name=name,
+            description=description,
+            sub_agents=tiers,
+            tiers=tiers,
+            output_key=output_key,
+            checks=list(checks),
+            require_grounding=require_grounding,
+            freshness=freshness,
+            token_budget=token_budget,
+        )
+
+    def _failed_check(self, events: Sequence[Event], author: str) -> Optional[str]:
+        text = final_text(events, author)
+        for check in self.checks:
+            if not check(text):
+                return check.__name__
+        if self.require_grounding and not _is_grounded(events):
+            return "grounding"
+        return None
+
+    def _output_event(self, ctx: InvocationContext, text: str) -> Event:
+        return Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+            actions=EventActions(state_delta={self.output_key: text}),
+        )
+
+    def _missing_event(self, ctx: InvocationContext, reason: str) -> Event:
+        """Stand-in output of a skipped source, so the coordinator reports it as missing."""
+        mark_missing(self.name)
+        text = json.dumps({"unavailable": self.name, "reason": reason[:200]}, ensure_ascii=False)
+        return self._output_event(ctx, text)
+
+    @staticmethod
+    def _out_of_time() -> bool:
+        left = remaining(DEADLINE_PUBLISH_RESERVE_SEC)
+        return left is not None and left < DEADLINE_MIN_SOURCE_SEC
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        reuse = REUSE_OUTPUTS and bool(self.freshness)
+        key = area_key(
+            ctx.session.state.get(AREAS_STATE_KEY), ctx.session.state.get(SCOPE_STATE_KEY)
+        )
+        if reuse and not bypassed():
+            cached = get_store().get_fresh(self.name, key, self.freshness)
+            if cached is not None:
+                logger.info("%s: reusing fresh output for %s", self.name, key)
+                emit(self.name, cached)
+                yield self._output_event(ctx, cached)
+                return
+
+        if self._out_of_time():
+            logger.warning("%s: too close to the request deadline – skipping source", self.name)
+            yield self._missing_event(ctx, "deadline")
+            return
+
+        if not CIRCUIT_BREAKERS:
+            async for event in self._run_tiers(ctx, reuse, key):
+                yield event
+            return
+
+        breaker = get_breaker(self.name)
+        if not breaker.allow():
+            logger.warning("%s: circuit open – skipping source", self.name)
+            yield self._missing_event(ctx, "circuit open")
+            return
+        started, ok, failure = time.monotonic(), False, None
+        try:
+            async for event in self._run_tiers(ctx, reuse, key):
+                yield event
+            ok = True
+        except Exception as e:
+            failure = str(e) or type(e).__name__
+            logger.error("%s: failed (%s) – continuing without it", self.name, failure)
+        finally:
+            # also when cancelled (deadline) or closed: a half-open probe must report back
+            breaker.record(ok, time.monotonic() - started)
+        if failure is not None:
+            yield self._missing_event(ctx, failure)
+
+    async def _run_tiers(
+        self, ctx: InvocationContext, reuse: bool, key: str
+    ) -> AsyncGenerator[Event, None]:
+        for i, tier in enumerate(self.tiers):
+            events: List[Event] = []
+            async for event in tier.run_async(ctx):
+                events.append(event)
+                yield event
+            last = i == len(self.tiers) - 1
+            failed = None if last else self._failed_check(events, tier.name)
+            if failed is not None and self._out_of_time():
+                logger.info("%s: %s failed %s check – no time left to escalate", self.name, tier.name, failed)
+                failed = None
+            if failed is None:
+                text = final_text(events, tier.name)
+                if COMPACT_SOURCES and text:
+                    compacted = compact(text, self.token_budget)
+                    logger.info(
+                        "%s: compacted output %d → %d tokens",
+                        self.name, estimate_tokens(text), estimate_tokens(compacted),
+                    )
+                    # last event wins: AgentTool hands this one to the coordinator
+                    text = compacted
+                    yield self._output_event(ctx, text)
+                if text:
+                    emit(self.name, text)
+                if reuse and text:
+                    get_store().put(self.name, key, text)
+                return
+            logger.info(
+                "%s: %s failed %s check – escalating to %s",
+                self.name, tier.name, failed, self.tiers[i + 1].name,
+            )
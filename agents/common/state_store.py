@@ -0,0 +1,103 @@
+"""
+state_store.py – durable per-area store for sub-agent outputs (SQLite).
+
+Every `SourceAgent` run writes its final output here, keyed by source name and
+the requested areas, with the time it was produced. A later run for the same
+areas reuses any output that is still within the source's freshness budget and
+only re-invokes the stale sources – a refresh where only the weather expired
+does not search BBMP, BTP and social media again.
+
+The session state of each coordinator run carries the requested areas under
+`AREAS_STATE_KEY` (and optionally a narrower scope such as a date window or
+category under `SCOPE_STATE_KEY`); AgentTool copies it into the sub-agent
+sessions.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, Optional
+
+from common.aliases import resolve
+
+logger = logging.getLogger(__name__)
+
+STATE_STORE_PATH = os.environ.get("STATE_STORE_PATH", "/tmp/omni_source_state.sqlite3")
+REUSE_OUTPUTS = os.environ.get("SOURCE_REUSE", "1") == "1"
+AREAS_STATE_KEY = "areas"
+SCOPE_STATE_KEY = "scope"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS source_outputs (
+    source      TEXT NOT NULL,
+    area_key    TEXT NOT NULL,
+    output      TEXT NOT NULL,
+    produced_at REAL NOT NULL,
+    PRIMARY KEY (source, area_key)
+)
+"""
+
+
+def area_key(areas: Optional[Iterable[str]], scope: Optional[str] = None) -> str:
+    """Order-, case- and alias-insensitive key for a list of areas ("*" = whole city)."""
+    names = sorted({
+        (resolve(a) or a).strip().lower() for a in areas or () if isinstance(a, str) and a.strip()
+    })
+    key = "|".join(names) or "*"
+    return f"{key}#{scope}" if scope else key
+
+
+class SourceStateStore:
+    """Latest output per (source, area_key) with its production time."""
+
+    def __init__(self, path: str = STATE_STORE_PATH) -> None:
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def get_fresh(self, source: str, key: str, max_age: float) -> Optional[str]:
+        """Stored output if it is younger than *max_age* seconds."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT output FROM source_outputs "
+                "WHERE source = ? AND area_key = ? AND produced_at >= ?",
+                (source, key, time.time() - max_age),
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, source: str, key: str, output: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO source_outputs VALUES (?, ?, ?, ?)",
+                (source, key, output, time.time()),
+            )
+            self._conn.commit()
+
+    def purge(self, older_than: float) -> int:
+        """Drop outputs older than *older_than* seconds; returns rows removed."""
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM source_outputs WHERE produced_at < ?",
+                (time.time() - older_than,),
+            )
+            self._conn.commit()
+        return cur.rowcount
+
+
+_store: Optional[SourceStateStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> SourceStateStore:
+    """Process-wide store (opened lazily)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SourceStateStore()
+        return _store
@@ -0,0 +1,122 @@
+"""
+structured_logging.py – non-blocking, structured logging for the orchestrators.
+
+`setup_logging()` is called once per process (repeated calls are no-ops) and
+replaces the root handlers with a `QueueHandler`. Requests only enqueue the
+record; a background `QueueListener` thread formats it and writes it:
+
+    • one JSON object per line on stdout – Cloud Run / Functions turn the
+      `severity` and `message` keys into structured log entries, so no
+      per-invocation google-cloud-logging client is needed
+    • the message and every extra field are capped at LOG_MAX_FIELD_CHARS,
+      so a logged digest or cloudevent never writes kilobytes
+    • DEBUG records are sampled (LOG_DEBUG_SAMPLE_RATE); INFO and above are
+      always kept
+    • when the queue is full records are dropped rather than blocking
+
+Message formatting (`%s` of a large digest) also happens on the listener
+thread, so arguments passed to a log call must not be mutated afterwards.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_MAX_FIELD_CHARS = int(os.environ.get("LOG_MAX_FIELD_CHARS", "2000"))
+LOG_DEBUG_SAMPLE_RATE = float(os.environ.get("LOG_DEBUG_SAMPLE_RATE", "0.1"))
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+
+# attributes every LogRecord has – anything else was passed via `extra=`
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def cap(value: Any, limit: Optional[int] = None) -> str:
+    """str(value), truncated to *limit* characters with a marker."""
+    limit = LOG_MAX_FIELD_CHARS if limit is None else limit
+    text = value if isinstance(value, str) else str(value)
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}…(+{len(text) - limit} chars)"
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "severity": record.levelname,
+            "message": cap(record.getMessage()),
+            "logger": record.name,
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and not key.startswith("_"):
+                entry[key] = value if isinstance(value, (int, float, bool)) or value is None else cap(value)
+        if record.exc_text or record.exc_info:
+            entry["exception"] = cap(record.exc_text or self.formatException(record.exc_info))
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DebugSampler(logging.Filter):
+    """Keep all INFO+ records and a random fraction of DEBUG records."""
+
+    def __init__(self, rate: float = LOG_DEBUG_SAMPLE_RATE) -> None:
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or random.random() < self.rate
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # defer message formatting to the listener; only render the traceback
+        # here so it does not keep frames alive in the queue
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _NonBlockingQueueHandler.dropped += 1
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+def setup_logging(level: str = LOG_LEVEL) -> None:
+    """Install the queued JSON pipeline on the root logger (once per process)."""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+        records: "queue.Queue[logging.LogRecord]" = queue.Queue(LOG_QUEUE_SIZE)
+        output = logging.StreamHandler(sys.stdout)
+        output.setFormatter(JsonFormatter())
+        _listener = logging.handlers.QueueListener(records, output, respect_handler_level=False)
+
+        handler = _NonBlockingQueueHandler(records)
+        handler.addFilter(DebugSampler())
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(level)
+
+        _listener.start()
+        atexit.register(_listener.stop)   # flush what is still queued
@@ -1,6 +1,9 @@
 """
 agent.py – BESCOMOutageAgent (prompt fixed in agent_config.json).
 `location` is guaranteed to be List[str] with one element per locality.
+
+With OUTAGE_AREA_SHARDED=1 and areas in the session state, the areas are
+looked up in concurrent chunks and the records merged (see `area_shards`).
 """
 
 from __future__ import annotations
@@ -17,6 +20,8 @@ from google.adk.events import Event
 from google.genai.types import Content, Part
 
 from tools import gt
+from area_shards import AREA_SHARDED, area_chunks, gather_limited, merge_outages
+from common.state_store import AREAS_STATE_KEY
 
 # ── configuration -----------------------------------------------------------
 _DEFAULT_PROMPT = json.loads(
@@ -51,14 +56,28 @@ class BESCOMOutageAgent(BaseAgent):
         super().__init__(name="BESCOMOutageAgent")
         self.prompt = _DEFAULT_PROMPT
 
+    def _area_prompt(self, areas: List[str]) -> str:
+        return f"{self.prompt}\n\nOnly report outages affecting these areas: {json.dumps(areas)}"
+
+    async def _ask(self, prompt: str) -> List[dict]:
+        raw = await asyncio.to_thread(gt.ask_json, prompt)
+        return raw if isinstance(raw, list) else [raw]
+
     async def _run_async_impl(
         self, ctx: InvocationContext
     ) -> AsyncGenerator[Event, None]:
-        raw = await asyncio.to_thread(gt.ask_json, self.prompt)
-        records = OutageSummary(**raw)
-        payload = json.dumps(
-            [r.model_dump() for r in records], indent=2, default=str
-        )
+        areas = ctx.session.state.get(AREAS_STATE_KEY) or []
+        if AREA_SHARDED and areas:
+            chunks = area_chunks(areas)
+            raw = merge_outages(
+                await gather_limited(chunks, lambda chunk: self._ask(self._area_prompt(chunk)), self.name)
+            )
+            logger.info("Merged %d outages from %d area chunks", len(raw), len(chunks))
+        elif areas:
+            raw = await self._ask(self._area_prompt(list(areas)))
+        else:
+            raw = await self._ask(self.prompt)
+        payload = json.dumps(raw, indent=2, default=str)
         yield Event(
             author=self.name,
             content=Content(parts=[Part(text=payload)]),
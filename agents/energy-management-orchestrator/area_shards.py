@@ -0,0 +1,86 @@
+"""
+area_shards.py – split large outage lookups into concurrent per-area chunks.
+
+One long search session over a big geofence is slow and its output is often
+truncated. With OUTAGE_AREA_SHARDED=1 the area list is cut into chunks of
+OUTAGE_AREA_CHUNK_SIZE (about one BESCOM sub-division), the chunks are looked
+up concurrently – at most OUTAGE_SHARD_CONCURRENCY at a time – and the
+outage records are merged, so latency stays roughly flat as areas grow.
+
+Used by `BESCOMOutageAgent` (grounded `gt.ask_json` per chunk) and by
+`energy_coordinator.get_energy_digest_sharded` (one coordinator run per chunk).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Sequence
+
+from common.breaker import mark_missing
+from common.sharding import locations
+
+logger = logging.getLogger(__name__)
+
+AREA_SHARDED = os.environ.get("OUTAGE_AREA_SHARDED", "0") == "1"
+AREA_CHUNK_SIZE = int(os.environ.get("OUTAGE_AREA_CHUNK_SIZE", "3"))
+SHARD_CONCURRENCY = int(os.environ.get("OUTAGE_SHARD_CONCURRENCY", "4"))
+
+
+def area_chunks(areas: Sequence[str], size: int = AREA_CHUNK_SIZE) -> List[List[str]]:
+    """Consecutive chunks of at most *size* distinct areas."""
+    unique = list(dict.fromkeys(a for a in areas if a))
+    return [unique[i:i + size] for i in range(0, len(unique), size)]
+
+
+async def gather_limited(
+    chunks: Sequence[List[str]],
+    lookup: Callable[[List[str]], Awaitable[List[Dict[str, Any]]]],
+    source: str = "outage_lookup",
+) -> List[List[Dict[str, Any]]]:
+    """
+    Run *lookup* per chunk, SHARD_CONCURRENCY at a time. Failed chunks are
+    logged, skipped and reported as missing ("<source>[area, …]").
+    """
+    limit = asyncio.Semaphore(SHARD_CONCURRENCY)
+
+    async def bounded(chunk: List[str]) -> List[Dict[str, Any]]:
+        async with limit:
+            return await lookup(chunk)
+
+    results = await asyncio.gather(*(bounded(c) for c in chunks), return_exceptions=True)
+    merged = []
+    for chunk, result in zip(chunks, results):
+        if isinstance(result, Exception):
+            logger.error("Outage lookup for %s failed: %s", chunk, result)
+            mark_missing(f"{source}[{', '.join(chunk)}]")
+            continue
+        merged.append(result)
+    return merged
+
+
+def merge_outages(results: Iterable[Iterable[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Merge outage records from several chunks. Records with the same start,
+    end and reason are one outage announced for several areas: their locations
+    ("location" or "locations", a name or a list) are unioned into a list.
+    """
+    merged: Dict[tuple, Dict[str, Any]] = {}
+    for records in results:
+        for record in records:
+            if not isinstance(record, dict):
+                continue
+            identity = (
+                str(record.get("start_time")),
+                str(record.get("end_time")),
+                str(record.get("reason") or "").strip().lower(),
+            )
+            seen = merged.get(identity)
+            if seen is None:
+                field = "locations" if "locations" in record else "location"
+                merged[identity] = {**record, field: locations(record)}
+            else:
+                field = "locations" if "locations" in seen else "location"
+                seen[field] += [loc for loc in locations(record) if loc not in seen[field]]
+    return list(merged.values())
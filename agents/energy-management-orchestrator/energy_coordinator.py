@@ -6,7 +6,7 @@ import logging
 import warnings
 
 from pydantic import BaseModel, Field
-from typing import Any
+from typing import Any, Callable, List, Optional, Sequence
 from google.adk.agents import LlmAgent
 from google.adk.tools.agent_tool import AgentTool
 from google.adk.runners import Runner
@@ -15,13 +15,22 @@ from google.genai import types
 
 from sub_agents.bescom.agent import bescom_agent
 import prompt
+from common.governor import governed
+from common.breaker import collect_missing, mark_missing
+from common.compaction import source_records
+from common.deadline import Arrivals, DeadlineExceeded, run_within
+from common.profiling import profile_invocation
+from common.state_store import AREAS_STATE_KEY
+from common.sharding import CITY_WIDE, Shard, canonical_locality, locations, max_severity, records, severity_of
 from pubsub import publish_messages
+from area_shards import area_chunks, gather_limited, merge_outages
 
 MODEL = "gemini-2.5-pro"
 
 warnings.filterwarnings("ignore", message="there are non-text parts in the response:")
 
 logging.getLogger("google.genai").setLevel(logging.ERROR)
+logger = logging.getLogger(__name__)
 
 class OutageEntry(BaseModel):
     locations: list[str]
@@ -33,11 +42,28 @@ class EnergyDigestOutput(BaseModel):
     outage_summary: Any = Field(
         description="Array of outage entries with timestamp, summary, etc."
     )
+    missing_sources: List[str] = Field(default_factory=list)   # skipped (breaker) or cut off (deadline)
+    partial: bool = False   # built from the sources that arrived before the deadline
+
+    def shards(self) -> list[Shard]:
+        """One shard per locality; an outage spanning several is sent to each."""
+        outages: dict[str, list] = {}
+        for entry in records(self.outage_summary):
+            for location in locations(entry) or [CITY_WIDE]:
+                outages.setdefault(canonical_locality(location), []).append(entry)
+        return [
+            Shard(
+                area=area,
+                severity=max_severity(severity_of(e.get("severity")) for e in entries),
+                payload={"outage_summary": entries},
+            )
+            for area, entries in outages.items()
+        ]
 
 # Coordinator agent definition
 energy_coordinator = LlmAgent(
     name="energy_coordinator",
-    model=MODEL,
+    model=governed(MODEL),
     description="Aggregates BESCOM, news, and social feeds for a Bengaluru power-outage snapshot",
     instruction=prompt.ENERGY_COORDINATOR_PROMPT,
     output_key="outage_summary",
@@ -58,31 +84,53 @@ runner = Runner(
     session_service=session_service,
 )
 
-async def _run_and_clean(user_input: str) -> EnergyDigestOutput:
+@profile_invocation("energy_run_and_clean")
+async def _run_and_clean(
+    user_input: str, areas: Optional[Sequence[str]] = None
+) -> EnergyDigestOutput:
+    """Coordinator run; sources skipped by a breaker or cut off by the deadline go to missing_sources."""
+    with collect_missing() as missing:
+        digest = await _coordinate(user_input, areas)
+    digest.missing_sources = list(missing)
+    return digest
+
+
+async def _coordinate(
+    user_input: str, areas: Optional[Sequence[str]] = None
+) -> EnergyDigestOutput:
     session_id = uuid.uuid4().hex
     await session_service.create_session(
         app_name="energy_management_orchestrator",
         user_id="energy_user",
         session_id=session_id,
+        state={AREAS_STATE_KEY: list(areas or [])},
     )
 
     content = types.Content(role="user", parts=[types.Part(text=user_input)])
 
-    raw_response = None
-    async for event in runner.run_async(
-        user_id="energy_user",
-        session_id=session_id,
-        new_message=content,
-    ):
-        if event.is_final_response():
-            raw_response = event.content.parts[0].text
-            break
+    arrivals = Arrivals()
+
+    async def run() -> Optional[str]:
+        async for event in runner.run_async(
+            user_id="energy_user",
+            session_id=session_id,
+            new_message=content,
+        ):
+            arrivals.observe(event)
+            if event.is_final_response():
+                return event.content.parts[0].text
+        return None
+
+    try:
+        raw_response = await run_within(run())
+    except DeadlineExceeded:
+        return _partial_digest(arrivals)
 
     if raw_response is None:
         raise RuntimeError("Agent did not emit a final response")
 
     payload = re.sub(r"^```json\n|```", "", raw_response, flags=re.DOTALL)
-    print(f" response: {payload}")
+    logger.debug("Coordinator response: %s", payload)
     try:
         payload = json.loads(payload)
     except json.JSONDecodeError:
@@ -91,5 +139,49 @@ async def _run_and_clean(user_input: str) -> EnergyDigestOutput:
     return EnergyDigestOutput.model_validate(payload, strict=False)
 
 
-def get_energy_digest(user_input: str) -> EnergyDigestOutput:
-    return asyncio.run(_run_and_clean(user_input)) 
\ No newline at end of file
+def _partial_digest(arrivals: Arrivals) -> EnergyDigestOutput:
+    """Digest from the sub-agent results that arrived before the deadline (unmerged)."""
+    for name in arrivals.pending:
+        mark_missing(name)
+    outages = [
+        record for results in arrivals.results.values() for result in results
+        for record in source_records(result)
+    ]
+    logger.warning(
+        "Deadline reached – partial energy digest from %s (%d outages), missing %s",
+        sorted(arrivals.results), len(outages), arrivals.pending,
+    )
+    return EnergyDigestOutput(outage_summary=outages, partial=True)
+
+
+async def get_energy_digest_async(
+    user_input: str, areas: Optional[Sequence[str]] = None
+) -> EnergyDigestOutput:
+    return await _run_and_clean(user_input, areas)
+
+
+async def get_energy_digest_sharded(
+    prompt_for: Callable[[List[str]], str], areas: Sequence[str]
+) -> EnergyDigestOutput:
+    """
+    One coordinator run per area chunk, run concurrently under the shard limit,
+    with the outage records merged (see `area_shards`).
+    """
+    partial: List[bool] = []
+
+    async def lookup(chunk: List[str]) -> List[dict]:
+        digest = await _run_and_clean(prompt_for(chunk), chunk)
+        partial.append(digest.partial)
+        return records(digest.outage_summary)
+
+    chunks = area_chunks(areas)
+    with collect_missing() as missing:
+        merged = merge_outages(await gather_limited(chunks, lookup, energy_coordinator.name))
+    logger.info("Merged %d outages from %d area chunks", len(merged), len(chunks))
+    return EnergyDigestOutput(outage_summary=merged, missing_sources=list(missing), partial=any(partial))
+
+
+def get_energy_digest(
+    user_input: str, areas: Optional[Sequence[str]] = None
+) -> EnergyDigestOutput:
+    return asyncio.run(_run_and_clean(user_input, areas)) 
\ No newline at end of file
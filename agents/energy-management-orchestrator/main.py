@@ -2,15 +2,37 @@
 orca.py – CLI launcher for BESCOMOutageAgent.
 """
 
+import asyncio
 import json
 import logging
-from energy_coordinator import get_energy_digest
-from pubsub import publish_messages
+from typing import Any, Optional
+from energy_coordinator import EnergyDigestOutput, get_energy_digest_async, get_energy_digest_sharded
+from pubsub import publish_messages, publish_sharded
+from common.sharding import SHARDED_PUBLISH
+from common.admission import ADMIT, STALE, Admission, Overloaded, publish_timestamp
+from common.coalescer import Coalescer
+from common.digest_cache import DigestCache, bypassed
+from common.freshness import ADAPTIVE_FRESHNESS, Freshness
+from common.idempotency import run_once
+from common.deadline import budget
+from common.profiling import requested
+from common.structured_logging import setup_logging
+from outage_index import outage_index, parse_time
+from area_shards import AREA_CHUNK_SIZE, AREA_SHARDED
+from common.state_store import area_key
 # from flask import Flask
 import base64
 
 project_id = "namm-omni-dev"
 
+setup_logging()   # queued JSON handler, once per process
+logger = logging.getLogger(__name__)
+
+admission = Admission("energy")
+coalescer = Coalescer()
+digest_cache: DigestCache[EnergyDigestOutput] = DigestCache()
+freshness = Freshness("energy")
+
 # app = Flask(__name__)
 
 
@@ -18,32 +40,143 @@ project_id = "namm-omni-dev"
 # def health_check():
 #     return {"status": "ok"}
 
-def run_energy_management_agent(cloudevent):
-    logging.basicConfig(level=logging.INFO)
-    logger = logging.getLogger(__name__)
-    logger.info("cloud event data type: %s", type(cloudevent.data))
-    logger.info("Received cloudevent data: %s", cloudevent.data)
-    message = base64.b64decode(cloudevent.data["message"]["data"]).decode("utf-8")
-    payload = json.loads(message)
+async def handle_energy_request(
+    payload: dict, publish_time: Any = None, message_id: Optional[str] = None
+) -> Optional[EnergyDigestOutput]:
+    """
+    Run the outage pipeline for one decoded trigger payload and publish the digest.
+    Redeliveries are not re-run (see `idempotency`); stale or excess requests
+    (see `admission`) get the last cached digest instead. A payload with an
+    ISO-8601 "at" time is answered from the outage interval index when the
+    areas were covered by a recent digest. Requests for the same areas (and
+    the same "at" time) inside the coalescing window share one run (see
+    `coalescer`).
+    With ADAPTIVE_FRESHNESS=1 a cached digest younger than the areas' TTL
+    (derived from their observed change rate, see `freshness`) is served as is.
+    A refresh (see `digest_cache.bypassing`) skips the index and the TTL and
+    always runs.
+    """
+    return await coalescer.submit(
+        _coalesce_key(payload),
+        _process,
+        payload,
+        publish_time,
+        message_id,
+        order=publish_timestamp(publish_time),
+    )
+
+
+def _coalesce_key(payload: dict) -> str:
+    """
+    Area key; point-in-time queries only share a run with the same "at", and
+    a refresh does not share a run that may be served from cache.
+    """
+    key = area_key(payload.get("areas", []))
+    at = parse_time(payload.get("at"))
+    if at is not None:
+        key = f"{key}@{at:.0f}"
+    return f"{key}#refresh" if bypassed() else key
+
+
+async def _process(
+    payload: dict, publish_time: Any, message_id: Optional[str]
+) -> Optional[EnergyDigestOutput]:
+    return await run_once(
+        message_id,
+        payload,
+        lambda: _energy_digest(payload, publish_time),
+        _publish,
+        EnergyDigestOutput,
+    )
+
+
+async def _energy_digest(payload: dict, publish_time: Any) -> Optional[EnergyDigestOutput]:
     lat = payload.get("lat")
     lon = payload.get("lon")
     areas = payload.get("areas", [])
-    example_prompt = (
-        f"My location is {lat}, {lon}. Provide power-outage information for the next 24 hours in "
-        f"{areas} including official BESCOM notices "
-        "and reliable local news reports."
-    )
-    digest = get_energy_digest(example_prompt)
+    key = area_key(areas)
+
+    refresh = bypassed()
+    at = parse_time(payload.get("at"))
+    if at is not None and not refresh and outage_index.covers(areas):
+        logger.info("Answering outages at %s from the interval index", payload["at"])
+        return EnergyDigestOutput(outage_summary=outage_index.at(areas, at))
+
+    if ADAPTIVE_FRESHNESS and at is None and not refresh:
+        ttl = freshness.ttl(areas)
+        digest = digest_cache.get(key, max_age=ttl)
+        if digest is not None:
+            logger.info("Cached energy digest for %s is within its %.0fs TTL – no run", key, ttl)
+            return digest
+
+    verdict = admission.admit(publish_time)
+    if verdict != ADMIT:
+        digest = digest_cache.get(key)
+        if digest is None:
+            if verdict == STALE:
+                return None
+            raise Overloaded(f"energy: no capacity and no cached digest for {key}")
+        logger.info("Answering %s energy request from cached digest", verdict)
+        return digest
+
+    def example_prompt(chunk) -> str:
+        return (
+            f"My location is {lat}, {lon}. Provide power-outage information for the next 24 hours in "
+            f"{chunk} including official BESCOM notices "
+            "and reliable local news reports."
+        )
+
     try:
-        payload = json.dumps(digest.model_dump(), indent=2)
-    except json.JSONDecodeError:
-        logging.error("Unable to parse model response, publishing digest %s",digest.model_dump())
-        publish_messages(digest.model_dump(),lambda e: logger.error("Pub/Sub error: %s", e))
-        return '',200
-    logger.info("Energy digest generated:\n%s", payload)
+        if AREA_SHARDED and len(areas) > AREA_CHUNK_SIZE:
+            digest = await get_energy_digest_sharded(example_prompt, areas)
+        else:
+            digest = await get_energy_digest_async(example_prompt(areas), areas)
+    finally:
+        admission.release()
+    digest_cache.put(key, digest)
+    freshness.observe(areas, digest.shards())
+    outage_index.expire()
+    complete = not (digest.missing_sources or digest.partial)
+    if not complete:
+        # the outages that did arrive are indexed, but "none found" cannot be trusted
+        logger.warning("Incomplete energy digest (missing %s) – areas not marked as covered", digest.missing_sources)
+    outage_index.add(digest.outage_summary, areas, covered=complete)
+    if at is not None:
+        return EnergyDigestOutput(outage_summary=outage_index.at(areas, at))
+    return digest
+
+
+async def _publish(digest: EnergyDigestOutput) -> bool:
+    """Publish the digest; False if any message failed."""
+    failures = []
+
+    def on_error(e: Exception) -> None:
+        failures.append(e)
+        logger.error("Pub/Sub error: %s", e)
+
+    if SHARDED_PUBLISH:
+        await asyncio.to_thread(publish_sharded, digest.shards(), on_error)
+        return not failures
+    response = digest.model_dump()
+    logger.info("Energy digest generated:\n%s", response)
     # Publish to Pub/Sub (comment out if running locally without GCP creds)
     try:
-        publish_messages(payload, lambda e: logger.error("Pub/Sub error: %s", e))
+        await asyncio.to_thread(publish_messages, response, on_error)
     except Exception as e:
         logger.error("Publish skipped – %s", e)
-    return '', 200
\ No newline at end of file
+        return False
+    return not failures
+
+
+def run_energy_management_agent(cloudevent):
+    logger.debug("cloud event data type: %s", type(cloudevent.data))
+    logger.debug("Received cloudevent data: %s", cloudevent.data)
+    message = base64.b64decode(cloudevent.data["message"]["data"]).decode("utf-8")
+    payload = json.loads(message)
+    message_meta = cloudevent.data["message"]
+    # the time budget (see `deadline`) starts with the delivery
+    with requested(message_meta.get("attributes")), budget():   # `profile=1` attribute
+        asyncio.run(
+            handle_energy_request(payload, message_meta.get("publishTime"), message_meta.get("messageId"))
+        )
+    return '', 200
@@ -0,0 +1,161 @@
+"""
+outage_index.py – in-memory interval index over known outage windows.
+
+Every energy digest is folded in, so time-point questions ("is Koramangala out
+at 6 pm?") are answered by lookup instead of another BESCOM search. Per
+canonical locality the outages are kept sorted by start time; with the
+sorted start array a stabbing query is a bisect plus an end-time filter over
+the few outages that started earlier.
+
+    at(areas, t)             outages in progress at t
+    between(areas, a, b)     outages overlapping [a, b)
+    expire(now)              forget outages that have ended
+
+An outage without an end time is assumed to last OUTAGE_OPEN_DURATION_SEC.
+`covers(areas)` tells whether every area was part of a recent digest, i.e.
+whether "no outage found" can be trusted. A complete digest replaces the
+timelines of the areas it was asked about.
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from common.sharding import CITY_WIDE, canonical_locality, locations, records
+
+logger = logging.getLogger(__name__)
+
+OPEN_OUTAGE_SEC = float(os.environ.get("OUTAGE_OPEN_DURATION_SEC", 6 * 60 * 60))
+COVERAGE_MAX_AGE_SEC = float(os.environ.get("OUTAGE_COVERAGE_MAX_AGE_SEC", 30 * 60))
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+def parse_time(value: Any) -> Optional[float]:
+    """Epoch seconds of an ISO-8601 time; naive times are taken as IST."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=IST)
+    return parsed.timestamp()
+
+
+@dataclass(order=True)
+class Outage:
+    start: float
+    end: float
+    entry: Dict[str, Any] = field(compare=False)
+
+
+class _Timeline:
+    """Outages of one locality, sorted by start."""
+
+    def __init__(self) -> None:
+        self.starts: List[float] = []
+        self.outages: List[Outage] = []
+
+    def add(self, outage: Outage) -> None:
+        i = bisect.bisect_right(self.starts, outage.start)
+        self.starts.insert(i, outage.start)
+        self.outages.insert(i, outage)
+
+    def stab(self, t: float) -> List[Outage]:
+        return [o for o in self.outages[: bisect.bisect_right(self.starts, t)] if o.end > t]
+
+    def overlap(self, start: float, end: float) -> List[Outage]:
+        return [o for o in self.outages[: bisect.bisect_left(self.starts, end)] if o.end > start]
+
+    def expire(self, now: float) -> int:
+        kept = [o for o in self.outages if o.end > now]
+        removed = len(self.outages) - len(kept)
+        self.outages, self.starts = kept, [o.start for o in kept]
+        return removed
+
+
+class OutageIndex:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._timelines: Dict[str, _Timeline] = {}
+        self._seen: set = set()
+        self._fed_at: Dict[str, float] = {}
+
+    def add(self, outage_summary: Any, areas: Optional[Iterable[str]] = None, covered: bool = True) -> int:
+        """
+        Index a digest's outages; *areas* are the localities the digest was
+        asked about. They only count as covered if the digest was complete,
+        and then its outages replace what was known for them: an outage that
+        was cancelled or rescheduled since is dropped.
+        """
+        now = time.time()
+        added = 0
+        with self._lock:
+            keys = {canonical_locality(a) for a in areas or [CITY_WIDE]} if covered else set()
+            for key in keys:
+                self._fed_at[key] = now
+                self._timelines.pop(key, None)
+            self._seen = {i for i in self._seen if i[0] not in keys}
+            for entry in records(outage_summary):
+                start = parse_time(entry.get("start_time"))
+                if start is None:
+                    continue
+                end = parse_time(entry.get("end_time")) or start + OPEN_OUTAGE_SEC
+                for location in locations(entry) or [CITY_WIDE]:
+                    key = canonical_locality(location)
+                    identity = (key, start, end, str(entry.get("reason") or "").lower())
+                    if identity in self._seen:
+                        continue
+                    self._seen.add(identity)
+                    self._timelines.setdefault(key, _Timeline()).add(Outage(start, end, entry))
+                    added += 1
+        return added
+
+    def _select(self, areas: Optional[Sequence[str]]) -> List[_Timeline]:
+        if not areas:
+            return list(self._timelines.values())
+        keys = {canonical_locality(a) for a in areas} | {CITY_WIDE}
+        return [self._timelines[k] for k in keys if k in self._timelines]
+
+    @staticmethod
+    def _entries(outages: Iterable[Outage]) -> List[Dict[str, Any]]:
+        unique = {id(o.entry): o for o in outages}
+        return [o.entry for o in sorted(unique.values())]
+
+    def at(self, areas: Optional[Sequence[str]], t: float) -> List[Dict[str, Any]]:
+        with self._lock:
+            return self._entries(o for tl in self._select(areas) for o in tl.stab(t))
+
+    def between(self, areas: Optional[Sequence[str]], start: float, end: float) -> List[Dict[str, Any]]:
+        with self._lock:
+            return self._entries(o for tl in self._select(areas) for o in tl.overlap(start, end))
+
+    def covers(self, areas: Optional[Sequence[str]], max_age: float = COVERAGE_MAX_AGE_SEC) -> bool:
+        cutoff = time.time() - max_age
+        keys = {canonical_locality(a) for a in areas or [CITY_WIDE]}
+        with self._lock:
+            return all(self._fed_at.get(k, 0) >= cutoff for k in keys)
+
+    def expire(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        with self._lock:
+            removed = sum(tl.expire(now) for tl in self._timelines.values())
+            self._timelines = {k: tl for k, tl in self._timelines.items() if tl.outages}
+            self._seen = {i for i in self._seen if i[2] > now}
+        if removed:
+            logger.info("Expired %d finished outages", removed)
+        return removed
+
+
+# singleton
+outage_index = OutageIndex()
@@ -23,4 +23,5 @@ Guidelines:
 3. "severity" is High when duration > 4h or affecting >5 locations.
 4. Keep the array sorted by severity (High→Low) then by start_time.
 5. Do **NOT** output anything except the JSON payload.
+6. A sub-agent that answers {"unavailable": …} was skipped; do not call it again and report only what the others returned.
 """ 
\ No newline at end of file
@@ -1,14 +1,31 @@
 from google.adk import Agent
 from google.adk.tools import google_search
+from common.governor import governed
+from common.source_agent import SourceAgent, has_json_records, tier_models
 
 from . import bescom_prompt  # BESCOM_PROMPT string
 
 MODEL = "gemini-2.5-pro"
+FAST_MODEL = "gemini-2.0-flash"
+FRESHNESS_SEC = 30 * 60   # reuse stored output per area for this long
 
-bescom_agent = Agent(
-    model=MODEL,
+
+def _build(model: str, name: str) -> Agent:
+    return Agent(
+        model=governed(model),
+        name=name,
+        instruction=bescom_prompt.BESCOM_PROMPT,
+        output_key="bescom_outages",
+        tools=[google_search],
+    )
+
+
+bescom_agent = SourceAgent.tiered(
     name="bescom_agent",
-    instruction=bescom_prompt.BESCOM_PROMPT,
+    description="Official BESCOM outage bulletins for the given Bengaluru areas",
+    build=_build,
+    models=tier_models("bescom_agent", FAST_MODEL, MODEL),
     output_key="bescom_outages",
-    tools=[google_search],
-) 
\ No newline at end of file
+    checks=[has_json_records()],
+    freshness=FRESHNESS_SEC,
+)
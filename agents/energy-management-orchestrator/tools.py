@@ -1,5 +1,6 @@
 """
 tools.py – always-grounded Gemini helper. Settings come from agent_config.json.
+Calls go through the `cassette` record / replay layer (CASSETTE_MODE).
 """
 
 from __future__ import annotations
@@ -10,6 +11,11 @@ from pathlib import Path
 from typing import Any, Dict, List
 
 from google import genai
+from google.genai import types
+
+from common.breaker import guarded
+from common.cassette import get_cassette, request_key
+from common.governor import governor, shared_client
 
 # ── load config -------------------------------------------------------------
 _CFG = json.loads(Path(__file__).with_name("agent_config.json").read_text())
@@ -21,12 +27,12 @@ logger.setLevel(logging.INFO)
 
 
 class GroundedGemini:
-    """ask_json(prompt) → list[dict] (always Google-Search grounded)."""
+    """ask_json(prompt) → list[dict] (always Google-Search grounded, governed)."""
 
     # lazy SDK
     @cached_property
     def _client(self) -> genai.Client:
-        return genai.Client()
+        return shared_client()
 
     _SEARCH_TOOL = [{"google_search": {}}]
 
@@ -36,16 +42,30 @@ class GroundedGemini:
         return m.group(1) if m else text
 
     # ----------------------------------------------------------------------
-    def ask_json(self, prompt: str) -> List[Dict[str, Any]]:
-        resp = self._client.models.generate_content(
-            model=_MODEL_ID,
-            contents=prompt,
-            config={
-                "tools": self._SEARCH_TOOL,
-                "temperature": _TEMP,
-            },
+    def _generate(self, prompt: str, config: Dict[str, Any]) -> types.GenerateContentResponse:
+        return governor.call(
+            _MODEL_ID,
+            lambda: self._client.models.generate_content(
+                model=_MODEL_ID, contents=prompt, config=config
+            ),
         )
 
+    @guarded("grounded_search")
+    def ask_json(self, prompt: str) -> List[Dict[str, Any]]:
+        config = {"tools": self._SEARCH_TOOL, "temperature": _TEMP}
+        tape = get_cassette()
+        if tape.recording or tape.replaying:
+            key = request_key("grounded", _MODEL_ID, {"contents": prompt, "config": config})
+            if tape.replaying:
+                resp = types.GenerateContentResponse.model_validate(tape.play(key)[0])
+            else:
+                take = tape.take("grounded", _MODEL_ID, key)
+                resp = self._generate(prompt, config)
+                take.add(resp)
+                take.save()
+        else:
+            resp = self._generate(prompt, config)
+
         gm = resp.candidates[0].grounding_metadata
         if gm and gm.web_search_queries:
             logger.info("🔎 Google-Search queries: %s", gm.web_search_queries)
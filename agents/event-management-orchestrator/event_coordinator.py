@@ -10,7 +10,11 @@ Functions or Cloud Run services is symmetrical:
     • flat Pydantic output schema
     • `LlmAgent` with a single sub‑agent tool
     • private async runner helper
-    • public sync wrapper (`get_cultural_events`)
+    • public sync wrapper (`get_cultural_events`) + async variant
+
+With EVENTS_FANOUT=1 the crawl is instead partitioned into category ×
+area-cluster shards that run `cultural_events_agent` concurrently (see
+`get_cultural_events_fanout`).
 """
 
 from __future__ import annotations
@@ -18,9 +22,11 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
+import os
 import re
 import uuid
-from typing import List,Any
+from itertools import product
+from typing import List, Any, Optional, Sequence
 
 from google.adk.agents import LlmAgent
 from google.adk.runners import Runner
@@ -32,14 +38,31 @@ from pydantic import BaseModel, Field, field_validator
 # — Local imports -----------------------------------------------------------
 from sub_agents.agent import cultural_events_agent
 import prompt  # expects EVENT_COORDINATOR_PROMPT inside
+from common.governor import governed
+from common.breaker import collect_missing, mark_missing
+from common.compaction import source_records
+from common.deadline import Arrivals, DeadlineExceeded, run_within
+from common.profiling import profile_invocation
+from common.sharding import Shard, canonical_locality, records
+from common.source_agent import final_text, parse_json
+from common.state_store import AREAS_STATE_KEY, SCOPE_STATE_KEY
 
 # — Config ------------------------------------------------------------------
 MODEL = "gemini-2.5-pro"
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 logging.getLogger("google.genai").setLevel(logging.ERROR)
 
+FANOUT = os.environ.get("EVENTS_FANOUT", "0") == "1"
+FANOUT_CONCURRENCY = int(os.environ.get("EVENTS_FANOUT_CONCURRENCY", "4"))
+AREA_CLUSTER_SIZE = 3
+CATEGORY_SHARDS = (
+    ("Music",),
+    ("Theatre", "Dance", "Comedy"),
+    ("Art", "Workshop"),
+    ("Festival", "Other"),     # incl. food festivals
+)
+
 # — Output schema -----------------------------------------------------------
 class EventsDigestOutput(BaseModel):
     cultural_events: Any = Field(
@@ -53,19 +76,31 @@ class EventsDigestOutput(BaseModel):
         link=str,
         description=str,
     )
+    missing_sources: List[str] = Field(default_factory=list)   # skipped (breaker) or cut off (deadline)
+    partial: bool = False   # built from the sources that arrived before the deadline
 
     @field_validator("cultural_events", mode="after")
     @classmethod
     def validate_location_weather(cls, v):
-        if isinstance(v,dict):
+        if isinstance(v, (dict, list)):
             return json.dumps(v)
         return str(v)
 
+    def shards(self) -> list[Shard]:
+        """One shard per event area (events carry no severity → "low")."""
+        events: dict[str, list] = {}
+        for entry in records(self.cultural_events):
+            events.setdefault(canonical_locality(entry.get("area")), []).append(entry)
+        return [
+            Shard(area=area, severity="low", payload={"cultural_events": entries})
+            for area, entries in events.items()
+        ]
+
 
 # — Coordinator agent -------------------------------------------------------
 event_coordinator = LlmAgent(
     name="event_coordinator",
-    model=MODEL,
+    model=governed(MODEL),
     description="Aggregates Bengaluru cultural events into a concise digest",
     instruction=prompt.EVENT_COORDINATOR_PROMPT,
     output_key="bengaluru_events_digest",
@@ -84,43 +119,183 @@ _runner = Runner(
 )
 
 # — Private async helper ----------------------------------------------------
-async def _run_and_clean(user_input: str) -> EventsDigestOutput:
+@profile_invocation("events_run_and_clean")
+async def _run_and_clean(
+    user_input: str,
+    areas: Optional[Sequence[str]] = None,
+    scope: Optional[str] = None,
+) -> EventsDigestOutput:
+    """Coordinator run; sources skipped by a breaker or cut off by the deadline go to missing_sources."""
+    with collect_missing() as missing:
+        digest = await _coordinate(user_input, areas, scope)
+    digest.missing_sources = list(missing)
+    return digest
+
+
+async def _coordinate(
+    user_input: str,
+    areas: Optional[Sequence[str]] = None,
+    scope: Optional[str] = None,
+) -> EventsDigestOutput:
     """Create a fresh session, run coordinator, parse JSON, and validate."""
     session_id = uuid.uuid4().hex
     await _session_service.create_session(
         app_name="cultural_event_orchestrator",
         user_id="events_user",
         session_id=session_id,
+        state={AREAS_STATE_KEY: list(areas or []), SCOPE_STATE_KEY: scope},
     )
 
     content = types.Content(role="user", parts=[types.Part(text=user_input)])
 
-    raw_response = None
-    async for ev in _runner.run_async(
-        user_id="events_user",
-        session_id=session_id,
-        new_message=content,
-    ):
-        if ev.is_final_response():
-            raw_response = ev.content.parts[0].text
-            break
+    arrivals = Arrivals()
+
+    async def run() -> Optional[str]:
+        async for ev in _runner.run_async(
+            user_id="events_user",
+            session_id=session_id,
+            new_message=content,
+        ):
+            arrivals.observe(ev)
+            if ev.is_final_response():
+                return ev.content.parts[0].text
+        return None
+
+    try:
+        raw_response = await run_within(run())
+    except DeadlineExceeded:
+        return _partial_digest(arrivals)
 
     if raw_response is None:
         raise RuntimeError("Coordinator did not emit a final response")
 
     # Strip ```json fences if present
     payload_txt = re.sub(r"^```json\n|```$", "", raw_response, flags=re.DOTALL)
-    print(payload_txt)
+    logger.debug("Coordinator response: %s", payload_txt)
     try:
         data = json.loads(payload_txt)
     except json.JSONDecodeError:
-        return EventsDigestOutput(bengaluru_events_digest=[])
+        logger.error("Coordinator response is not JSON – no events from this run")
+        mark_missing(event_coordinator.name)
+        return EventsDigestOutput(cultural_events=[])
 
     return EventsDigestOutput.model_validate(data, strict=False)
 
-# — Public sync wrapper -----------------------------------------------------
+def _partial_digest(arrivals: Arrivals) -> EventsDigestOutput:
+    """The sub-agent's events, if they arrived before the deadline cut the coordinator off."""
+    for name in arrivals.pending:
+        mark_missing(name)
+    events = [
+        record for results in arrivals.results.values() for result in results
+        for record in source_records(result)
+    ]
+    logger.warning("Deadline reached – partial events digest with %d events, missing %s", len(events), arrivals.pending)
+    return EventsDigestOutput(cultural_events=events, partial=True)
+
+# — Partitioned fan-out -----------------------------------------------------
+_shard_session_service = InMemorySessionService()
+_shard_runner = Runner(
+    agent=cultural_events_agent,
+    app_name="cultural_event_shards",
+    session_service=_shard_session_service,
+)
+
+
+def _event_identity(event: dict) -> tuple:
+    return tuple(
+        re.sub(r"\W+", " ", str(event.get(k) or "")).strip().lower()
+        for k in ("title", "venue", "event_date")
+    )
+
+
+async def _run_shard(
+    categories: Sequence[str], areas: Sequence[str], start: str, end: str
+) -> List[dict]:
+    """One small search session: a few categories in a few areas."""
+    session_id = uuid.uuid4().hex
+    await _shard_session_service.create_session(
+        app_name="cultural_event_shards",
+        user_id="events_user",
+        session_id=session_id,
+        state={
+            AREAS_STATE_KEY: list(areas),
+            SCOPE_STATE_KEY: f"{start}..{end}|{','.join(categories)}",
+        },
+    )
+    area_clause = f"in {', '.join(areas)}" if areas else "across Bengaluru"
+    request = (
+        f"Find {', '.join(categories)} events {area_clause} "
+        f"from {start} to {end}. Only these categories."
+    )
+    content = types.Content(role="user", parts=[types.Part(text=request)])
+    events = [
+        ev
+        async for ev in _shard_runner.run_async(
+            user_id="events_user", session_id=session_id, new_message=content
+        )
+    ]
+    data = parse_json(final_text(events))
+    if data is None:
+        raise ValueError("shard response is not JSON")
+    return records(data.get("cultural_events") if isinstance(data, dict) else data)
+
+
+@profile_invocation("events_fanout")
+async def get_cultural_events_fanout(
+    areas: Sequence[str], start: str, end: str
+) -> EventsDigestOutput:
+    """
+    Split the crawl into category × area-cluster shards, run them concurrently
+    (at most FANOUT_CONCURRENCY at a time) and merge them, deduped by
+    title + venue + date. The coordinator LLM only copies the sub-agent's
+    array verbatim, so it is skipped here.
+    """
+    clusters = [
+        list(areas[i:i + AREA_CLUSTER_SIZE]) for i in range(0, len(areas), AREA_CLUSTER_SIZE)
+    ] or [[]]
+    limit = asyncio.Semaphore(FANOUT_CONCURRENCY)
+
+    async def bounded(categories, cluster):
+        async with limit:
+            try:
+                return await run_within(_run_shard(categories, cluster, start, end))
+            except Exception:
+                # failed, or cut off (never started) by the request deadline
+                mark_missing(f"{cultural_events_agent.name}[{','.join(categories)}|{','.join(cluster)}]")
+                raise
+
+    with collect_missing() as missing:
+        results = await asyncio.gather(
+            *(bounded(c, a) for c, a in product(CATEGORY_SHARDS, clusters)),
+            return_exceptions=True,
+        )
+    merged: dict = {}
+    for result in results:
+        if isinstance(result, Exception):
+            logger.error("Event shard failed: %s", result)
+            continue
+        for event in result:
+            merged.setdefault(_event_identity(event), event)
+    logger.info("Fan-out merged %d events from %d shards", len(merged), len(results))
+    return EventsDigestOutput(
+        cultural_events=list(merged.values()),
+        missing_sources=list(missing),
+        partial=any(isinstance(r, DeadlineExceeded) for r in results),
+    )
+
+# — Public wrappers ---------------------------------------------------------
+async def get_cultural_events_async(
+    user_input: str = "Upcoming cultural events in Bengaluru",
+    areas: Optional[Sequence[str]] = None,
+    scope: Optional[str] = None,
+) -> EventsDigestOutput:
+    """Awaitable variant for hosts that already run an event loop."""
+    return await _run_and_clean(user_input, areas, scope)
+
+
 def get_cultural_events(
     user_input: str = "Upcoming cultural events in Bengaluru",
+    areas: Optional[Sequence[str]] = None,
 ) -> EventsDigestOutput:
     """Convenience wrapper for scripts / notebooks / Cloud Functions."""
-    return asyncio.run(_run_and_clean(user_input))
+    return asyncio.run(_run_and_clean(user_input, areas))
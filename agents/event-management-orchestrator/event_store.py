@@ -0,0 +1,168 @@
+"""
+event_store.py – indexed local store for incremental cultural-events crawling.
+
+Two tables, both SQLite:
+
+    events        every event discovered so far, indexed on event_date,
+                  area and category; (event_date, title, venue) dedupes
+    crawled_days  which (area, day) pairs have been crawled and when
+
+`handle_events_request` asks `uncovered()` which area/day pairs are missing or
+stale, sends only those to `cultural_events_agent`, records what comes back
+and then answers the whole window with an indexed `query()`.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from common.sharding import canonical_locality
+
+logger = logging.getLogger(__name__)
+
+EVENT_STORE_PATH = os.environ.get("EVENT_STORE_PATH", "/tmp/omni_events.sqlite3")
+CRAWL_MAX_AGE_SEC = float(os.environ.get("EVENT_CRAWL_MAX_AGE_SEC", 12 * 60 * 60))
+
+EVENT_FIELDS = (
+    "event_date", "event_time", "title", "venue", "area",
+    "category", "price", "link", "description",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    event_date    TEXT NOT NULL,
+    event_time    TEXT,
+    title         TEXT NOT NULL,
+    venue         TEXT NOT NULL,
+    area          TEXT,
+    category      TEXT,
+    price         TEXT,
+    link          TEXT,
+    description   TEXT,
+    area_key      TEXT NOT NULL,
+    discovered_at REAL NOT NULL,
+    PRIMARY KEY (event_date, title, venue)
+);
+CREATE INDEX IF NOT EXISTS idx_events_date     ON events (event_date);
+CREATE INDEX IF NOT EXISTS idx_events_area     ON events (area_key, event_date);
+CREATE INDEX IF NOT EXISTS idx_events_category ON events (category, event_date);
+
+CREATE TABLE IF NOT EXISTS crawled_days (
+    area_key   TEXT NOT NULL,
+    day        TEXT NOT NULL,
+    crawled_at REAL NOT NULL,
+    PRIMARY KEY (area_key, day)
+);
+"""
+
+
+def days_between(start: date, end: date) -> List[str]:
+    """ISO dates from *start* to *end*, inclusive."""
+    return [(start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1)]
+
+
+def _assign_area(event_area: Any, crawl_keys: Sequence[str]) -> str:
+    """File an event under the crawled area it belongs to ("HSR Layout Sector 2" → "hsr layout")."""
+    key = canonical_locality(event_area)
+    for crawl_key in crawl_keys:
+        if crawl_key in key or key in crawl_key:
+            return crawl_key
+    return key
+
+
+class EventStore:
+    def __init__(self, path: str = EVENT_STORE_PATH) -> None:
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    # ----------------------------------------------------------------------
+    def uncovered(
+        self, area_keys: Sequence[str], days: Sequence[str], max_age: float = CRAWL_MAX_AGE_SEC
+    ) -> Dict[str, List[str]]:
+        """Area key → days that were never crawled or whose crawl is stale."""
+        cutoff = time.time() - max_age
+        missing: Dict[str, List[str]] = {}
+        with self._lock:
+            for key in area_keys:
+                fresh = {
+                    row["day"]
+                    for row in self._conn.execute(
+                        "SELECT day FROM crawled_days WHERE area_key = ? AND crawled_at >= ?",
+                        (key, cutoff),
+                    )
+                }
+                stale = [d for d in days if d not in fresh]
+                if stale:
+                    missing[key] = stale
+        return missing
+
+    def record(self, events: Iterable[Dict[str, Any]], area_keys: Sequence[str], days: Iterable[str]) -> int:
+        """Store a crawl result and mark its (area, day) pairs as covered (none if *days* is empty)."""
+        now = time.time()
+        rows = [
+            tuple(str(e.get(f) or "") for f in EVENT_FIELDS) + (_assign_area(e.get("area"), area_keys), now)
+            for e in events
+            if e.get("event_date") and e.get("title")
+        ]
+        days = list(days)
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO events ({', '.join(EVENT_FIELDS)}, area_key, discovered_at) "
+                f"VALUES ({', '.join('?' * (len(EVENT_FIELDS) + 2))})",
+                rows,
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO crawled_days VALUES (?, ?, ?)",
+                [(key, day, now) for key in area_keys for day in days],
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def query(
+        self,
+        area_keys: Optional[Sequence[str]],
+        start: str,
+        end: str,
+        category: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Events in [start, end] for the areas (None → whole city), by date and time."""
+        sql = f"SELECT {', '.join(EVENT_FIELDS)} FROM events WHERE event_date BETWEEN ? AND ?"
+        args: List[Any] = [start, end]
+        if area_keys:
+            sql += f" AND area_key IN ({', '.join('?' * len(area_keys))})"
+            args += list(area_keys)
+        if category:
+            sql += " AND category = ?"
+            args.append(category)
+        sql += " ORDER BY event_date, event_time"
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, args)]
+
+    def purge_before(self, day: str) -> None:
+        """Forget events and coverage for days that have passed."""
+        with self._lock:
+            self._conn.execute("DELETE FROM events WHERE event_date < ?", (day,))
+            self._conn.execute("DELETE FROM crawled_days WHERE day < ?", (day,))
+            self._conn.commit()
+
+
+_store: Optional[EventStore] = None
+_store_lock = threading.Lock()
+
+
+def get_event_store() -> EventStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = EventStore()
+        return _store
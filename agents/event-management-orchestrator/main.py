@@ -1,18 +1,150 @@
 # main_events.py ─ Cloud Function entry point for cultural events (Bengaluru‑only)
 
+import asyncio
 import base64
 import json
 import logging
-import google.cloud.logging
-from event_coordinator import get_cultural_events
-from pubsub import publish_messages
-from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+from event_coordinator import (
+    FANOUT,
+    EventsDigestOutput,
+    get_cultural_events_async,
+    get_cultural_events_fanout,
+)
+from pubsub import publish_messages, publish_sharded
+from event_store import CRAWL_MAX_AGE_SEC, EventStore, days_between, get_event_store
+from common.sharding import CITY_WIDE, SHARDED_PUBLISH, canonical_locality, records
+from datetime import date, datetime, timedelta, timezone
+from common.admission import ADMIT, Admission
+from common.digest_cache import bypassed
+from common.idempotency import run_once
+from common.deadline import budget
+from common.profiling import requested
+from common.structured_logging import setup_logging
 
-_today = datetime.now(timezone.utc).astimezone().date()
-_next_week = _today + timedelta(days=7)
+IST = timezone(timedelta(hours=5, minutes=30))
+WINDOW_DAYS = 7
 
 PROJECT_ID = "namm-omni-dev"
 
+setup_logging()   # queued JSON handler, once per process
+logger = logging.getLogger(__name__)
+
+admission = Admission("events")
+
+
+async def _crawl(names: dict, missing: dict, store: EventStore) -> EventsDigestOutput:
+    """
+    Crawl the uncovered area/day pairs, record the result in the store and
+    return the crawl's digest. The pairs are only marked as covered when every
+    source (every shard with EVENTS_FANOUT=1) answered before the deadline.
+    """
+    crawl_areas = [names[key] for key in missing if key != CITY_WIDE]
+    crawl_days = sorted({d for ds in missing.values() for d in ds})
+
+    if FANOUT:
+        crawled = await get_cultural_events_fanout(crawl_areas, crawl_days[0], crawl_days[-1])
+    else:
+        # ── Build the Gemini prompt (city hard‑coded) ─────────────────
+        area_clause = f"in {', '.join(crawl_areas)}" if crawl_areas else "across Bengaluru"
+        prompt = (
+            f"I'm in Bengaluru. Give me a concise bullet‑point digest of upcoming "
+            f"cultural events {area_clause} from {crawl_days[0]} to {crawl_days[-1]}."
+        )
+        logger.info("Sending prompt to Gemini: %s", prompt)
+
+        # ── Run the coordinator for the uncovered part only ───────────
+        crawled = await get_cultural_events_async(
+            prompt, crawl_areas, scope=f"{crawl_days[0]}..{crawl_days[-1]}"
+        )
+    covered = days_between(date.fromisoformat(crawl_days[0]), date.fromisoformat(crawl_days[-1]))
+    if crawled.missing_sources or crawled.partial:
+        # keep what arrived, but let the next request crawl these pairs again
+        logger.warning(
+            "Incomplete crawl (missing %s%s) – not marking %s as covered",
+            crawled.missing_sources, ", partial" if crawled.partial else "", list(missing),
+        )
+        covered = []
+    stored = store.record(records(crawled.cultural_events), list(missing), covered)
+    logger.info("Recorded %d crawled events for %s", stored, list(missing))
+    return crawled
+
+
+async def handle_events_request(
+    payload: dict, publish_time: Any = None, message_id: Optional[str] = None
+) -> Optional[EventsDigestOutput]:
+    """
+    Fetch the cultural‑events digest for one decoded trigger payload and
+    republish it. Shared by the Cloud Function below and the multi‑domain host.
+
+    Only area/day pairs that the local event store has not crawled recently
+    are sent to Gemini; the full window is then answered from the store.
+    Stale or excess requests (see `admission`) skip the crawl and are answered
+    from the store as it is; redeliveries are not re-run (see `idempotency`).
+    A refresh (see `digest_cache.bypassing`) crawls the whole window again.
+    """
+    return await run_once(
+        message_id,
+        payload,
+        lambda: _events_digest(payload, publish_time),
+        _publish,
+        EventsDigestOutput,
+    )
+
+
+async def _events_digest(payload: dict, publish_time: Any) -> EventsDigestOutput:
+    areas = payload.get("areas", [])
+
+    # ── Window is computed per request (warm instances outlive a day) ─────
+    today = datetime.now(IST).date()
+    next_week = today + timedelta(days=WINDOW_DAYS)
+    days = days_between(today, next_week)
+    names = {canonical_locality(a): a for a in areas} or {CITY_WIDE: "Bengaluru"}
+
+    store = get_event_store()
+    store.purge_before(days[0])
+    missing = store.uncovered(list(names), days, max_age=0 if bypassed() else CRAWL_MAX_AGE_SEC)
+
+    crawled = None
+    verdict = admission.admit(publish_time) if missing else None
+    if verdict is not None and verdict != ADMIT:
+        logger.info("Skipping crawl of %s (%s) – answering from the store", list(missing), verdict)
+    elif missing:
+        try:
+            crawled = await _crawl(names, missing, store)
+        finally:
+            admission.release()
+    else:
+        logger.info("Event store covers %s for %s – no crawl needed", list(names), days)
+
+    # ── Answer the whole window from the indexed store ────────────────────
+    # (an incomplete crawl is reported as such, like the traffic / energy digests)
+    area_keys = None if CITY_WIDE in names else list(names)
+    digest = EventsDigestOutput(
+        cultural_events=store.query(area_keys, days[0], days[-1]),
+        missing_sources=crawled.missing_sources if crawled else [],
+        partial=crawled.partial if crawled else False,
+    )
+    logger.info("Cultural events digest:\n%s", digest)
+    return digest
+
+
+async def _publish(digest: EventsDigestOutput) -> bool:
+    """Publish the digest; False if any message failed."""
+    failures = []
+
+    def on_error(err: Exception) -> None:
+        failures.append(err)
+        logger.error("Error publishing message: %s", err)
+
+    if SHARDED_PUBLISH:
+        await asyncio.to_thread(publish_sharded, digest.shards(), on_error)
+        return not failures
+
+    # ── Re‑publish the result (compact JSON, see `payload_codec`) ──────────
+    await asyncio.to_thread(publish_messages, digest.model_dump(), on_error)
+    return not failures
+
 
 def runCulturalEventAgent(cloudevent):
     """
@@ -24,46 +156,17 @@ def runCulturalEventAgent(cloudevent):
           "areas": ["Indiranagar", "MG Road"]   # optional
         }
     """
-    # ── Logging setup ─────────────────────────────────────────────────────
-    client = google.cloud.logging.Client()
-    client.setup_logging()
-    logging.basicConfig(level=logging.INFO)
-    logger = logging.getLogger(__name__)
-
-    logger.info("Cloud event payload type: %s", type(cloudevent.data))
-    logger.info("Raw cloud event: %s", cloudevent.data)
+    logger.debug("Cloud event payload type: %s", type(cloudevent.data))
+    logger.debug("Raw cloud event: %s", cloudevent.data)
 
     # ── Decode & parse the Pub/Sub message ────────────────────────────────
     message = base64.b64decode(cloudevent.data["message"]["data"]).decode("utf-8")
     payload = json.loads(message)
 
-    areas = payload.get("areas", [])
-
-    # ── Build the Gemini prompt (city hard‑coded) ─────────────────────────
-    area_clause = f"in {', '.join(areas)}" if areas else "across Bengaluru"
-    prompt = (
-        f"I'm in Bengaluru. Give me a concise bullet‑point digest of upcoming "
-        f"cultural events {area_clause} from {_today} to {_next_week}."
-    )
-    logger.info("Sending prompt to Gemini: %s", prompt)
-
-    # ── Run the coordinator & get the digest ──────────────────────────────
-    digest = get_cultural_events(prompt)
-    logger.info("Cultural events digest:\n%s", digest)
-
-    # ── Serialize & re‑publish the result ─────────────────────────────────
-    try:
-        response_json = json.dumps(digest.model_dump(), indent=2)
-    except (TypeError, ValueError) as e:
-        logger.error("Serialization error: %s", e)
-        publish_messages(
-            digest.model_dump(),
-            lambda err: logger.error("Error publishing message: %s", err),
+    message_meta = cloudevent.data["message"]
+    # the time budget (see `deadline`) starts with the delivery
+    with requested(message_meta.get("attributes")), budget():   # `profile=1` attribute
+        asyncio.run(
+            handle_events_request(payload, message_meta.get("publishTime"), message_meta.get("messageId"))
         )
-        return "", 200
-
-    publish_messages(
-        response_json,
-        lambda err: logger.error("Error publishing message: %s", err),
-    )
     return "", 200
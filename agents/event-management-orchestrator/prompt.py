@@ -7,5 +7,7 @@ You are the Cultural‑Events Coordinator.
 2. Copy its "cultural_events" array **verbatim** into:
    { "cultural_events": [...] }
 
+If the tool answers {"unavailable": …} instead, return { "cultural_events": [] }.
+
 Return that JSON object only (no markdown, no text).
 """
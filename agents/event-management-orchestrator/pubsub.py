@@ -1,23 +1,56 @@
-"""Publishes a JSON message to a Pub/Sub topic with an error handler."""
+"""Publishes a JSON message to a Pub/Sub topic with an error handler (wire format: `payload_codec`)."""
 from google.cloud import pubsub_v1
-from typing import Callable
-import json
+from typing import Any, Callable, Iterable
+import logging
+from common.deadline import wait_timeout
+from common.payload_codec import encode
+from common.sharding import Shard
+
+logger = logging.getLogger(__name__)
 
 project_id = "namm-omni-dev"
 topic_id = "cultural-events-data"
 subscription_id = "cultural-events-data-sub"
+domain = "events"
 
-publisher = pubsub_v1.PublisherClient()
+# ordering only applies to messages published with an ordering_key (sharded mode)
+publisher = pubsub_v1.PublisherClient(
+    publisher_options=pubsub_v1.types.PublisherOptions(enable_message_ordering=True)
+)
 topic_path = publisher.topic_path(project_id, topic_id)
 
 
-def publish_messages(json_message: str, error_handler: Callable[[Exception], None]) -> None:
+def publish_messages(message: Any, error_handler: Callable[[Exception], None]) -> None:
     try:
-        # Optionally validate JSON input.
-        parsed = json.dumps(json_message).encode("utf-8")
-        # Publish the message as a byte string.
-        future = publisher.publish(topic_path, data=parsed)
-        message_id = future.result()  # Blocks until the message is published.
-        print(f"Published message ID: {message_id}")
+        # Compact JSON, compressed above the size threshold.
+        data, attributes = encode(message)
+        future = publisher.publish(topic_path, data=data, **attributes)
+        message_id = future.result(timeout=wait_timeout())  # Blocks until published, at most until the deadline.
+        logger.info("Published message ID: %s (%d bytes)", message_id, len(data))
     except Exception as e:
-        error_handler(e)
\ No newline at end of file
+        error_handler(e)
+
+
+def publish_sharded(shards: Iterable[Shard], error_handler: Callable[[Exception], None]) -> None:
+    """Publish one message per locality with area/severity/domain attributes."""
+    futures = []
+    for shard in shards:
+        data, attributes = encode(shard.payload)
+        future = publisher.publish(
+            topic_path,
+            data=data,
+            ordering_key=shard.area,
+            area=shard.area,
+            severity=shard.severity,
+            domain=domain,
+            **attributes,
+        )
+        futures.append((shard.area, future))
+    for area, future in futures:
+        try:
+            message_id = future.result(timeout=wait_timeout())
+            logger.info("Published %s shard ID: %s", area, message_id)
+        except Exception as e:
+            # a failed ordered publish pauses its key until resumed
+            publisher.resume_publish(topic_path, area)
+            error_handler(e)
\ No newline at end of file
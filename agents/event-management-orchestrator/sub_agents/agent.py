@@ -1,15 +1,33 @@
 # sub_agents/cultural_events_agent.py – minimal search agent
 from google.adk import Agent
 from google.adk.tools import google_search
+from common.governor import governed
+from common.source_agent import SourceAgent, has_json_records, tier_models
 
 from .prompt import CULTURAL_EVENTS_PROMPT  # expects CULTURAL_EVENTS_PROMPT text
 
 MODEL = "gemini-2.5-pro"
+FAST_MODEL = "gemini-2.0-flash"
+FRESHNESS_SEC = 6 * 60 * 60   # reuse stored output per area for this long
 
-cultural_events_agent = Agent(
-    model=MODEL,
+
+def _build(model: str, name: str) -> Agent:
+    return Agent(
+        model=governed(model),
+        name=name,
+        instruction=CULTURAL_EVENTS_PROMPT,
+        output_key="cultural_events",
+        tools=[google_search],
+    )
+
+
+cultural_events_agent = SourceAgent.tiered(
     name="cultural_events_agent",
-    instruction=CULTURAL_EVENTS_PROMPT,
+    description="Upcoming Bengaluru cultural events for the given areas and dates",
+    build=_build,
+    models=tier_models("cultural_events_agent", FAST_MODEL, MODEL),
     output_key="cultural_events",
-    tools=[google_search],
+    checks=[has_json_records("cultural_events")],
+    freshness=FRESHNESS_SEC,
+    token_budget=None,        # events are stored, not just read – never truncate
 )
@@ -0,0 +1,190 @@
+"""
+api.py – local HTTP endpoint over the host's materialized locality view.
+
+    GET  /localities?names=Koramangala,HSR Layout&domains=traffic,energy
+    POST /localities   {"localities": ["Koramangala"], "domains": ["events"]}
+    GET  /health
+
+Both lookups return {locality: {domain: {"severity", "payload", "updated_at"}}}
+straight from memory – no LLM run – so a geofence entry is a cheap call.
+
+    GET  /traffic?areas=Silk Board,HSR Layout[&max_age=120][&refresh=1]
+    GET  /energy?areas=…
+    GET  /events?areas=…
+
+stream a digest as server-sent events:
+
+    event: cached    one per requested locality already in the view
+    event: partial   {"source", "data"} – a sub-agent's output while the run goes on
+    event: entry     one per locality of the finished digest
+    event: error     the run failed or was shed with nothing cached
+    event: done      {"source": "cache" | "pipeline"}
+
+When every requested locality is in the view and younger than `max_age`
+(default: the domain's HTTP_<DOMAIN>_MAX_AGE_SEC) the stream ends after the
+cached events; otherwise the pipeline runs on the host loop. With `refresh=1`
+it always runs, past the handler's own digest caches too. The response
+carries `X-Digest-Freshness: fresh | stale | miss` and, when anything was
+cached, `Age` (seconds, oldest cached entry). Streams are plain async
+generators, so one uvicorn worker serves many concurrent clients.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+if TYPE_CHECKING:
+    from host import DomainHost
+
+logger = logging.getLogger(__name__)
+
+HTTP_PORT = int(os.environ.get("PORT", "8080"))
+HTTP_MAX_AGE_SEC = {
+    "traffic": float(os.environ.get("HTTP_TRAFFIC_MAX_AGE_SEC", "300")),
+    "energy": float(os.environ.get("HTTP_ENERGY_MAX_AGE_SEC", "1800")),
+    "events": float(os.environ.get("HTTP_EVENTS_MAX_AGE_SEC", "21600")),
+}
+
+
+class LocalitiesRequest(BaseModel):
+    localities: List[str]
+    domains: Optional[List[str]] = None
+
+
+def _split(value: Optional[str]) -> Optional[List[str]]:
+    return [v.strip() for v in value.split(",") if v.strip()] if value else None
+
+
+# ── server-sent events -------------------------------------------------------
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}\n\n"
+
+
+def _decode(text: str) -> Any:
+    """Sub-agent outputs are compact JSON when COMPACT_SOURCES=1, else free text."""
+    try:
+        return json.loads(text)
+    except (json.JSONDecodeError, TypeError):
+        return text
+
+
+async def _digest_events(
+    host: "DomainHost",
+    domain: str,
+    names: List[str],
+    cached: Dict[str, dict],
+    fresh: bool,
+    refresh: bool = False,
+) -> AsyncIterator[str]:
+    for locality, entry in cached.items():
+        yield _sse("cached", {"locality": locality, **entry})
+    if fresh:
+        yield _sse("done", {"source": "cache"})
+        return
+
+    loop = asyncio.get_running_loop()
+    partials: asyncio.Queue = asyncio.Queue()
+
+    def sink(source: str, text: str) -> None:   # called on the host loop thread
+        loop.call_soon_threadsafe(partials.put_nowait, {"source": source, "data": _decode(text)})
+
+    # not cancelled when the client goes away: the result still lands in the view
+    run = asyncio.wrap_future(
+        host.dispatch(host.route(domain), {"areas": names} if names else {}, sink=sink, refresh=refresh)
+    )
+    while not run.done():
+        getter = asyncio.ensure_future(partials.get())
+        await asyncio.wait({getter, run}, return_when=asyncio.FIRST_COMPLETED)
+        if getter.done():
+            yield _sse("partial", getter.result())
+        else:
+            getter.cancel()
+    while not partials.empty():
+        yield _sse("partial", partials.get_nowait())
+
+    try:
+        digest = run.result()
+    except Exception as e:
+        logger.error("%s stream failed: %s", domain, e)
+        yield _sse("error", {"error": str(e) or type(e).__name__})
+        return
+    if digest is None:
+        yield _sse("error", {"error": "request shed and no cached digest"})
+        return
+    for shard in digest.shards():
+        yield _sse("entry", {"locality": shard.area, "severity": shard.severity, "payload": shard.payload})
+    yield _sse("done", {"source": "pipeline"})
+
+
+def _stream_endpoint(host: "DomainHost", domain: str):
+    async def stream_digest(
+        areas: Optional[str] = None,
+        max_age: float = HTTP_MAX_AGE_SEC.get(domain, 300.0),
+        refresh: bool = False,
+    ) -> StreamingResponse:
+        names = _split(areas) or []
+        cached = {
+            name: entries[domain]
+            for name, entries in host.view.lookup(names, [domain]).items()
+            if domain in entries
+        }
+        headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        if cached:
+            age = time.time() - min(e["updated_at"] for e in cached.values())
+            fresh = len(cached) == len(names) and age <= max_age and not refresh
+            headers["Age"] = str(int(age))
+            headers["X-Digest-Freshness"] = "fresh" if fresh else "stale"
+        else:
+            fresh = False
+            headers["X-Digest-Freshness"] = "miss"
+        return StreamingResponse(
+            _digest_events(host, domain, names, cached, fresh, refresh),
+            media_type="text/event-stream",
+            headers=headers,
+        )
+
+    stream_digest.__name__ = f"stream_{domain}"
+    return stream_digest
+
+
+def create_app(host: "DomainHost") -> FastAPI:
+    app = FastAPI(title="NammaOmni locality view")
+
+    @app.get("/health")
+    def health():
+        return {"status": "ok", "localities": len(host.view.localities())}
+
+    @app.get("/localities")
+    def get_localities(names: str = Query(...), domains: Optional[str] = None):
+        return host.view.lookup(_split(names) or [], _split(domains))
+
+    @app.post("/localities")
+    def post_localities(request: LocalitiesRequest):
+        return host.view.lookup(request.localities, request.domains)
+
+    for domain in host.handlers:
+        app.get(f"/{domain}")(_stream_endpoint(host, domain))
+
+    return app
+
+
+def serve_http(host: "DomainHost", port: int = HTTP_PORT) -> threading.Thread:
+    """Run the API on a daemon thread next to the streaming-pull subscribers."""
+    server = uvicorn.Server(
+        uvicorn.Config(create_app(host), host="0.0.0.0", port=port, log_level="warning")
+    )
+    thread = threading.Thread(target=server.run, name="locality-view-http", daemon=True)
+    thread.start()
+    logger.info("Locality view listening on :%d", port)
+    return thread
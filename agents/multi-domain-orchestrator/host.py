@@ -0,0 +1,280 @@
+"""
+host.py – runs the traffic, energy and events orchestrators in one process.
+
+The three orchestrators stay deployable on their own; this host imports each
+one from its directory, registers its async request handler behind a single
+dispatcher and routes incoming Pub/Sub messages by subscription (pull) or by
+topic / subscription of the push envelope (cloudevent).
+
+All domains share one asyncio event loop and the `common` package: one
+google-genai client, the `governor` rate limiter, the sub-agent `state_store`,
+the breaker registry, the queued `structured_logging` pipeline, … Each
+orchestrator's own flat modules (`prompt`, `pubsub`, `sub_agents`, `main`, …)
+carry the same names, so they are imported one domain at a time and evicted
+from `sys.modules` afterwards; `common` lives outside the domain directories
+and is never evicted.
+
+Every digest a handler returns is folded into a `LocalityView` (latest state
+per canonical locality), served over HTTP by `api.py` together with the
+server-sent-event digest endpoints.
+
+    python host.py                                  → streaming pull + HTTP
+    HOST_HTTP_ONLY=1 python host.py                 → HTTP service only
+    functions-framework --target=dispatch_cloudevent --signature-type=cloudevent
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import base64
+import importlib
+import json
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional
+
+from google.cloud import pubsub_v1
+
+AGENTS_DIR = Path(os.environ.get("AGENTS_DIR", Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(AGENTS_DIR))   # for the shared `common` package
+
+from common import deadline, digest_cache, profiling, progress
+from common.sharding import canonical_locality
+from locality_view import LocalityView
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ID = os.environ.get("PROJECT_ID", "namm-omni-dev")
+MAX_MESSAGES_PER_DOMAIN = int(os.environ.get("HOST_MAX_MESSAGES_PER_DOMAIN", "4"))
+HTTP_ONLY = os.environ.get("HOST_HTTP_ONLY", "0") == "1"
+
+Handler = Callable[[dict], Awaitable[Any]]
+
+
+@dataclass(frozen=True)
+class Domain:
+    name: str
+    directory: str
+    handler: str           # async callable in the domain's main.py
+    topic: str             # trigger topic published by the backend
+    subscription: str      # subscription this host pulls from
+    bind_loop: Optional[str] = None   # callable in main.py handed the host loop for background work
+
+
+DOMAINS = (
+    Domain(
+        name="traffic",
+        directory="traffic-update-orchestrator",
+        handler="handle_traffic_request",
+        topic="trigger-traffic-update-agent",
+        subscription=os.environ.get("TRAFFIC_SUBSCRIPTION", "trigger-traffic-update-agent-sub"),
+        bind_loop="enable_prefetch",
+    ),
+    Domain(
+        name="energy",
+        directory="energy-management-orchestrator",
+        handler="handle_energy_request",
+        topic="trigger-energy-management-agent",
+        subscription=os.environ.get("ENERGY_SUBSCRIPTION", "trigger-energy-management-agent-sub"),
+    ),
+    Domain(
+        name="events",
+        directory="event-management-orchestrator",
+        handler="handle_events_request",
+        topic="trigger-cultural-events-agent",
+        subscription=os.environ.get("EVENTS_SUBSCRIPTION", "trigger-cultural-events-agent-sub"),
+    ),
+)
+
+
+# ── domain loading -----------------------------------------------------------
+def load_domain(domain: Domain, module: str = "main") -> ModuleType:
+    """Import `<directory>/<module>.py` in isolation and return it."""
+    directory = str((AGENTS_DIR / domain.directory).resolve())
+    shadowed = sys.modules.pop(module, None)   # e.g. this file loaded as `main`
+    before = set(sys.modules)
+    sys.path.insert(0, directory)
+    try:
+        return importlib.import_module(module)
+    finally:
+        sys.path.remove(directory)
+        for name in set(sys.modules) - before:
+            path = getattr(sys.modules[name], "__file__", None) or ""
+            if path.startswith(directory):
+                del sys.modules[name]
+        if shadowed is not None:
+            sys.modules[module] = shadowed
+
+
+# ── dispatcher ---------------------------------------------------------------
+class DomainHost:
+    """Routes trigger payloads to the registered domain handlers."""
+
+    def __init__(self, view: Optional[LocalityView] = None) -> None:
+        self.handlers: Dict[str, Handler] = {}
+        self._routes: Dict[str, Domain] = {}
+        # the locality keys must match the shard areas, so use the shared canonicaliser
+        self.view = LocalityView(key=canonical_locality) if view is None else view
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="domain-host-loop", daemon=True
+        )
+
+    def register(self, domain: Domain) -> None:
+        module = load_domain(domain)
+        self.handlers[domain.name] = getattr(module, domain.handler)
+        if domain.bind_loop:
+            getattr(module, domain.bind_loop)(self._loop)
+        for key in (domain.name, domain.topic, domain.subscription):
+            self._routes[key] = domain
+        logger.info("Registered %s orchestrator (%s)", domain.name, domain.subscription)
+
+    def start(self) -> "DomainHost":
+        if not self._thread.is_alive():
+            self._thread.start()
+        return self
+
+    def route(self, key: str) -> Optional[Domain]:
+        """Resolve a domain name, topic or subscription (short or full path)."""
+        return self._routes.get(key.rsplit("/", 1)[-1])
+
+    def dispatch(
+        self,
+        domain: Domain,
+        payload: dict,
+        publish_time: Any = None,
+        message_id: Optional[str] = None,
+        attributes: Optional[Mapping[str, str]] = None,
+        sink: Optional[Callable[[str, str], None]] = None,
+        refresh: bool = False,
+    ) -> Future:
+        """Schedule the domain handler on the shared loop (thread-safe)."""
+        return asyncio.run_coroutine_threadsafe(
+            self._handle(domain, payload, publish_time, message_id, attributes, sink, refresh), self._loop
+        )
+
+    async def _handle(
+        self,
+        domain: Domain,
+        payload: dict,
+        publish_time: Any,
+        message_id: Optional[str],
+        attributes: Optional[Mapping[str, str]],
+        sink: Optional[Callable[[str, str], None]],
+        refresh: bool,
+    ) -> Any:
+        # publish_time feeds admission control, message_id the idempotency store,
+        # a `profile=1` attribute the shared profiler; *sink* gets the partial
+        # sub-agent results of HTTP streaming requests, and *refresh* makes the
+        # handler skip its caches (see `digest_cache`). The request's time
+        # budget (see `deadline`) starts here.
+        with (
+            profiling.requested(attributes),
+            progress.streaming(sink),
+            digest_cache.bypassing(refresh),
+            deadline.budget(),
+        ):
+            digest = await self.handlers[domain.name](payload, publish_time, message_id)
+        shards = getattr(digest, "shards", None)
+        if shards is not None:
+            # an incomplete digest cannot tell that an area's incident cleared
+            complete = not (getattr(digest, "missing_sources", None) or getattr(digest, "partial", False))
+            self.view.apply(domain.name, shards(), (payload.get("areas") or []) if complete else [])
+            await asyncio.to_thread(self.view.snapshot)
+        return digest
+
+    # -- streaming pull ------------------------------------------------------
+    def serve_forever(self) -> None:
+        subscriber = pubsub_v1.SubscriberClient()
+        flow = pubsub_v1.types.FlowControl(max_messages=MAX_MESSAGES_PER_DOMAIN)
+        streams = []
+        for domain in DOMAINS:
+            path = subscriber.subscription_path(PROJECT_ID, domain.subscription)
+            streams.append(
+                subscriber.subscribe(path, callback=self._on_message(domain), flow_control=flow)
+            )
+            logger.info("Listening on %s", path)
+        with subscriber:
+            for stream in streams:
+                stream.result()
+
+    def _on_message(self, domain: Domain) -> Callable[[Any], None]:
+        def callback(message) -> None:
+            try:
+                payload = json.loads(message.data.decode("utf-8"))
+            except (UnicodeDecodeError, json.JSONDecodeError) as e:
+                logger.error("Dropping undecodable %s message %s: %s", domain.name, message.message_id, e)
+                message.ack()
+                return
+
+            def done(future: Future) -> None:
+                if future.exception():
+                    logger.error("%s handler failed: %s", domain.name, future.exception())
+                    message.nack()
+                else:
+                    message.ack()
+
+            self.dispatch(
+                domain, payload, message.publish_time, message.message_id, message.attributes
+            ).add_done_callback(done)
+
+        return callback
+
+
+def build_host() -> DomainHost:
+    host = DomainHost()
+    for domain in DOMAINS:
+        host.register(domain)
+    logger.info("Restored %d localities into the view", host.view.restore())
+    atexit.register(host.view.snapshot, True)
+    return host.start()
+
+
+_host: Optional[DomainHost] = None
+_host_lock = threading.Lock()
+
+
+def get_host() -> DomainHost:
+    global _host
+    with _host_lock:
+        if _host is None:
+            _host = build_host()
+        return _host
+
+
+# ── push entry point ----------------------------------------------------------
+def dispatch_cloudevent(cloudevent):
+    """
+    Cloud Run / Functions entry point for Pub/Sub push (Eventarc) deliveries.
+    Routes by the push subscription, falling back to the topic in `source`.
+    """
+    host = get_host()
+    key = cloudevent.data.get("subscription") or cloudevent["source"]
+    domain = host.route(key)
+    if domain is None:
+        logger.error("No orchestrator registered for %s", key)
+        return "", 200
+    meta = cloudevent.data["message"]
+    message = base64.b64decode(meta["data"]).decode("utf-8")
+    host.dispatch(
+        domain, json.loads(message), meta.get("publishTime"), meta.get("messageId"), meta.get("attributes")
+    ).result()
+    return "", 200
+
+
+if __name__ == "__main__":
+    from api import serve_http
+
+    # the first domain main installs the queued JSON logging pipeline
+    http = serve_http(get_host())
+    if HTTP_ONLY:
+        http.join()
+    else:
+        get_host().serve_forever()
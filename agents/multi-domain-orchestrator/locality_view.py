@@ -0,0 +1,135 @@
+"""
+locality_view.py – materialized latest-state view per canonical locality.
+
+Every digest the host produces is split into per-locality shards (the same
+`Shard`s used for sharded publishing) and folded into this view, so "what is
+the current traffic / outage / events state for localities [..]" is a dict
+lookup instead of a fresh LLM run.
+
+    locality → domain → {"severity", "payload", "updated_at"}
+
+The view is snapshotted to VIEW_SNAPSHOT_PATH (JSON, atomic replace) at most
+every VIEW_SNAPSHOT_INTERVAL_SEC and restored when the host starts.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+VIEW_SNAPSHOT_PATH = os.environ.get("VIEW_SNAPSHOT_PATH", "/tmp/omni_locality_view.json")
+VIEW_SNAPSHOT_INTERVAL_SEC = float(os.environ.get("VIEW_SNAPSHOT_INTERVAL_SEC", "30"))
+VIEW_MAX_AGE_SEC = float(os.environ.get("VIEW_MAX_AGE_SEC", 6 * 60 * 60))
+
+Entry = Dict[str, Any]
+
+
+def _default_key(name: Any) -> str:
+    return " ".join(str(name or "").split()).lower()
+
+
+class LocalityView:
+    """Latest entry per (locality, domain); readers never block on writers for long."""
+
+    def __init__(
+        self,
+        key: Callable[[Any], str] = _default_key,
+        path: str = VIEW_SNAPSHOT_PATH,
+        max_age: float = VIEW_MAX_AGE_SEC,
+    ) -> None:
+        self._key = key
+        self._path = path
+        self._max_age = max_age
+        self._lock = threading.Lock()
+        self._state: Dict[str, Dict[str, Entry]] = {}
+        self._dirty = False
+        self._last_snapshot = 0.0
+
+    # ----------------------------------------------------------------------
+    def apply(self, domain: str, shards: Iterable[Any], areas: Iterable[str] = ()) -> int:
+        """
+        Fold a digest's shards in; each shard replaces its locality's entry for
+        *domain*. The digest's requested *areas* without a shard have nothing
+        to report any more, so their *domain* entry is cleared.
+        """
+        now = time.time()
+        count = 0
+        with self._lock:
+            for area in areas:
+                entries = self._state.get(self._key(area))
+                if entries is not None and entries.pop(domain, None) is not None:
+                    self._dirty = True
+                    if not entries:
+                        del self._state[self._key(area)]
+            for shard in shards:
+                self._state.setdefault(self._key(shard.area), {})[domain] = {
+                    "severity": shard.severity,
+                    "payload": shard.payload,
+                    "updated_at": now,
+                }
+                count += 1
+            self._dirty = self._dirty or count > 0
+        return count
+
+    def lookup(
+        self, localities: Sequence[str], domains: Optional[Sequence[str]] = None
+    ) -> Dict[str, Dict[str, Entry]]:
+        """Current entries for the requested localities (missing or expired → empty)."""
+        cutoff = time.time() - self._max_age
+        with self._lock:
+            result = {}
+            for name in localities:
+                entries = self._state.get(self._key(name), {})
+                result[name] = {
+                    d: e for d, e in entries.items()
+                    if e["updated_at"] >= cutoff and (domains is None or d in domains)
+                }
+        return result
+
+    def localities(self) -> list[str]:
+        with self._lock:
+            return sorted(self._state)
+
+    # -- persistence ---------------------------------------------------------
+    def snapshot(self, force: bool = False) -> bool:
+        """Write the view to disk if it changed and the interval has elapsed."""
+        now = time.time()
+        with self._lock:
+            if not self._dirty or (not force and now - self._last_snapshot < VIEW_SNAPSHOT_INTERVAL_SEC):
+                return False
+            data = json.dumps(self._state, separators=(",", ":"), default=str)
+            self._dirty = False
+            self._last_snapshot = now
+        tmp = f"{self._path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp, self._path)
+        except OSError as e:
+            logger.error("Locality view snapshot failed: %s", e)
+            return False
+        return True
+
+    def restore(self) -> int:
+        """Load the last snapshot, dropping expired entries; returns localities loaded."""
+        try:
+            with open(self._path, encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error("Ignoring unreadable locality view snapshot: %s", e)
+            return 0
+        cutoff = time.time() - self._max_age
+        with self._lock:
+            for locality, entries in state.items():
+                fresh = {d: e for d, e in entries.items() if e.get("updated_at", 0) >= cutoff}
+                if fresh:
+                    self._state.setdefault(locality, {}).update(fresh)
+            return len(self._state)
@@ -0,0 +1,23 @@
+"""
+Unit tests for the orchestrators' pure-logic modules.
+
+Run from the repository root with `python -m pytest agents/tests`. The shared
+`common` package and the orchestrators' own flat modules (`outage_index`,
+`event_store`, `locality_view`, …) are put on the import path here; tests only
+import modules whose names are unique across the orchestrators.
+"""
+
+import sys
+from pathlib import Path
+
+AGENTS_DIR = Path(__file__).resolve().parent.parent
+
+for directory in (
+    AGENTS_DIR,
+    AGENTS_DIR / "traffic-update-orchestrator",
+    AGENTS_DIR / "energy-management-orchestrator",
+    AGENTS_DIR / "event-management-orchestrator",
+    AGENTS_DIR / "multi-domain-orchestrator",
+):
+    if str(directory) not in sys.path:
+        sys.path.insert(0, str(directory))
@@ -0,0 +1,56 @@
+import pytest
+
+from common.aliases import normalise, resolve
+
+
+@pytest.mark.parametrize(
+    "mention, name",
+    [
+        ("Central Silk Board", "Silk Board"),
+        ("HSR-Silk Board flyover", "Silk Board"),
+        ("koramangla", "Koramangala"),
+        ("Marathahalli Bridge: heavy traffic", "Marathahalli"),
+        ("KIA", "Kempegowda International Airport"),
+        ("airport", "Kempegowda International Airport"),
+        ("HAL", "Old Airport Road"),
+        ("HAL Airport Road", "Old Airport Road"),
+    ],
+)
+def test_resolves_spellings_to_the_canonical_name(mention, name):
+    assert resolve(mention) == name
+
+
+@pytest.mark.parametrize("mention", ["HBR Layout", "JC Nagar", "RS Nagar", "KR Nagar", "Hebbagodi"])
+def test_near_neighbours_are_not_merged(mention):
+    assert resolve(mention) is None
+
+
+@pytest.mark.parametrize(
+    "mention, name",
+    [("indranagar", "Indiranagar"), ("whitefeld", "Whitefield"), ("jaynagar", "Jayanagar"), ("yelahnka", "Yelahanka")],
+)
+def test_typos_of_long_names_still_resolve(mention, name):
+    assert resolve(mention) == name
+
+
+def test_ambiguous_words_only_match_a_whole_mention():
+    assert resolve("Airport Road flyover") is None
+    assert resolve("Hal 2nd stage") == "Indiranagar"
+    assert resolve("kia terminal 2") is None
+
+
+def test_ties_prefer_the_spot_over_the_corridor():
+    assert resolve("Hosur Road near Silk Board") == "Silk Board"
+    assert resolve("Silk Board near Hosur Road") == "Silk Board"
+    assert resolve("Hosur Road") == "Hosur Road"
+
+
+def test_ties_between_localities_go_to_the_later_match():
+    assert resolve("Domlur to Ejipura") == "Ejipura"
+    assert resolve("Ejipura to Domlur") == "Domlur"
+
+
+def test_unknown_mentions():
+    assert resolve("") is None
+    assert resolve("somewhere else entirely") is None
+    assert normalise("  Silk–Board / ORR ") == "silk board orr"
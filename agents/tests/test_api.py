@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from api import create_app
+from common.digest_cache import DigestCache, bypassed
+from host import DOMAINS, DomainHost
+from locality_view import LocalityView
+
+
+def _host(tmp_path, runs):
+    cache = DigestCache()
+
+    async def handle(payload, publish_time=None, message_id=None):
+        # like the domain handlers: served from their digest cache unless bypassed
+        key = ",".join(payload.get("areas", []))
+        digest = None if bypassed() else cache.get(key)
+        if digest is None:
+            runs.append(key)
+            shard = SimpleNamespace(area=key, severity="low", payload={"run": len(runs)})
+            digest = SimpleNamespace(shards=lambda: [shard])
+            cache.put(key, digest)
+        return digest
+
+    host = DomainHost(LocalityView(path=str(tmp_path / "view.json")))
+    host.handlers["traffic"] = handle
+    host._routes["traffic"] = DOMAINS[0]
+    return host.start()
+
+
+def test_refresh_bypasses_the_handler_caches(tmp_path):
+    runs = []
+    client = TestClient(create_app(_host(tmp_path, runs)))
+
+    assert '"source":"pipeline"' in client.get("/traffic", params={"areas": "MG Road"}).text
+    assert runs == ["MG Road"]
+
+    # a stale view entry reaches the handler, which answers from its cache
+    stale = client.get("/traffic", params={"areas": "MG Road", "max_age": 0})
+    assert stale.headers["X-Digest-Freshness"] == "stale" and runs == ["MG Road"]
+
+    refreshed = client.get("/traffic", params={"areas": "MG Road", "refresh": 1})
+    assert runs == ["MG Road", "MG Road"]
+    assert '"payload":{"run":2}' in refreshed.text and '"source":"pipeline"' in refreshed.text
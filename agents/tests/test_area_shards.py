@@ -0,0 +1,39 @@
+import asyncio
+
+from area_shards import area_chunks, gather_limited, merge_outages
+
+from common.breaker import collect_missing
+
+
+def test_chunks_drop_blanks_and_duplicates():
+    assert area_chunks(["a", "b", "", "a", "c", "d"], size=2) == [["a", "b"], ["c", "d"]]
+    assert area_chunks([]) == []
+
+
+def test_failed_chunks_are_skipped_and_reported_missing():
+    async def lookup(chunk):
+        if chunk == ["bad"]:
+            raise RuntimeError("search failed")
+        return [{"chunk": chunk}]
+
+    async def main():
+        with collect_missing() as missing:
+            results = await gather_limited([["a"], ["bad"], ["b", "c"]], lookup, "bescom")
+        return results, missing
+
+    results, missing = asyncio.run(main())
+    assert results == [[{"chunk": ["a"]}], [{"chunk": ["b", "c"]}]]
+    assert missing == ["bescom[bad]"]
+
+
+def test_same_outage_from_several_chunks_unions_locations():
+    base = {"start_time": "10:00", "end_time": "12:00", "reason": "Maintenance"}
+    merged = merge_outages([
+        [{**base, "location": "Hebbal"}, "not a record"],
+        [{**base, "reason": "maintenance ", "location": ["RT Nagar", "Hebbal"]}],
+        [{**base, "reason": "tree fall", "locations": "Yelahanka"}],
+    ])
+    assert merged == [
+        {**base, "location": ["Hebbal", "RT Nagar"]},
+        {**base, "reason": "tree fall", "locations": ["Yelahanka"]},
+    ]
@@ -0,0 +1,123 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from common import breaker as breaker_module
+from common.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, collect_missing, guarded, mark_missing
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(breaker_module, "time", clock)
+    return clock
+
+
+def tripped(clock) -> CircuitBreaker:
+    b = CircuitBreaker("src", window=4, min_calls=2, failure_rate=0.5, slow_sec=10, open_sec=60)
+    b.record(False, 1)
+    b.record(False, 1)
+    assert b.state == OPEN and not b.allow()
+    clock.now += 60
+    return b
+
+
+def test_opens_on_failures_and_slow_calls(clock):
+    b = CircuitBreaker("src", window=4, min_calls=4, failure_rate=0.5, slow_sec=10, open_sec=60)
+    b.record(True, 1)
+    b.record(True, 11)     # slow counts as failed
+    b.record(True, 1)
+    assert b.state == CLOSED
+    b.record(False, 1)
+    assert b.state == OPEN
+
+
+def test_half_open_lets_one_probe_through(clock):
+    b = tripped(clock)
+    assert b.state == HALF_OPEN
+    assert b.allow()
+    assert not b.allow()
+    b.record(True, 1)
+    assert b.state == CLOSED and b.allow()
+
+
+def test_failed_probe_reopens(clock):
+    b = tripped(clock)
+    assert b.allow()
+    b.record(False, 1)
+    assert b.state == OPEN and not b.allow()
+
+
+def test_probe_that_never_reports_is_given_up(clock):
+    b = tripped(clock)
+    assert b.allow()
+    clock.now += 30
+    assert not b.allow()
+    clock.now += 30
+    assert b.allow()
+
+
+def test_guarded_records_base_exceptions(clock, monkeypatch):
+    monkeypatch.setattr(breaker_module, "CIRCUIT_BREAKERS", True)
+    monkeypatch.setattr(breaker_module, "_breakers", {})
+    b = breaker_module.get_breaker("tool")
+    for _ in range(4):
+        b.record(False, 1)
+    clock.now += breaker_module.BREAKER_OPEN_SEC
+
+    @guarded("tool")
+    def cancelled():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        cancelled()
+    assert b.state == OPEN    # the probe reported a failure instead of hanging half-open
+
+
+def test_collect_missing_nests():
+    with collect_missing() as outer:
+        with collect_missing() as inner:
+            mark_missing("btp_agent")
+            mark_missing("btp_agent")
+        mark_missing("bbmp_agent")
+    assert inner == ["btp_agent"]
+    assert outer == ["btp_agent", "bbmp_agent"]
+    mark_missing("ignored")     # no active collector
+
+
+def test_cancelled_source_probe_reports_failure(clock, monkeypatch):
+    pytest.importorskip("google.adk")
+    from common import source_agent
+    from common.source_agent import SourceAgent
+
+    monkeypatch.setattr(source_agent, "CIRCUIT_BREAKERS", True)
+    monkeypatch.setattr(breaker_module, "_breakers", {})
+    b = breaker_module.get_breaker("slow_source")
+    for _ in range(4):
+        b.record(False, 1)
+    clock.now += breaker_module.BREAKER_OPEN_SEC
+
+    async def hang(self, ctx, reuse, key):
+        await asyncio.sleep(3600)
+        yield None
+
+    monkeypatch.setattr(SourceAgent, "_run_tiers", hang)
+    agent = SourceAgent(name="slow_source", tiers=[], output_key="out")
+    ctx = SimpleNamespace(session=SimpleNamespace(state={}), invocation_id="inv", branch=None)
+
+    async def run():
+        async for _ in agent._run_async_impl(ctx):
+            pass
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(asyncio.wait_for(run(), timeout=0.1))
+    assert b._probe_started is None and b.state == OPEN
@@ -0,0 +1,38 @@
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+from common.cassette import request_key
+
+
+def _request(text="hi", call_id="adk-1", **fields):
+    call = types.Part(function_call=types.FunctionCall(id=call_id, name="bbmp_agent", args={"q": "x"}))
+    return LlmRequest(
+        model="gemini-2.5-pro",
+        contents=[types.Content(role="user", parts=[types.Part(text=text)]), types.Content(role="model", parts=[call])],
+        config=types.GenerateContentConfig(tools=[types.Tool(google_search=types.GoogleSearch())]),
+        **fields,
+    )
+
+
+def test_key_ignores_call_ids_and_per_run_state():
+    key = request_key("llm", "m", {"request": _request(), "stream": False})
+    assert key == request_key("llm", "m", {"request": _request(call_id="adk-2"), "stream": False})
+    assert key == request_key(
+        "llm", "m",
+        {"request": _request(cacheable_contents_token_count=812, previous_interaction_id="i-9"), "stream": False},
+    )
+
+
+def test_key_depends_on_request_content():
+    key = request_key("llm", "m", {"request": _request(), "stream": False})
+    assert key != request_key("llm", "m", {"request": _request(text="hello"), "stream": False})
+    assert key != request_key("llm", "m", {"request": _request(), "stream": True})
+    assert key != request_key("llm", "other", {"request": _request(), "stream": False})
+
+
+def test_nested_config_models_are_hashed_by_content():
+    config = {"tools": [types.Tool(google_search=types.GoogleSearch())], "temperature": 0.2}
+    same = {"tools": [types.Tool(google_search=types.GoogleSearch())], "temperature": 0.2}
+    assert request_key("grounded", "m", {"contents": "p", "config": config}) == request_key(
+        "grounded", "m", {"contents": "p", "config": same}
+    )
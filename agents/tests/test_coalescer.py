@@ -0,0 +1,60 @@
+import asyncio
+
+from common.coalescer import Coalescer
+
+
+def run_batch(submissions):
+    """Submit (key, value, order) requests together; every member's result."""
+    coalescer = Coalescer(window=0.05, enabled=True)
+    runs = []
+
+    async def fn(value):
+        runs.append(value)
+        return value
+
+    async def main():
+        return await asyncio.gather(
+            *(coalescer.submit(key, fn, value, order=order) for key, value, order in submissions)
+        )
+
+    return asyncio.run(main()), runs
+
+
+def test_same_key_runs_once_with_the_newest_args():
+    results, runs = run_batch([("hsr", "a", 1.0), ("hsr", "c", 3.0), ("hsr", "b", 2.0)])
+    assert runs == ["c"]
+    assert results == ["c", "c", "c"]
+
+
+def test_different_keys_do_not_share_a_run():
+    # e.g. energy "at" queries for the same areas at different times
+    results, runs = run_batch([("jayanagar@1700000000", "18:00", 1.0), ("jayanagar@1700010800", "21:00", 2.0)])
+    assert sorted(runs) == ["18:00", "21:00"]
+    assert results == ["18:00", "21:00"]
+
+
+def test_errors_reach_every_member():
+    coalescer = Coalescer(window=0.05, enabled=True)
+
+    async def fail():
+        raise RuntimeError("boom")
+
+    async def main():
+        return await asyncio.gather(
+            coalescer.submit("k", fail), coalescer.submit("k", fail), return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_disabled_runs_every_request():
+    coalescer = Coalescer(window=0.05, enabled=False)
+
+    async def fn(value):
+        return value
+
+    async def main():
+        return await asyncio.gather(coalescer.submit("k", fn, 1), coalescer.submit("k", fn, 2))
+
+    assert asyncio.run(main()) == [1, 2]
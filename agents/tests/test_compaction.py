@@ -0,0 +1,73 @@
+import json
+
+from common.compaction import COMPACT_SOURCES, compact, parse_json, parse_tables, source_records, strip_logs
+
+ANSWER = """
+## Live Updates
+| # | Location / Junction | Type | Description |
+|---|---|---|---|
+| 1 | Silk Board Junction | Jam | Slow moving towards HSR |
+| 2 | Hebbal | … | Water logging |
+
+## Search Strategy Log
+| Query | Result |
+|---|---|
+| bbmp traffic | 3 hits |
+"""
+
+
+def test_compaction_is_off_by_default():
+    assert COMPACT_SOURCES is False
+
+
+def test_tables_become_records_without_logs():
+    data = json.loads(compact(ANSWER))
+    assert data == {
+        "Live Updates": [
+            {"location": "Silk Board Junction", "type": "Jam", "description": "Slow moving towards HSR",
+             "locality": "Silk Board"},
+            {"location": "Hebbal", "description": "Water logging"},
+        ]
+    }
+    assert "Search Strategy Log" not in parse_tables(ANSWER)
+
+
+def test_truncation_is_counted_for_dicts_and_lists():
+    rows = [{"location": f"Area {i}", "description": "x" * 80} for i in range(40)]
+    grouped = json.loads(compact(json.dumps({"updates": rows}), budget=200))
+    assert 0 < len(grouped["updates"]) < 40
+    assert grouped["truncated_records"] == 40 - len(grouped["updates"])
+
+    flat = json.loads(compact(json.dumps(rows), budget=200))
+    assert flat["truncated_records"] == 40 - len(flat["records"])
+    assert source_records(json.dumps(flat)) == flat["records"]
+
+    assert json.loads(compact(json.dumps(rows[:2]), budget=200)) == rows[:2]   # fits: unchanged
+
+
+def test_objects_without_records_drop_their_largest_fields():
+    answer = {"summary": "x" * 200, "conditions": {f"zone {i}": "y" * 60 for i in range(20)}, "status": "ok"}
+    fitted = compact(json.dumps(answer), budget=100)
+    data = json.loads(fitted)
+    assert len(fitted) <= 100 * 4
+    assert data["truncated_fields"] == ["conditions"]
+    assert data["summary"] == answer["summary"] and data["status"] == "ok"
+
+    records_first = {"updates": [{"location": "Hebbal", "description": "z" * 100}], **answer}
+    data = json.loads(compact(json.dumps(records_first), budget=25))
+    assert data["truncated_records"] == 1 and data["updates"] == []
+    assert data["truncated_fields"] == ["conditions", "summary"] and data["status"] == "ok"
+
+
+def test_free_text_keeps_all_but_the_logs():
+    text = "Heavy rain near Hebbal.\n## Sources consulted\nsome site"
+    assert strip_logs(text) == "Heavy rain near Hebbal."
+    assert compact(text, budget=2).endswith("…")
+
+
+def test_source_records_accepts_every_answer_format():
+    assert parse_json('```json\n[{"a": 1}]\n```') == [{"a": 1}]
+    assert source_records('[{"a": 1}, 2]') == [{"a": 1}]
+    assert source_records({"unavailable": "btp_agent"}) == []
+    assert source_records("junk") == []
+    assert [r["location"] for r in source_records(ANSWER)] == ["Silk Board Junction", "Hebbal"]
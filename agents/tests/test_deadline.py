@@ -0,0 +1,78 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from common.deadline import Arrivals, DeadlineExceeded, budget, remaining, run_within, wait_timeout
+
+
+def test_budget_nests_and_the_earlier_deadline_wins():
+    assert remaining() is None and wait_timeout() is None
+    with budget(10):
+        assert 9 < remaining() <= 10
+        with budget(100):
+            assert remaining() <= 10
+        with budget(2):
+            assert remaining() <= 2
+    with budget(0):
+        assert remaining() is None
+
+
+def test_deadline_cancels_and_raises_deadline_exceeded():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def main():
+        with budget(0.2):
+            await run_within(slow(), reserve=0.1)
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(main())
+    assert cancelled == [True]
+
+
+def test_inner_timeouts_are_not_the_deadline():
+    async def tool_with_own_timeout():
+        await asyncio.wait_for(asyncio.sleep(10), 0.01)
+
+    async def main():
+        with budget(30):
+            await run_within(tool_with_own_timeout(), reserve=1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(main())
+
+
+def test_no_deadline_waits_unbounded():
+    async def main():
+        return await run_within(asyncio.sleep(0, "done"))
+
+    assert asyncio.run(main()) == "done"
+
+
+def test_deadline_reaches_threads():
+    async def main():
+        with budget(5):
+            return await asyncio.to_thread(remaining)
+
+    assert 0 < asyncio.run(main()) <= 5
+
+
+def test_arrivals_track_pending_tools():
+    def event(calls=(), responses=()):
+        return SimpleNamespace(
+            get_function_calls=lambda: [SimpleNamespace(name=n) for n in calls],
+            get_function_responses=lambda: [SimpleNamespace(name=n, response=r) for n, r in responses],
+        )
+
+    arrivals = Arrivals()
+    arrivals.observe(event(calls=["bbmp_agent", "btp_agent", "lookup_weather"]))
+    arrivals.observe(event(responses=[("bbmp_agent", {"result": "text"}), ("lookup_weather", {"x": 1})]))
+    assert arrivals.pending == ["btp_agent"]
+    assert arrivals.results == {"bbmp_agent": ["text"], "lookup_weather": [{"x": 1}]}
@@ -0,0 +1,50 @@
+from event_store import EventStore, days_between
+from datetime import date
+
+DAYS = days_between(date(2025, 1, 1), date(2025, 1, 3))
+
+
+def _store(tmp_path):
+    return EventStore(str(tmp_path / "events.sqlite3"))
+
+
+def _event(title, day="2025-01-02", area="Indiranagar"):
+    return {"event_date": day, "title": title, "venue": "Hall", "area": area, "category": "Music"}
+
+
+def test_recorded_days_are_covered(tmp_path):
+    store = _store(tmp_path)
+    assert store.uncovered(["indiranagar"], DAYS) == {"indiranagar": DAYS}
+    store.record([_event("Gig")], ["indiranagar"], DAYS[:2])
+    assert store.uncovered(["indiranagar", "jayanagar"], DAYS) == {
+        "indiranagar": DAYS[2:],
+        "jayanagar": DAYS,
+    }
+
+
+def test_incomplete_crawl_keeps_events_but_not_coverage(tmp_path):
+    store = _store(tmp_path)
+    assert store.record([_event("Gig")], ["indiranagar"], []) == 1
+    assert store.uncovered(["indiranagar"], DAYS) == {"indiranagar": DAYS}
+    assert [e["title"] for e in store.query(["indiranagar"], DAYS[0], DAYS[-1])] == ["Gig"]
+
+
+def test_events_are_filed_under_the_crawled_area_and_deduped(tmp_path):
+    store = _store(tmp_path)
+    store.record(
+        [_event("Gig", area="HSR Layout Sector 2"), _event("Gig", area="HSR Layout"), {"title": "no date"}],
+        ["hsr layout"],
+        DAYS,
+    )
+    assert len(store.query(["hsr layout"], DAYS[0], DAYS[-1])) == 1
+    assert store.query(["jayanagar"], DAYS[0], DAYS[-1]) == []
+    assert len(store.query(None, DAYS[0], DAYS[-1])) == 1
+
+
+def test_stale_and_past_days_are_uncovered(tmp_path):
+    store = _store(tmp_path)
+    store.record([_event("Old", day=DAYS[0])], ["indiranagar"], DAYS)
+    assert store.uncovered(["indiranagar"], DAYS, max_age=-1) == {"indiranagar": DAYS}
+    store.purge_before(DAYS[1])
+    assert store.query(None, DAYS[0], DAYS[-1]) == []
+    assert store.uncovered(["indiranagar"], DAYS) == {"indiranagar": DAYS[:1]}
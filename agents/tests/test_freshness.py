@@ -0,0 +1,46 @@
+from types import SimpleNamespace
+
+from common.freshness import Freshness, fingerprint
+
+
+def _shard(area, severity="high", summary="jam"):
+    return SimpleNamespace(area=area, severity=severity, payload={"records": [{"delay": summary}]})
+
+
+def test_fingerprint_ignores_timestamps_and_long_text():
+    base = {"location": "Hebbal", "timestamp": "10:00", "summary": "x" * 100}
+    later = {"location": "Hebbal", "timestamp": "10:05", "summary": "y" * 100}
+    assert fingerprint("high", base) == fingerprint("high", later)
+    assert fingerprint("high", base) != fingerprint("low", base)
+    assert fingerprint("high", base) != fingerprint("high", {**base, "location": "Hebbal flyover"})
+
+
+def test_unseen_areas_get_the_minimum_ttl():
+    freshness = Freshness("traffic", bounds=(60, 1800))
+    assert freshness.rate("Hebbal") is None
+    assert freshness.ttl(["Hebbal"]) == 60
+    assert freshness.ttl([]) == 60
+
+
+def test_volatile_areas_expire_sooner_than_quiet_ones():
+    freshness = Freshness("traffic", bounds=(60, 1800))
+    t = 1000.0
+    for i in range(12):
+        freshness.observe(
+            ["Silk Board", "Jayanagar"],
+            [_shard("Silk Board", summary=f"{i * 5} min"), _shard("Jayanagar", severity="low")],
+            now=t + 300 * i,
+        )
+    busy, quiet = freshness.ttl(["Silk Board"]), freshness.ttl(["Jayanagar"])
+    assert 60 <= busy < quiet <= 1800
+    assert freshness.ttl(["Silk Board", "Jayanagar"]) == busy     # most volatile wins
+
+
+def test_an_incident_clearing_counts_as_a_change():
+    freshness = Freshness("energy", bounds=(300, 7200))
+    freshness.observe(["Hebbal"], [_shard("Hebbal")], now=0)
+    freshness.observe(["Hebbal"], [], now=600)   # requested, nothing reported
+    stable = Freshness("energy", bounds=(300, 7200))
+    stable.observe(["Hebbal"], [], now=0)
+    stable.observe(["Hebbal"], [], now=600)
+    assert freshness.rate("hebbal") > stable.rate("hebbal")
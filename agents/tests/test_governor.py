@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("google.adk")
+
+from google.adk.models import Gemini
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+
+from common import governor as governor_module
+from common.governor import GeminiGovernor, _Lane, governed
+
+
+@pytest.fixture
+def lane_of_one(monkeypatch):
+    gov = GeminiGovernor()
+    gov._lanes["test-model"] = _Lane(limit=1)   # window already collapsed to one slot
+    monkeypatch.setattr(governor_module, "governor", gov)
+
+    async def fake_generate(self, llm_request, stream=False):
+        yield LlmResponse(partial=True)
+        yield LlmResponse()
+
+    monkeypatch.setattr(Gemini, "generate_content_async", fake_generate)
+    return gov
+
+
+def test_slot_is_free_while_the_flow_handles_the_response(lane_of_one):
+    model = governed("test-model")
+
+    async def run():
+        coordinator = model.generate_content_async(LlmRequest())
+        await coordinator.__anext__()          # flow paused here, e.g. running an AgentTool
+        assert lane_of_one._lanes["test-model"].in_flight == 0
+        nested = [r async for r in model.generate_content_async(LlmRequest())]
+        rest = [r async for r in coordinator]
+        return nested, rest
+
+    nested, rest = asyncio.run(asyncio.wait_for(run(), timeout=5))
+    assert len(nested) == 2 and len(rest) == 1
+    assert lane_of_one._lanes["test-model"].limit >= 1
+
+
+def test_latency_excludes_time_spent_after_the_response(lane_of_one, monkeypatch):
+    monkeypatch.setattr(governor_module, "LATENCY_TARGET_SEC", 0.02)
+    model = governed("test-model")
+
+    async def run():
+        async for _ in model.generate_content_async(LlmRequest()):
+            await asyncio.sleep(0.05)
+
+    before = lane_of_one._lanes["test-model"].limit
+    asyncio.run(run())
+    assert lane_of_one._lanes["test-model"].limit > before   # healthy call widens the window
@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+from pydantic import BaseModel
+
+from common import idempotency
+from common.idempotency import DONE, RUNNING, InProgress, MemoryIdempotencyStore, SqliteIdempotencyStore, run_once
+
+
+class Digest(BaseModel):
+    value: int
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path, monkeypatch):
+    store = MemoryIdempotencyStore() if request.param == "memory" else SqliteIdempotencyStore(str(tmp_path / "i.db"))
+    monkeypatch.setattr(idempotency, "_store", store)
+    return store
+
+
+def _run(message_id, produce, published, ok=True):
+    async def publish(digest):
+        published.append(digest.value)
+        return ok
+
+    return asyncio.run(run_once(message_id, {"areas": ["a"]}, produce, publish, Digest))
+
+
+def test_duplicate_returns_the_recorded_digest_without_rerun(store):
+    runs, published = [], []
+
+    async def produce():
+        runs.append(1)
+        return Digest(value=len(runs))
+
+    assert _run("m1", produce, published) == Digest(value=1)
+    assert _run("m1", produce, published) == Digest(value=1)
+    assert runs == [1] and published == [1]
+    assert store.claim(idempotency.delivery_key("m1", {"areas": ["a"]})).state == DONE
+
+
+def test_failed_publish_is_retried_on_redelivery(store):
+    published = []
+
+    async def produce():
+        return Digest(value=7)
+
+    _run("m2", produce, published, ok=False)
+    _run("m2", produce, published)
+    _run("m2", produce, published)
+    assert published == [7, 7]
+
+
+def test_duplicate_of_a_running_delivery_is_not_acked(store):
+    store.claim(idempotency.delivery_key("m3", {"areas": ["a"]}))
+
+    async def produce():
+        raise AssertionError("must not run twice")
+
+    with pytest.raises(InProgress):
+        _run("m3", produce, [])
+
+
+def test_failed_run_releases_the_claim(store):
+    async def fail():
+        raise RuntimeError("boom")
+
+    async def produce():
+        return Digest(value=1)
+
+    with pytest.raises(RuntimeError):
+        _run("m4", fail, [])
+    assert _run("m4", produce, []) == Digest(value=1)
+
+
+def test_abandoned_claims_expire_after_the_claim_ttl(store, monkeypatch):
+    key = idempotency.delivery_key("m5", {})
+    assert store.claim(key) is None
+    assert store.claim(key).state == RUNNING
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_CLAIM_TTL_SEC", -1)
+    assert store.claim(key) is None
+
+
+def test_claim_ttl_defaults_to_just_past_the_deadline():
+    assert idempotency.REQUEST_DEADLINE_SEC < idempotency.IDEMPOTENCY_CLAIM_TTL_SEC <= idempotency.REQUEST_DEADLINE_SEC + 120
+
+
+def test_publish_error_keeps_the_digest_for_a_republish(store):
+    runs, published = [], []
+
+    async def produce():
+        runs.append(1)
+        return Digest(value=3)
+
+    async def broken(digest):
+        raise RuntimeError("publisher unavailable")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(run_once("m6", {"areas": ["a"]}, produce, broken, Digest))
+    assert _run("m6", produce, published) == Digest(value=3)   # no InProgress, no rerun
+    assert runs == [1] and published == [3]
@@ -0,0 +1,39 @@
+from types import SimpleNamespace
+
+from locality_view import LocalityView
+
+
+def _shard(area, severity="high", payload=None):
+    return SimpleNamespace(area=area, severity=severity, payload=payload or {"area": area})
+
+
+def test_requested_areas_without_a_shard_are_cleared(tmp_path):
+    view = LocalityView(path=str(tmp_path / "view.json"))
+    view.apply("traffic", [_shard("Hebbal"), _shard("Yelahanka")])
+    view.apply("energy", [_shard("Hebbal")])
+
+    assert view.apply("traffic", [_shard("Yelahanka", "low")], areas=["Hebbal", "Yelahanka"]) == 1
+    state = view.lookup(["Hebbal", "Yelahanka"])
+    assert list(state["Hebbal"]) == ["energy"]
+    assert state["Yelahanka"]["traffic"]["severity"] == "low"
+
+    view.apply("energy", [], areas=["hebbal "])
+    assert view.lookup(["Hebbal"]) == {"Hebbal": {}}
+    assert view.localities() == ["yelahanka"]
+
+
+def test_areas_outside_the_request_are_kept(tmp_path):
+    view = LocalityView(path=str(tmp_path / "view.json"))
+    view.apply("traffic", [_shard("Hebbal")])
+    view.apply("traffic", [], areas=["Yelahanka"])
+    assert view.lookup(["Hebbal"], ["traffic"])["Hebbal"]["traffic"]["severity"] == "high"
+
+
+def test_snapshot_round_trip_drops_expired_entries(tmp_path):
+    path = str(tmp_path / "view.json")
+    view = LocalityView(path=path)
+    view.apply("traffic", [_shard("Hebbal")])
+    assert view.snapshot(force=True)
+    assert not view.snapshot(force=True)    # unchanged
+    assert LocalityView(path=path).restore() == 1
+    assert LocalityView(path=path, max_age=-1).restore() == 0
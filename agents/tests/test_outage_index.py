@@ -0,0 +1,78 @@
+from outage_index import OutageIndex, parse_time
+
+from common.sharding import locations
+
+
+def _outage(location, start="2025-01-01T10:00", end="2025-01-01T14:00", reason="maintenance"):
+    return {"location": location, "start_time": start, "end_time": end, "reason": reason}
+
+
+def test_parse_time_takes_naive_times_as_ist():
+    assert parse_time("2025-01-01T10:00") == parse_time("2025-01-01T04:30Z")
+    assert parse_time(12.5) == 12.5
+    assert parse_time("tomorrow") is None and parse_time(None) is None
+
+
+def test_a_single_location_string_is_one_locality():
+    index = OutageIndex()
+    assert index.add([_outage("Koramangala")], ["Koramangala"]) == 1
+    assert index.at(["Koramangala"], parse_time("2025-01-01T12:00")) == [_outage("Koramangala")]
+    assert index.at(["k"], parse_time("2025-01-01T12:00")) == []
+
+
+def test_stab_and_overlap_queries():
+    index = OutageIndex()
+    morning = _outage(["Jayanagar", "BTM Layout"], end="2025-01-01T12:00")
+    evening = _outage("Jayanagar", start="2025-01-01T18:00", end=None)
+    index.add([morning, evening, morning], ["Jayanagar"])
+    assert index.at(["Jayanagar"], parse_time("2025-01-01T11:00")) == [morning]
+    assert index.at(["BTM Layout"], parse_time("2025-01-01T13:00")) == []
+    assert index.at(["Jayanagar"], parse_time("2025-01-01T23:00")) == [evening]   # open-ended
+    assert index.between(["Jayanagar"], parse_time("2025-01-01T11:00"), parse_time("2025-01-01T19:00")) == [
+        morning, evening,
+    ]
+    assert index.expire(parse_time("2025-01-01T12:30")) == 2
+    assert index.at(None, parse_time("2025-01-01T11:00")) == []
+
+
+def test_city_wide_outages_apply_everywhere():
+    index = OutageIndex()
+    city = {"start_time": "2025-01-01T10:00", "end_time": "2025-01-01T11:00"}
+    index.add([city])
+    assert index.at(["Hebbal"], parse_time("2025-01-01T10:30")) == [city]
+
+
+def test_coverage_only_from_complete_digests():
+    index = OutageIndex()
+    index.add([], ["Hebbal"], covered=False)
+    assert not index.covers(["Hebbal"]) and not index.covers(None)
+    index.add([], ["Hebbal"])
+    assert index.covers(["hebbal"])
+    assert not index.covers(["Hebbal", "Yelahanka"])
+    assert not index.covers(["Hebbal"], max_age=-1)
+
+
+def test_locations_accepts_either_field_and_shape():
+    assert locations({"location": "Hebbal"}) == ["Hebbal"]
+    assert locations({"locations": ["Hebbal", "", None, "RT Nagar"]}) == ["Hebbal", "RT Nagar"]
+    assert locations({"location": None}) == [] and locations({"location": 3}) == []
+
+
+def test_a_complete_refetch_replaces_the_areas_timeline():
+    index = OutageIndex()
+    cancelled = _outage("Hebbal", reason="cancelled later")
+    elsewhere = _outage("Yelahanka")
+    index.add([cancelled, elsewhere], ["Hebbal", "Yelahanka"])
+    noon = parse_time("2025-01-01T12:00")
+
+    index.add([], ["Hebbal"], covered=False)      # incomplete: keeps what is known
+    assert index.at(["Hebbal"], noon) == [cancelled]
+
+    rescheduled = _outage("Hebbal", start="2025-01-01T15:00", end="2025-01-01T16:00")
+    index.add([rescheduled], ["Hebbal"])
+    assert index.at(["Hebbal"], noon) == []
+    assert index.at(["Hebbal"], parse_time("2025-01-01T15:30")) == [rescheduled]
+    assert index.at(["Yelahanka"], noon) == [elsewhere]
+
+    index.add([cancelled], ["Hebbal"])            # announced again: indexed again
+    assert index.at(["Hebbal"], noon) == [cancelled]
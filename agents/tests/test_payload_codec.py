@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from common import payload_codec
+from common.payload_codec import ENCODING_ATTRIBUTE, decode, encode
+
+DIGEST = {"bengaluru_traffic_digest": [{"location": "Silk Board", "summary": "Slow traffic " * 20}] * 40}
+
+
+def test_compact_json_without_compression():
+    data, attributes = encode(DIGEST, compression="none")
+    assert attributes == {}
+    assert b": " not in data and b"\n" not in data
+    assert decode(data) == DIGEST
+
+
+def test_gzip_above_the_threshold_only():
+    data, attributes = encode(DIGEST, compression="gzip", threshold=1024)
+    assert attributes == {ENCODING_ATTRIBUTE: "gzip"}
+    assert len(data) < len(payload_codec.dumps(DIGEST))
+    assert decode(data, attributes) == DIGEST
+
+    small = {"location": "Hebbal"}
+    assert encode(small, compression="gzip", threshold=1024) == (payload_codec.dumps(small), {})
+
+
+def test_incompressible_payloads_stay_plain():
+    tiny = {"location": "Hebbal"}    # gzip header and trailer outweigh any saving
+    data, attributes = encode(tiny, compression="gzip", threshold=0)
+    assert attributes == {} and decode(data) == tiny
+
+
+def test_zstd_round_trip_or_gzip_fallback():
+    if payload_codec.zstandard is None:
+        data, attributes = encode(DIGEST, compression="zstd", threshold=0)
+        assert attributes == {ENCODING_ATTRIBUTE: "gzip"}
+    else:
+        data, attributes = encode(DIGEST, compression="zstd", threshold=0)
+        assert attributes == {ENCODING_ATTRIBUTE: "zstd"}
+    assert decode(data, attributes) == DIGEST
+
+
+def test_legacy_double_encoded_messages():
+    legacy = json.dumps(json.dumps(DIGEST, indent=2)).encode("utf-8")
+    assert decode(legacy) == DIGEST
+    assert decode(json.dumps("plain text").encode("utf-8")) == "plain text"
+
+
+def test_unknown_encodings_are_rejected():
+    with pytest.raises(ValueError):
+        encode(DIGEST, compression="brotli", threshold=0)
+    with pytest.raises(ValueError):
+        decode(b"{}", {ENCODING_ATTRIBUTE: "brotli"})
@@ -0,0 +1,56 @@
+import asyncio
+import time
+
+from prefetch import Prefetcher, coordinates
+
+
+def _prefetcher(warmed, concurrency=1):
+    async def warm(area, lat, lon):
+        warmed.append(area)
+
+    return Prefetcher(warm=warm, is_warm=lambda area: False, busy=lambda: False, concurrency=concurrency)
+
+
+def _drive_east(prefetcher, now=1000.0):
+    # MG Road eastwards at ~36 km/h
+    for i, lon in enumerate((77.6050, 77.6100, 77.6150)):
+        ahead = prefetcher.observe({"areas": ["MG Road"], "lat": 12.9756, "lon": lon}, now=now + 50 * i)
+    return ahead
+
+
+def test_coordinates_accept_the_backend_long_field():
+    assert coordinates({"lat": "12.9", "long": 77.6}) == (12.9, 77.6)
+    assert coordinates({"lat": 0, "lon": 0}) is None and coordinates({"lat": "x", "lon": 1}) is None
+
+
+def test_heading_predicts_localities_ahead():
+    ahead = [name for name, _, _ in _drive_east(_prefetcher([]))]
+    assert ahead and "MG Road" not in ahead
+
+
+def test_stationary_user_predicts_nothing():
+    prefetcher = _prefetcher([])
+    for i in range(3):
+        ahead = prefetcher.observe({"lat": 12.9756, "lon": 77.6050}, now=1000.0 + 60 * i)
+    assert ahead == []
+
+
+def test_warm_runs_only_start_on_the_bound_loop():
+    warmed = []
+    prefetcher = _prefetcher(warmed)
+    _drive_east(prefetcher, now=time.time() - 150)
+    payload = {"lat": 12.9756, "lon": 77.6200}
+
+    async def unbound():
+        return prefetcher.schedule(payload)
+
+    assert asyncio.run(unbound()) == []    # e.g. a Cloud Function's asyncio.run
+
+    async def bound():
+        prefetcher.bind(asyncio.get_running_loop())
+        started = prefetcher.schedule(payload)
+        await asyncio.sleep(0.01)
+        return started
+
+    started = asyncio.run(bound())
+    assert started and warmed == started
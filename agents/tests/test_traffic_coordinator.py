@@ -0,0 +1,40 @@
+import json
+from types import SimpleNamespace
+
+from common.breaker import collect_missing
+from common.deadline import Arrivals
+from host import DOMAINS, load_domain
+
+# `sub_agents`, `prompt`, … exist in every orchestrator: import in isolation, as the host does
+traffic_coordinator = load_domain(DOMAINS[0], module="traffic_coordinator")
+TrafficDigestOutput, _partial_digest = traffic_coordinator.TrafficDigestOutput, traffic_coordinator._partial_digest
+
+
+def _event(calls=(), responses=()):
+    return SimpleNamespace(
+        get_function_calls=lambda: [SimpleNamespace(name=n) for n in calls],
+        get_function_responses=lambda: [SimpleNamespace(name=n, response=r) for n, r in responses],
+    )
+
+
+def test_partial_digest_is_plain_json():
+    weather = [{"location": "Hebbal", "temperature": "24°C", "conditions": "Rain"}]
+    arrivals = Arrivals()
+    arrivals.observe(_event(calls=["bbmp_agent", "btp_agent", "lookup_weather"]))
+    arrivals.observe(_event(responses=[
+        ("bbmp_agent", {"result": json.dumps({"Live Updates": [{"location": "Hebbal", "type": "Jam"}]})}),
+        ("lookup_weather", {"result": weather}),
+    ]))
+    with collect_missing() as missing:
+        digest = _partial_digest(arrivals)
+
+    assert missing == ["btp_agent"] and digest.partial
+    wire = json.loads(digest.model_dump_json())
+    assert json.loads(wire["location_weather"]) == weather
+    assert wire["bengaluru_traffic_digest"] == [{"location": "Hebbal", "type": "Jam", "source": "bbmp_agent"}]
+    assert [s.area for s in digest.shards()] == ["hebbal"]
+
+
+def test_weather_lists_and_dicts_are_json_encoded():
+    assert json.loads(TrafficDigestOutput(bengaluru_traffic_digest=[], location_weather=[{"a": 1}]).location_weather) == [{"a": 1}]
+    assert json.loads(TrafficDigestOutput(bengaluru_traffic_digest=[], location_weather={"a": 1}).location_weather) == {"a": 1}
@@ -0,0 +1,104 @@
+"""
+localities.py – gazetteer of Bengaluru localities with approximate centroids.
+
+Used to place free-text location names on a map grid (weather cache) and
+coordinates on a locality (prefetch) without a geocoding call. Coordinates are
+neighbourhood centroids, good to ~1 km.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Dict, Optional, Tuple
+
+from common.aliases import resolve
+from common.sharding import canonical_locality
+
+LOCALITIES: Dict[str, Tuple[float, float]] = {
+    "Koramangala": (12.9352, 77.6245),
+    "HSR Layout": (12.9116, 77.6389),
+    "Silk Board": (12.9177, 77.6233),
+    "BTM Layout": (12.9166, 77.6101),
+    "Bommanahalli": (12.8996, 77.6230),
+    "Electronic City": (12.8452, 77.6602),
+    "Bellandur": (12.9304, 77.6784),
+    "Sarjapur Road": (12.9100, 77.6870),
+    "Marathahalli": (12.9569, 77.7011),
+    "Whitefield": (12.9698, 77.7500),
+    "Brookefield": (12.9650, 77.7180),
+    "Hoodi": (12.9920, 77.7160),
+    "Kadugodi": (12.9980, 77.7610),
+    "Varthur": (12.9400, 77.7470),
+    "KR Puram": (13.0075, 77.6950),
+    "Mahadevapura": (12.9915, 77.7069),
+    "Indiranagar": (12.9719, 77.6412),
+    "Domlur": (12.9610, 77.6387),
+    "Ejipura": (12.9450, 77.6270),
+    "Ulsoor": (12.9817, 77.6286),
+    "MG Road": (12.9756, 77.6066),
+    "Brigade Road": (12.9716, 77.6070),
+    "Richmond Town": (12.9640, 77.6000),
+    "Shivajinagar": (12.9857, 77.6057),
+    "Cubbon Park": (12.9763, 77.5929),
+    "Cunningham Road": (12.9860, 77.5930),
+    "Frazer Town": (12.9966, 77.6144),
+    "Banaswadi": (13.0104, 77.6482),
+    "Hennur": (13.0358, 77.6430),
+    "Nagawara": (13.0450, 77.6240),
+    "Manyata Tech Park": (13.0475, 77.6210),
+    "Hebbal": (13.0358, 77.5970),
+    "RT Nagar": (13.0213, 77.5946),
+    "Yelahanka": (13.1005, 77.5963),
+    "Kempegowda International Airport": (13.1986, 77.7066),
+    "Sadashivanagar": (13.0068, 77.5813),
+    "Malleshwaram": (13.0031, 77.5643),
+    "Yeshwanthpur": (13.0285, 77.5400),
+    "Peenya": (13.0285, 77.5197),
+    "Rajajinagar": (12.9982, 77.5530),
+    "Vijayanagar": (12.9719, 77.5365),
+    "Majestic": (12.9767, 77.5713),
+    "Lalbagh": (12.9507, 77.5848),
+    "Basavanagudi": (12.9421, 77.5754),
+    "Jayanagar": (12.9250, 77.5938),
+    "JP Nagar": (12.9063, 77.5857),
+    "Banashankari": (12.9255, 77.5468),
+    "Bannerghatta Road": (12.8880, 77.5970),
+    "Kanakapura Road": (12.8890, 77.5630),
+    "Rajarajeshwari Nagar": (12.9274, 77.5155),
+    "Kengeri": (12.9120, 77.4850),
+}
+
+_BY_KEY = {canonical_locality(name): name for name in LOCALITIES}
+
+
+def locate(text: str) -> Optional[Tuple[str, float, float]]:
+    """
+    (canonical name, lat, lon) for a location mention – its alias-table name
+    ("Central Silk Board" → Silk Board), else the longest gazetteer name
+    contained in it.
+    """
+    key = canonical_locality(text)
+    alias = resolve(text)
+    name = alias if alias in LOCALITIES else _BY_KEY.get(key)
+    if name is None:
+        mention = " ".join(str(text or "").lower().split())
+        contained = [k for k in _BY_KEY if k in mention]
+        if not contained:
+            return None
+        name = _BY_KEY[max(contained, key=len)]
+    lat, lon = LOCALITIES[name]
+    return name, lat, lon
+
+
+def distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance (haversine)."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(a))
+
+
+def nearest(lat: float, lon: float, max_km: float) -> Optional[str]:
+    """Gazetteer locality whose centroid is closest to (lat, lon), within *max_km*."""
+    name, (clat, clon) = min(LOCALITIES.items(), key=lambda kv: distance_km(lat, lon, *kv[1]))
+    return name if distance_km(lat, lon, clat, clon) <= max_km else None
@@ -1,45 +1,198 @@
+import asyncio
 import base64
 import json
 import logging
-import google.cloud.logging
-from traffic_coordinator import get_traffic_digest
-from pubsub import publish_messages
+from typing import Any, List, Optional
+from traffic_coordinator import TrafficDigestOutput, get_traffic_digest_async
+from pubsub import publish_messages, publish_sharded
+from common.sharding import SHARDED_PUBLISH, canonical_locality
+from common.admission import ADMIT, STALE, Admission, Overloaded, publish_timestamp
+from common.coalescer import Coalescer
+from common.digest_cache import DigestCache, bypassed
+from common.freshness import ADAPTIVE_FRESHNESS, Freshness
+from common.idempotency import run_once
+from prefetch import PREFETCH_AREAS, Prefetcher, coordinates
+from common.deadline import budget
+from common.profiling import requested
+from common.structured_logging import setup_logging
+from common.state_store import area_key
 
 project_id = "namm-omni-dev"
 
-def runTrafficUpdateAgent(cloudevent):
+setup_logging()   # queued JSON handler, once per process
+logger = logging.getLogger(__name__)
+
+admission = Admission("traffic")
+coalescer = Coalescer()
+digest_cache: DigestCache[TrafficDigestOutput] = DigestCache()
+freshness = Freshness("traffic")
+# per-locality slices of complete digests, so a request is served from the
+# localities warmed for it whatever other areas they were requested with
+locality_cache: DigestCache[dict] = DigestCache()
+# low-priority warm runs for the localities a moving user is heading to
+prefetcher = Prefetcher(
+    warm=lambda area, lat, lon: _traffic_digest({"areas": [area], "lat": lat, "lon": lon}, None),
+    is_warm=lambda area: _fresh_slice(area) is not None,
+    busy=lambda: admission.in_flight >= admission.max_in_flight - 1,
+)
+
+
+def enable_prefetch(loop: asyncio.AbstractEventLoop) -> None:
+    """Called by the multi-domain host: warm runs need its long-lived loop."""
+    if PREFETCH_AREAS:
+        prefetcher.bind(loop)
+
+
+async def handle_traffic_request(
+    payload: dict, publish_time: Any = None, message_id: Optional[str] = None
+) -> Optional[TrafficDigestOutput]:
     """
-    Cloud Function entry point to handle Pub/Sub messages.
+    Run the traffic pipeline for one decoded trigger payload and publish the digest.
+    Shared by the Cloud Function below and the multi-domain host.
+
+    Redeliveries of the same message are not re-run (see `idempotency`), and
+    stale or excess requests (see `admission`) are answered from the last
+    cached digest for the same areas instead of a new run. Requests for the
+    same areas inside the coalescing window share one run (see `coalescer`).
+    With ADAPTIVE_FRESHNESS=1 a cached digest younger than the areas' TTL
+    (derived from their observed change rate, see `freshness`) is served as is.
+    With PREFETCH_AREAS=1 on the multi-domain host the localities the user is
+    heading to are warmed in the background (see `prefetch`), and a request
+    whose areas are all warm is assembled from their per-locality slices.
+    A refresh (see `digest_cache.bypassing`) skips both and always runs.
     """
-    client = google.cloud.logging.Client()
-    client.setup_logging()
-    logging.basicConfig(level=logging.INFO)
-    logger = logging.getLogger(__name__)
-    logger.info("cloud event data type: %s", type(cloudevent.data))
-    logger.info("Received cloudevent data: %s", cloudevent.data)
-    message = base64.b64decode(cloudevent.data["message"]["data"]).decode("utf-8")
-    payload = json.loads(message)
+    if PREFETCH_AREAS:
+        # before the run: warming overlaps it, and a slow or failed run still warms
+        prefetcher.schedule(payload)
+    return await coalescer.submit(
+        _coalesce_key(payload),
+        _process,
+        payload,
+        publish_time,
+        message_id,
+        order=publish_timestamp(publish_time),
+    )
+
+
+def _coalesce_key(payload: dict) -> str:
+    """Area key; a refresh does not share a run that may be served from cache."""
+    key = area_key(payload.get("areas", []))
+    return f"{key}#refresh" if bypassed() else key
+
+
+async def _process(
+    payload: dict, publish_time: Any, message_id: Optional[str]
+) -> Optional[TrafficDigestOutput]:
+    return await run_once(
+        message_id,
+        payload,
+        lambda: _traffic_digest(payload, publish_time),
+        _publish,
+        TrafficDigestOutput,
+    )
+
+
+async def _traffic_digest(payload: dict, publish_time: Any) -> Optional[TrafficDigestOutput]:
     # Extract location and areas from the payload
-    lat = payload.get("lat")
-    lon = payload.get("lon")
+    lat, lon = coordinates(payload) or (None, None)
     areas = payload.get("areas", [])
-    
+    key = area_key(areas)
+
+    refresh = bypassed()
+    if ADAPTIVE_FRESHNESS and not refresh:
+        ttl = freshness.ttl(areas)
+        digest = digest_cache.get(key, max_age=ttl)
+        if digest is not None:
+            logger.info("Cached traffic digest for %s is within its %.0fs TTL – no run", key, ttl)
+            return digest
+
+    if PREFETCH_AREAS and areas and not refresh:
+        digest = _from_slices(areas)
+        if digest is not None:
+            logger.info("Every locality of %s is warm – digest assembled without a run", key)
+            return digest
+
+    verdict = admission.admit(publish_time)
+    if verdict != ADMIT:
+        digest = digest_cache.get(key)
+        if digest is None:
+            if verdict == STALE:
+                return None
+            raise Overloaded(f"traffic: no capacity and no cached digest for {key}")
+        logger.info("Answering %s traffic request from cached digest", verdict)
+        return digest
+
     # Generate the prompt for traffic information
-    
+
     example_prompt = (
         f"My current location is {lat}, {lon}. Provide traffic information for the current time in "
         f"{areas} including all data from BBMP, BTP, social media, and weather."
     )
     logger.info("sending prompt to gemini: %s", example_prompt)
     # Get the traffic digest based on the generated prompt
-    digest = get_traffic_digest(example_prompt)
-    logging.info("Traffic digest generated:\n%s", digest)   
-    # Convert the digest to JSON and publish it
     try:
-        response = json.dumps(digest.model_dump(), indent=2)
-    except json.JSONDecodeError:
-        publish_messages(digest.model_dump(), lambda e: logging.error(f"Error publishing message: {e}"))
-        return '', 200
-    # Publish the response to Pub/Sub
-    publish_messages(response, lambda e: logging.error(f"Error publishing message: {e}"))
-    return '', 200
\ No newline at end of file
+        digest = await get_traffic_digest_async(example_prompt, areas)
+    finally:
+        admission.release()
+    logger.info("Traffic digest generated:\n%s", digest)
+    digest_cache.put(key, digest)
+    freshness.observe(areas, digest.shards())
+    if PREFETCH_AREAS and not (digest.missing_sources or digest.partial):
+        _put_slices(areas, digest)
+    return digest
+
+
+def _put_slices(areas: List[str], digest: TrafficDigestOutput) -> None:
+    """Cache each requested locality's part of a complete digest (empty if it had none)."""
+    payloads = {shard.area: shard.payload for shard in digest.shards()}
+    for area in areas:
+        key = canonical_locality(area)
+        locality_cache.put(key, payloads.get(key, {"bengaluru_traffic_digest": [], "location_weather": []}))
+
+
+def _fresh_slice(area: str) -> Optional[dict]:
+    return locality_cache.get(canonical_locality(area), max_age=freshness.ttl([area]))
+
+
+def _from_slices(areas: List[str]) -> Optional[TrafficDigestOutput]:
+    """Digest assembled from the localities' cached slices, None unless all are fresh."""
+    slices = [_fresh_slice(area) for area in areas]
+    if any(s is None for s in slices):
+        return None
+    return TrafficDigestOutput(
+        bengaluru_traffic_digest=[e for s in slices for e in s["bengaluru_traffic_digest"]],
+        location_weather=json.dumps([e for s in slices for e in s["location_weather"]], ensure_ascii=False),
+    )
+
+
+async def _publish(digest: TrafficDigestOutput) -> bool:
+    """Publish the digest; False if any message failed."""
+    failures = []
+
+    def on_error(e: Exception) -> None:
+        failures.append(e)
+        logger.error(f"Error publishing message: {e}")
+
+    if SHARDED_PUBLISH:
+        await asyncio.to_thread(publish_sharded, digest.shards(), on_error)
+        return not failures
+    # Publish the digest to Pub/Sub (compact JSON, see `payload_codec`)
+    await asyncio.to_thread(publish_messages, digest.model_dump(), on_error)
+    return not failures
+
+
+def runTrafficUpdateAgent(cloudevent):
+    """
+    Cloud Function entry point to handle Pub/Sub messages.
+    """
+    logger.debug("cloud event data type: %s", type(cloudevent.data))
+    logger.debug("Received cloudevent data: %s", cloudevent.data)
+    message = base64.b64decode(cloudevent.data["message"]["data"]).decode("utf-8")
+    payload = json.loads(message)
+    message_meta = cloudevent.data["message"]
+    # the time budget (see `deadline`) starts with the delivery
+    with requested(message_meta.get("attributes")), budget():   # `profile=1` attribute
+        asyncio.run(
+            handle_traffic_request(payload, message_meta.get("publishTime"), message_meta.get("messageId"))
+        )
+    return '', 200
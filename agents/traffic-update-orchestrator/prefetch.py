@@ -0,0 +1,194 @@
+"""
+prefetch.py – speculative warm-up of the localities a moving user is heading to.
+
+Trigger payloads carry the user's position (`lat` plus `lon`, or `long` as the
+backend sends it). With PREFETCH_AREAS=1 the traffic handler feeds every
+position into a `Prefetcher`, which
+
+    1. appends it to the user's track (the last TRACK_HISTORY positions)
+    2. estimates heading and speed from the oldest to the newest position
+    3. extrapolates the position PREFETCH_HORIZONS_SEC ahead and maps each
+       point to the nearest gazetteer locality within PREFETCH_RADIUS_KM
+    4. starts a background digest run for up to PREFETCH_MAX_AREAS of those
+       localities that are not requested now and not already warm
+
+Runs are low priority: at most PREFETCH_CONCURRENCY at a time, and skipped
+while the instance is close to its admission cap. A warm run fills the
+per-locality digest cache, and a later request whose areas all have a fresh
+entry there is answered from it without a run. Nothing is published.
+
+Payloads have no user id today; `user_id` is used when present, otherwise a
+position joins the nearest recent track within TRACK_MATCH_KM. Background
+runs need a long-lived event loop: they only start once the multi-domain host
+has bound its loop (`bind`), never in a Cloud Function, whose `asyncio.run`
+would cancel them when the invocation returns.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from localities import distance_km, locate, nearest
+
+logger = logging.getLogger(__name__)
+
+# ── config ---------------------------------------------------------------------
+PREFETCH_AREAS = os.environ.get("PREFETCH_AREAS", "0") == "1"
+PREFETCH_HORIZONS_SEC = tuple(
+    float(s) for s in os.environ.get("PREFETCH_HORIZONS_SEC", "120,300,600").split(",") if s.strip()
+)
+PREFETCH_RADIUS_KM = float(os.environ.get("PREFETCH_RADIUS_KM", "2"))
+PREFETCH_MAX_AREAS = int(os.environ.get("PREFETCH_MAX_AREAS", "2"))
+PREFETCH_CONCURRENCY = int(os.environ.get("PREFETCH_CONCURRENCY", "1"))
+MIN_SPEED_KMH = 5.0
+TRACK_HISTORY = 5
+TRACK_MAX_GAP_SEC = 15 * 60
+TRACK_MATCH_KM = 5.0
+MAX_TRACKS = 1000
+
+Point = Tuple[float, float, float]   # (epoch seconds, lat, lon)
+
+
+def coordinates(payload: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """(lat, lon) of a trigger payload; the backend names the longitude `long`."""
+    lat = payload.get("lat")
+    lon = payload.get("lon", payload.get("long"))
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180) or (lat == 0 and lon == 0):
+        return None
+    return lat, lon
+
+
+class Track:
+    """Recent positions of one user."""
+
+    def __init__(self) -> None:
+        self.points: Deque[Point] = deque(maxlen=TRACK_HISTORY)
+
+    @property
+    def last(self) -> Point:
+        return self.points[-1]
+
+    def velocity(self) -> Optional[Tuple[float, float, float]]:
+        """(dlat/s, dlon/s, km/h) from the oldest to the newest point, None if unknown."""
+        if len(self.points) < 2:
+            return None
+        (t0, lat0, lon0), (t1, lat1, lon1) = self.points[0], self.points[-1]
+        if t1 - t0 <= 0:
+            return None
+        dt = t1 - t0
+        return (lat1 - lat0) / dt, (lon1 - lon0) / dt, distance_km(lat0, lon0, lat1, lon1) / dt * 3600
+
+    def predict(self, horizons: Tuple[float, ...]) -> List[Tuple[float, float]]:
+        velocity = self.velocity()
+        if velocity is None or velocity[2] < MIN_SPEED_KMH:
+            return []
+        vlat, vlon, _ = velocity
+        _, lat, lon = self.last
+        return [(lat + vlat * h, lon + vlon * h) for h in horizons]
+
+
+class Prefetcher:
+    def __init__(
+        self,
+        warm: Callable[[str, float, float], Awaitable[Any]],
+        is_warm: Callable[[str], bool],
+        busy: Callable[[], bool],
+        concurrency: int = PREFETCH_CONCURRENCY,
+    ) -> None:
+        self._warm = warm
+        self._is_warm = is_warm
+        self._busy = busy
+        self._limit = asyncio.Semaphore(concurrency)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._tracks: "OrderedDict[str, Track]" = OrderedDict()
+        self._running: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    # -- tracking ------------------------------------------------------------
+    def _track_for(self, user: Optional[str], lat: float, lon: float, now: float) -> Track:
+        if user is None:
+            # no id: continue the closest recently updated track, if any is close
+            candidates = [
+                (distance_km(lat, lon, t.last[1], t.last[2]), key)
+                for key, t in self._tracks.items()
+                if now - t.last[0] <= TRACK_MAX_GAP_SEC
+            ]
+            close = min(candidates, default=None)
+            user = close[1] if close and close[0] <= TRACK_MATCH_KM else f"anon:{uuid.uuid4().hex}"
+        track = self._tracks.get(user)
+        if track is None or (track.points and now - track.last[0] > TRACK_MAX_GAP_SEC):
+            track = self._tracks[user] = Track()
+        self._tracks.move_to_end(user)
+        while len(self._tracks) > MAX_TRACKS:
+            self._tracks.popitem(last=False)
+        return track
+
+    def observe(self, payload: Dict[str, Any], now: Optional[float] = None) -> List[Tuple[str, float, float]]:
+        """Record the payload's position; (locality, lat, lon) the user is heading to."""
+        position = coordinates(payload)
+        if position is None:
+            return []
+        now = time.time() if now is None else now
+        lat, lon = position
+        user = payload.get("user_id")
+        hits = (locate(a) for a in payload.get("areas") or () if isinstance(a, str))
+        current = {hit[0] for hit in hits if hit}
+        with self._lock:
+            track = self._track_for(str(user) if user else None, lat, lon, now)
+            track.points.append((now, lat, lon))
+            ahead = track.predict(PREFETCH_HORIZONS_SEC)
+        here = nearest(lat, lon, PREFETCH_RADIUS_KM)
+        upcoming: List[Tuple[str, float, float]] = []
+        for plat, plon in ahead:
+            name = nearest(plat, plon, PREFETCH_RADIUS_KM)
+            if name and name != here and name not in current and all(name != u[0] for u in upcoming):
+                upcoming.append((name, plat, plon))
+        return upcoming[:PREFETCH_MAX_AREAS]
+
+    # -- background runs -----------------------------------------------------
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Allow warm runs on *loop*, the long-lived loop of the multi-domain host."""
+        self._loop = loop
+
+    def schedule(self, payload: Dict[str, Any]) -> List[str]:
+        """Observe the payload and start warm runs, if called on the bound loop."""
+        if self._loop is None or asyncio.get_running_loop() is not self._loop:
+            return []
+        started = []
+        for name, lat, lon in self.observe(payload):
+            with self._lock:
+                if name in self._running or self._is_warm(name):
+                    continue
+                self._running.add(name)
+            task = self._loop.create_task(self._run(name, lat, lon))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            started.append(name)
+        if started:
+            logger.info("Prefetching %s ahead of the user", started)
+        return started
+
+    async def _run(self, name: str, lat: float, lon: float) -> None:
+        try:
+            async with self._limit:
+                if self._busy():
+                    logger.info("Skipping prefetch of %s – instance busy", name)
+                    return
+                await self._warm(name, lat, lon)
+        except Exception as e:
+            logger.info("Prefetch of %s failed: %s", name, e)
+        finally:
+            with self._lock:
+                self._running.discard(name)
@@ -2,15 +2,32 @@
 
 from google.adk import Agent
 from google.adk.tools import google_search
+from common.governor import governed
+from common.source_agent import SourceAgent, has_table_rows, tier_models
 
 from . import bbmp_prompt  # ⇨ imports BBMP_PROMPT
 
 MODEL = "gemini-2.5-pro"
+FAST_MODEL = "gemini-2.0-flash"
+FRESHNESS_SEC = 30 * 60   # reuse stored output per area for this long
 
-bbmp_agent = Agent(
-    model=MODEL,
+
+def _build(model: str, name: str) -> Agent:
+    return Agent(
+        model=governed(model),
+        name=name,
+        instruction=bbmp_prompt.BBMP_PROMPT,
+        output_key="bbmp_updates",
+        tools=[google_search],          # ← switched to Google Search
+    )
+
+
+bbmp_agent = SourceAgent.tiered(
     name="bbmp_agent",
-    instruction=bbmp_prompt.BBMP_PROMPT,
+    description="Civic-works and pothole advisories from BBMP for today",
+    build=_build,
+    models=tier_models("bbmp_agent", FAST_MODEL, MODEL),
     output_key="bbmp_updates",
-    tools=[google_search],          # ← switched to Google Search
-)
\ No newline at end of file
+    checks=[has_table_rows],
+    freshness=FRESHNESS_SEC,
+)
@@ -2,15 +2,32 @@
 
 from google.adk import Agent
 from google.adk.tools import google_search 
+from common.governor import governed
+from common.source_agent import SourceAgent, has_table_rows, tier_models
 
 from . import btp_prompt   # ⇨ imports BTP_PROMPT
 
 MODEL = "gemini-2.5-pro"
+FAST_MODEL = "gemini-2.0-flash"
+FRESHNESS_SEC = 10 * 60   # reuse stored output per area for this long
 
-btp_agent = Agent(
-    model=MODEL,
+
+def _build(model: str, name: str) -> Agent:
+    return Agent(
+        model=governed(model),
+        name=name,
+        instruction=btp_prompt.BTP_PROMPT,
+        output_key="btp_updates",
+        tools=[google_search],        # ← primary tool
+    )
+
+
+btp_agent = SourceAgent.tiered(
     name="btp_agent",
-    instruction=btp_prompt.BTP_PROMPT,
+    description="Bengaluru Traffic Police incidents reported today",
+    build=_build,
+    models=tier_models("btp_agent", FAST_MODEL, MODEL),
     output_key="btp_updates",
-    tools=[google_search],        # ← primary tool
+    checks=[has_table_rows],
+    freshness=FRESHNESS_SEC,
 )
@@ -2,15 +2,32 @@
 
 from google.adk import Agent
 from google.adk.tools import google_search
+from common.governor import governed
+from common.source_agent import SourceAgent, has_table_rows, tier_models
 
 from . import social_media_prompt   # ⇨ imports SOCIAL_MEDIA_PROMPT
 
 MODEL = "gemini-2.5-pro"
+FAST_MODEL = "gemini-2.0-flash"
+FRESHNESS_SEC = 10 * 60   # reuse stored output per area for this long
 
-social_media_agent = Agent(
-    model=MODEL,
+
+def _build(model: str, name: str) -> Agent:
+    return Agent(
+        model=governed(model),
+        name=name,
+        instruction=social_media_prompt.SOCIAL_MEDIA_PROMPT,
+        output_key="social_media_updates",
+        tools=[google_search],          # ← primary discovery tool
+    )
+
+
+social_media_agent = SourceAgent.tiered(
     name="social_media_agent",
-    instruction=social_media_prompt.SOCIAL_MEDIA_PROMPT,
+    description="Crowd-sourced Bengaluru traffic posts from today",
+    build=_build,
+    models=tier_models("social_media_agent", FAST_MODEL, MODEL),
     output_key="social_media_updates",
-    tools=[google_search],          # ← primary discovery tool
+    checks=[has_table_rows],
+    freshness=FRESHNESS_SEC,
 )
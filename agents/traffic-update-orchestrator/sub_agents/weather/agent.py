@@ -4,15 +4,32 @@
 
 from google.adk import Agent
 from google.adk.tools import google_search
+from common.governor import governed
+from common.source_agent import SourceAgent, non_empty, tier_models
 
 from . import weather_prompt   # imports WEATHER_PROMPT
 
 MODEL = "gemini-2.5-pro"
+FAST_MODEL = "gemini-2.0-flash"
+FRESHNESS_SEC = 30 * 60   # reuse stored output per area for this long
 
-weather_agent = Agent(
-    model=MODEL,
+
+def _build(model: str, name: str) -> Agent:
+    return Agent(
+        model=governed(model),
+        name=name,
+        instruction=weather_prompt.WEATHER_PROMPT,
+        output_key="weather_data",
+        tools=[google_search],        # primary tool
+    )
+
+
+weather_agent = SourceAgent.tiered(
     name="weather_agent",
-    instruction=weather_prompt.WEATHER_PROMPT,
+    description="Current weather for a list of Bengaluru locations",
+    build=_build,
+    models=tier_models("weather_agent", FAST_MODEL, MODEL),
     output_key="weather_data",
-    tools=[google_search],        # primary tool
-)
\ No newline at end of file
+    checks=[non_empty],
+    freshness=FRESHNESS_SEC,
+)
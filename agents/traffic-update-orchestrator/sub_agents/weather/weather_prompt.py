@@ -14,4 +14,22 @@ Input
 You will receive an **array of location names** (strings) from the traffic_coordinator, for example:
 ```json
 ["Koramangala", "Hebbal Flyover", "Outer Ring Road"]
+```
+
+Task
+----
+For every location, search for its current weather and report temperature,
+conditions, chance of precipitation and wind. Nearby locations may share one
+search; never invent readings – use "N/A" when a value is not found.
+
+Output Format
+-------------
+Return **only** a JSON array with one object per input location, using the
+location name exactly as given:
+```json
+[
+  {"location": "Koramangala", "temperature": "27°C", "conditions": "Partly cloudy",
+   "precipitation": "20%", "wind": "12 km/h W"}
+]
+```
 """
\ No newline at end of file
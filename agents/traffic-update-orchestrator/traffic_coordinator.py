@@ -5,11 +5,11 @@ import asyncio
 import logging
 import warnings
 import logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 from pydantic import BaseModel, Field, field_validator
-from typing import Any
+from typing import Any, List, Optional, Sequence
 from google.adk.agents import LlmAgent
+from google.adk.tools import FunctionTool
 from google.adk.tools.agent_tool import AgentTool
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
@@ -18,8 +18,15 @@ from google.genai import types , errors # for Content / Part
 from sub_agents.bbmp.agent import bbmp_agent
 from sub_agents.btp.agent import btp_agent
 from sub_agents.social_media.agent import social_media_agent
-from sub_agents.weather.agent import weather_agent
+from weather_cache import lookup_weather
 import prompt
+from common.governor import governed
+from common.breaker import collect_missing, mark_missing
+from common.compaction import source_records
+from common.deadline import Arrivals, DeadlineExceeded, run_within
+from common.profiling import profile_invocation
+from common.state_store import AREAS_STATE_KEY
+from common.sharding import Shard, canonical_locality, max_severity, records, severity_of
 
 MODEL = "gemini-2.5-pro"
 
@@ -46,17 +53,40 @@ class TrafficDigestOutput(BaseModel):
     location_weather: Any = Field(
         weather_summary=WeatherEntry
     )  # <— just raw strings
+    missing_sources: List[str] = Field(default_factory=list)   # skipped (breaker) or cut off (deadline)
+    partial: bool = False   # built from the sources that arrived before the deadline
 
     @field_validator("location_weather", mode="after")
     @classmethod
     def validate_location_weather(cls, v):
-        if isinstance(v, dict):
+        if isinstance(v, (dict, list)):
             return json.dumps(v)
         return str(v)
+
+    def shards(self) -> list[Shard]:
+        """One shard per canonical locality: its updates plus its weather."""
+        updates: dict[str, list] = {}
+        for entry in records(self.bengaluru_traffic_digest):
+            updates.setdefault(canonical_locality(entry.get("location")), []).append(entry)
+        weather: dict[str, list] = {}
+        for entry in records(self.location_weather):
+            entry = entry.get("weather_summary", entry)
+            weather.setdefault(canonical_locality(entry.get("location")), []).append(entry)
+        return [
+            Shard(
+                area=area,
+                severity=max_severity(severity_of(e.get("severity_reason")) for e in updates.get(area, [])),
+                payload={
+                    "bengaluru_traffic_digest": updates.get(area, []),
+                    "location_weather": weather.get(area, []),
+                },
+            )
+            for area in {**updates, **weather}
+        ]
 # Coordinator agent definition
 traffic_coordinator = LlmAgent(
     name="traffic_coordinator",
-    model=MODEL,
+    model=governed(MODEL),
     description="Aggregates BBMP, BTP, social feeds, and weather for a Bengaluru traffic snapshot",
     instruction=prompt.TRAFFIC_COORDINATOR_PROMPT,
     output_key="bengaluru_traffic_digest",
@@ -64,7 +94,7 @@ traffic_coordinator = LlmAgent(
         AgentTool(agent=bbmp_agent),
         AgentTool(agent=btp_agent),
         AgentTool(agent=social_media_agent),
-        AgentTool(agent=weather_agent),
+        FunctionTool(func=lookup_weather),   # grid-cached weather_agent
     ],
 )
 
@@ -80,35 +110,57 @@ runner = Runner(
     session_service=session_service,
 )
 
-async def _run_and_clean(user_input: str) -> TrafficDigestOutput:
-    # 1) Create & await a fresh session
+@profile_invocation("traffic_run_and_clean")
+async def _run_and_clean(
+    user_input: str, areas: Optional[Sequence[str]] = None
+) -> TrafficDigestOutput:
+    """Coordinator run; sources skipped by a breaker or cut off by the deadline go to missing_sources."""
+    with collect_missing() as missing:
+        digest = await _coordinate(user_input, areas)
+    digest.missing_sources = list(missing)
+    return digest
+
+
+async def _coordinate(
+    user_input: str, areas: Optional[Sequence[str]] = None
+) -> TrafficDigestOutput:
+    # 1) Create & await a fresh session (areas key the sub-agent state store)
     session_id = uuid.uuid4().hex
     await session_service.create_session(
         app_name="traffic_update_orchestrator",
         user_id="traffic_user",
         session_id=session_id,
+        state={AREAS_STATE_KEY: list(areas or [])},
     )
 
     # 2) Build the user message
     content = types.Content(role="user", parts=[types.Part(text=user_input)])
 
-    # 3) Stream events until final response
-    raw_response = None
-    async for event in runner.run_async(
-        user_id="traffic_user",
-        session_id=session_id,
-        new_message=content,
-    ):
-        if event.is_final_response():
-            raw_response = event.content.parts[0].text
-            break
+    # 3) Stream events until final response (or until the request deadline nears)
+    arrivals = Arrivals()
+
+    async def run() -> Optional[str]:
+        async for event in runner.run_async(
+            user_id="traffic_user",
+            session_id=session_id,
+            new_message=content,
+        ):
+            arrivals.observe(event)
+            if event.is_final_response():
+                return event.content.parts[0].text
+        return None
+
+    try:
+        raw_response = await run_within(run())
+    except DeadlineExceeded:
+        return _partial_digest(arrivals)
 
     if raw_response is None:
         raise RuntimeError("Agent did not emit a final response")
     # 4) Extract JSON payload
 
     payload = re.sub(r"^```json\n|```", "", raw_response, flags=re.DOTALL)
-    print(f" response: {payload}")
+    logger.debug("Coordinator response: %s", payload)
     try:
         payload = json.loads(payload)
     except json.JSONDecodeError:
@@ -132,5 +184,31 @@ async def _run_and_clean(user_input: str) -> TrafficDigestOutput:
 
 
 
-def get_traffic_digest(user_input: str) -> TrafficDigestOutput:
-    return asyncio.run(_run_and_clean(user_input))
\ No newline at end of file
+def _partial_digest(arrivals: Arrivals) -> TrafficDigestOutput:
+    """Digest from the tool results that arrived before the deadline, without a coordinator pass."""
+    for name in arrivals.pending:
+        mark_missing(name)
+    updates = [
+        {**record, "source": name}
+        for name, results in arrivals.results.items() if name != "lookup_weather"
+        for result in results
+        for record in source_records(result)
+    ]
+    weather = [entry for result in arrivals.results.get("lookup_weather", []) for entry in records(result)]
+    logger.warning(
+        "Deadline reached – partial traffic digest from %s (%d updates), missing %s",
+        sorted(arrivals.results), len(updates), arrivals.pending,
+    )
+    return TrafficDigestOutput(bengaluru_traffic_digest=updates, location_weather=weather, partial=True)
+
+
+async def get_traffic_digest_async(
+    user_input: str, areas: Optional[Sequence[str]] = None
+) -> TrafficDigestOutput:
+    return await _run_and_clean(user_input, areas)
+
+
+def get_traffic_digest(
+    user_input: str, areas: Optional[Sequence[str]] = None
+) -> TrafficDigestOutput:
+    return asyncio.run(_run_and_clean(user_input, areas))
\ No newline at end of file
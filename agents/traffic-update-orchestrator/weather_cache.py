@@ -0,0 +1,149 @@
+"""
+weather_cache.py – grid-bucketed weather layer in front of weather_agent.
+
+Weather over Bengaluru changes slowly and varies little within a few
+kilometres, so each location is snapped to a GRID_DEG × GRID_DEG cell
+(0.02° ≈ 2 km) using the `localities` gazetteer and results are cached per
+cell for WEATHER_CACHE_TTL_SEC. The coordinator calls `lookup_weather` as a
+plain function tool: cached cells are answered in-process and only the cells
+that miss go to weather_agent, in one batched run with one name per cell.
+
+Locations that are not in the gazetteer get a cell of their own, keyed by
+name.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from localities import locate
+from common.sharding import canonical_locality, records
+from common.source_agent import final_text, parse_json
+from common.state_store import AREAS_STATE_KEY
+from sub_agents.weather.agent import weather_agent
+
+logger = logging.getLogger(__name__)
+
+# ── config ---------------------------------------------------------------------
+GRID_DEG = float(os.environ.get("WEATHER_GRID_DEG", "0.02"))
+WEATHER_TTL_SEC = float(os.environ.get("WEATHER_CACHE_TTL_SEC", 15 * 60))
+WEATHER_FIELDS = ("location", "temperature", "conditions", "precipitation", "wind")
+
+
+def cell_of(location: Any) -> str:
+    """Grid cell for a location mention ("row:col"), or "name:<key>" if unknown."""
+    hit = locate(str(location or ""))
+    if hit is None:
+        return f"name:{canonical_locality(location)}"
+    _, lat, lon = hit
+    return f"{math.floor(lat / GRID_DEG)}:{math.floor(lon / GRID_DEG)}"
+
+
+def _unknown(location: str) -> Dict[str, Any]:
+    return {**{f: "N/A" for f in WEATHER_FIELDS}, "location": location}
+
+
+class WeatherCache:
+    """WeatherEntry-shaped dict per grid cell, expiring after *ttl* seconds."""
+
+    def __init__(self, ttl: float = WEATHER_TTL_SEC) -> None:
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._cells: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+    def get(self, cell: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            hit = self._cells.get(cell)
+            if hit is None:
+                return None
+            if hit[0] < time.monotonic():
+                del self._cells[cell]
+                return None
+            return hit[1]
+
+    def put(self, cell: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._cells[cell] = (time.monotonic() + self._ttl, entry)
+
+
+_cache = WeatherCache()
+
+# ── batched lookup for missed cells -------------------------------------------
+_session_service = InMemorySessionService()
+_runner = Runner(
+    agent=weather_agent,
+    app_name="weather_lookup",
+    session_service=_session_service,
+)
+
+
+async def _fetch(names: List[str]) -> List[Dict[str, Any]]:
+    session_id = uuid.uuid4().hex
+    await _session_service.create_session(
+        app_name="weather_lookup",
+        user_id="traffic_user",
+        session_id=session_id,
+        state={AREAS_STATE_KEY: names},
+    )
+    content = types.Content(role="user", parts=[types.Part(text=json.dumps(names, ensure_ascii=False))])
+    events = [
+        ev
+        async for ev in _runner.run_async(
+            user_id="traffic_user", session_id=session_id, new_message=content
+        )
+    ]
+    return records(parse_json(final_text(events)))
+
+
+async def lookup_weather(locations: List[str]) -> List[Dict[str, Any]]:
+    """
+    Current weather for Bengaluru locations.
+
+    Args:
+        locations: Deduplicated location names extracted from the traffic updates.
+
+    Returns:
+        One object per location with location, temperature, conditions,
+        precipitation and wind.
+    """
+    cells = {loc: cell_of(loc) for loc in dict.fromkeys(l for l in locations if l)}
+    entries = {cell: _cache.get(cell) for cell in set(cells.values())}
+
+    missing: Dict[str, str] = {}          # cell → representative location name
+    for loc, cell in cells.items():
+        if entries[cell] is None:
+            missing.setdefault(cell, loc)
+
+    if missing:
+        try:
+            fetched = await _fetch(list(missing.values()))
+        except Exception as exc:
+            logger.error("Weather lookup for %d cells failed: %s", len(missing), exc)
+            fetched = []
+        by_name = {canonical_locality(name): cell for cell, name in missing.items()}
+        for entry in fetched:
+            cell = by_name.get(canonical_locality(entry.get("location"))) or cell_of(entry.get("location"))
+            if cell in missing and entries.get(cell) is None:
+                entry = {f: entry.get(f, "N/A") for f in WEATHER_FIELDS}
+                _cache.put(cell, entry)
+                entries[cell] = entry
+
+    logger.info(
+        "Weather: %d locations, %d cells, %d fetched",
+        len(cells), len(entries), len(missing),
+    )
+    return [
+        {**entries[cell], "location": loc} if entries[cell] else _unknown(loc)
+        for loc, cell in cells.items()
+    ]
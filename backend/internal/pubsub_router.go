@@ -1,7 +1,11 @@
 package internal
 
 import (
+	"bytes"
+	"compress/gzip"
 	"context"
+	"fmt"
+	"io"
 	"log"
 	"sync"
 
@@ -105,7 +109,13 @@ func (r *router) receiveLoop(ctx context.Context, subscriptionID string, fan *su
 
 	// Receive blocks until ctx is done or an unrecoverable error occurs.
 	err := sub.Receive(ctx, func(ctx context.Context, m *pubsub.Message) {
-		data := string(m.Data)
+		raw, err := decodePayload(m)
+		if err != nil {
+			log.Printf("dropping undecodable message %s on %s: %v", m.ID, subscriptionID, err)
+			m.Ack()
+			return
+		}
+		data := string(raw)
 
 		// broadcast to all listeners (non-blocking)
 		fan.mu.RLock()
@@ -127,6 +137,23 @@ func (r *router) receiveLoop(ctx context.Context, subscriptionID string, fan *su
 	}
 }
 
+// decodePayload undoes the agents' payload compression (content-encoding attribute).
+func decodePayload(m *pubsub.Message) ([]byte, error) {
+	switch enc := m.Attributes["content-encoding"]; enc {
+	case "", "identity":
+		return m.Data, nil
+	case "gzip":
+		zr, err := gzip.NewReader(bytes.NewReader(m.Data))
+		if err != nil {
+			return nil, err
+		}
+		defer zr.Close()
+		return io.ReadAll(zr)
+	default:
+		return nil, fmt.Errorf("unsupported content-encoding %q", enc)
+	}
+}
+
 // Publish publishes a message to the specified topic
 func Publish(ctx context.Context, projectID, topicID string, data []byte) error {
 	r, err := getRouter(ctx, projectID)